@@ -1,10 +1,17 @@
 from .constants import Flag
-from .value import MemoryValue, ConstantValue
+from .value import MemoryValue, ConstantValue, _immutable, _intern, _values
 from typing import Union, Optional
 
 class Condition:
-    def __init__(
-            self,
+    """
+    Immutable and interned like the values it holds: building the same condition twice
+    returns the same object, so conditions compare and hash structurally by identity,
+    and a condition shared by many achievements is validated and rendered only once.
+    """
+    __slots__ = ("lvalue", "cmp", "rvalue", "flag", "hits", "_rendered", "__weakref__")
+
+    def __new__(
+            cls,
             lvalue: Union[MemoryValue, ConstantValue, int, float],
             cmp: str = "=",
             rvalue: Optional[Union[MemoryValue, ConstantValue, int, float]] = None,
@@ -14,24 +21,36 @@ class Condition:
         if isinstance(lvalue, (int, float)): lvalue = ConstantValue(lvalue)
         if isinstance(rvalue, (int, float)): rvalue = ConstantValue(rvalue)
 
-        self.lvalue = lvalue
-        self.cmp = cmp
-        self.rvalue = rvalue
-        self.flag = flag
-        self.hits = hits
-    
+        # operands are interned too, so their ids identify them while this condition lives
+        key = (cls, id(lvalue), cmp, id(rvalue), id(flag), hits)
+        reference = _values.get(key)
+        condition = reference() if reference is not None else None
+        if condition is None:
+            condition = object.__new__(cls)
+            set_slot = object.__setattr__
+            set_slot(condition, "lvalue", lvalue)
+            set_slot(condition, "cmp", cmp)
+            set_slot(condition, "rvalue", rvalue)
+            set_slot(condition, "flag", flag)
+            set_slot(condition, "hits", hits)
+            set_slot(condition, "_rendered", None)
+            _intern(key, condition)
+        return condition
+
+    __setattr__ = _immutable
+    __delattr__ = _immutable
+
+    def __reduce__(self):
+        return (Condition, (self.lvalue, self.cmp, self.rvalue, self.flag, self.hits))
+
     def _copy(self):
-        return Condition(self.lvalue, self.cmp, self.rvalue, self.flag, self.hits)
+        return self
 
     def with_hits(self, hits: int):
-        new_cond = self._copy()
-        new_cond.hits = hits
-        return new_cond
+        return Condition(self.lvalue, self.cmp, self.rvalue, self.flag, hits)
 
     def with_flag(self, flag: Flag):
-        new_cond = self._copy()
-        new_cond.flag = flag
-        return new_cond
+        return Condition(self.lvalue, self.cmp, self.rvalue, flag, self.hits)
 
     def _validate(self):        
         boolean_flags = [Flag.TRIGGER, Flag.RESET_IF, Flag.PAUSE_IF]
@@ -47,8 +66,10 @@ class Condition:
                 )
 
     def render(self) -> str:
+        if self._rendered is not None:
+            return self._rendered
 
-        self._validate() 
+        self._validate()
 
         parts = [self.flag.value]
         parts.append(self.lvalue.render())
@@ -60,7 +81,9 @@ class Condition:
         if self.hits > 0:
             parts.append(f".{self.hits}.")
         
-        return "".join(parts)
+        rendered = "".join(parts)
+        object.__setattr__(self, "_rendered", rendered)
+        return rendered
     
     def __str__(self):
         return self.render()
\ No newline at end of file
@@ -0,0 +1,511 @@
+from typing import List, Optional, Sequence, Tuple
+from .constants import Flag, MemorySize, MemoryType
+from .condition import Condition
+from .value import MemoryValue, ConstantValue, RecallValue
+
+# Flags that do not end a logical condition: they feed the condition after them.
+MODIFIER_FLAGS = (
+    Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.ADD_ADDRESS, Flag.ADD_HITS, Flag.SUB_HITS,
+    Flag.AND_NEXT, Flag.OR_NEXT, Flag.RESET_NEXT_IF, Flag.REMEMBER,
+)
+# Modifiers whose result only depends on the current frame. AddAddress is left out: an
+# indirect delta/prior only moves on frames where its condition is evaluated.
+STATELESS_MODIFIERS = (Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.AND_NEXT, Flag.OR_NEXT)
+
+BITS = (MemorySize.BIT0, MemorySize.BIT1, MemorySize.BIT2, MemorySize.BIT3,
+        MemorySize.BIT4, MemorySize.BIT5, MemorySize.BIT6, MemorySize.BIT7)
+# a bit of the delta byte is the delta of the bit. Not so for prior: the runtime keeps it
+# per memory reference, as the last value that differed, and a byte changes more often
+# than each of its bits.
+BIT_MTYPES = (MemoryType.MEM, MemoryType.DELTA)
+# for the same reason a prior word is not two prior bytes: prior reads are only listed
+READ_MTYPES = BIT_MTYPES + (MemoryType.PRIOR,)
+
+# Reads that can be joined (size -> bytes), and the sizes reading 2, 3 or 4 bytes at once
+JOINABLE = {MemorySize.BIT8: 1, MemorySize.BIT16: 2}
+WIDE_SIZES = {2: (MemorySize.BIT16, "word"), 3: (MemorySize.BIT24, "tbyte"), 4: (MemorySize.BIT32, "dword")}
+
+COMPARISONS = {
+    "=": lambda a, b: a == b, "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+}
+
+# A unit is one logical condition: its modifier conditions followed by the one they feed.
+Unit = Tuple[Condition, ...]
+
+
+class OptimizeStats:
+    """
+    Condition counts before/after and what each rule removed (in conditions).
+    """
+    def __init__(self):
+        self.before = 0
+        self.after = 0
+        self.duplicates = 0
+        self.constants = 0
+        self.alts = 0
+        self.hoisted = 0
+        self.bits = 0
+        self.adjacent = 0
+        self.shared = 0
+        self.pointer_reads = 0
+        # adjacent reads that could not be joined exactly, for a person to look at
+        self.candidates: List[str] = []
+
+    def __iadd__(self, other: "OptimizeStats"):
+        for name in ("before", "after", "duplicates", "constants", "alts", "hoisted", "bits", "adjacent",
+                     "shared", "pointer_reads", "candidates"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def report(self) -> str:
+        saved = self.before - self.after
+        percent = saved / self.before * 100 if self.before else 0.0
+        return (f"{self.before} -> {self.after} conditions (-{saved}, {percent:.1f}%): "
+                f"{self.duplicates} duplicated, {self.constants} constant, "
+                f"{self.alts} in redundant alts, {self.hoisted} hoisted into core, {self.bits} in merged bit checks, "
+                f"{self.adjacent} in joined adjacent reads, "
+                f"{self.shared} in shared pointer chains ({self.pointer_reads} pointer reads saved)"
+                + (f", {len(self.candidates)} adjacent read candidates" if self.candidates else ""))
+
+
+def units(group: Sequence[Condition]) -> List[Unit]:
+    result, current = [], []
+    for condition in group:
+        current.append(condition)
+        if condition.flag not in MODIFIER_FLAGS:
+            result.append(tuple(current))
+            current = []
+    if current:
+        # dangling modifiers: kept as they are, at the end
+        result.append(tuple(current))
+    return result
+
+
+def _plain(value) -> bool:
+    return isinstance(value, ConstantValue) or (isinstance(value, MemoryValue) and value.mtype != MemoryType.RECALL)
+
+
+def _frozen(group: Sequence[Condition]) -> bool:
+    # Remember/Recall make conditions depend on their neighbours, and conditions nesting
+    # other conditions are left for render() to report
+    for condition in group:
+        if condition.flag == Flag.REMEMBER or not _plain(condition.lvalue):
+            return True
+        if condition.rvalue is not None and not _plain(condition.rvalue):
+            return True
+    return False
+
+
+def _stateless(unit: Unit) -> bool:
+    # true or false from the current frame alone: no hits, no pause/reset/measured
+    *modifiers, last = unit
+    return (last.flag == Flag.NONE and not any(c.hits for c in unit)
+            and all(c.flag in STATELESS_MODIFIERS for c in modifiers))
+
+
+def _memoryless(unit: Unit) -> bool:
+    # no hit counts anywhere: a second copy cannot drift from the first (the pause pass
+    # stops at the first true PauseIf, so copies with hits would not count alike)
+    *modifiers, _ = unit
+    return not any(c.hits for c in unit) and all(c.flag in STATELESS_MODIFIERS for c in modifiers)
+
+
+def _constant(unit: Unit) -> Optional[bool]:
+    """
+    The result of a lone comparison between two constants, None for anything else.
+    """
+    if len(unit) != 1:
+        return None
+    condition = unit[0]
+    if condition.hits or condition.cmp not in COMPARISONS or condition.rvalue is None:
+        return None
+    values = []
+    for operand in (condition.lvalue, condition.rvalue):
+        # only unsigned 32-bit ints: that is how the runtime compares constants
+        if not isinstance(operand, ConstantValue) or type(operand.value) is not int \
+                or not 0 <= operand.value <= 0xFFFFFFFF:
+            return None
+        values.append(operand.value)
+    return COMPARISONS[condition.cmp](*values)
+
+
+def _flatten(group: List[Unit]) -> List[Condition]:
+    return [condition for unit in group for condition in unit]
+
+
+def _clean_group(group: List[Unit], stats: OptimizeStats) -> List[Unit]:
+    """
+    Removes repeated logical conditions and constant ones that cannot change the result.
+    """
+    kept, seen = [], set()
+    for unit in group:
+        if _frozen(unit):
+            # only the units that neither remember nor recall are looked at
+            kept.append(unit)
+            continue
+        # a false MeasuredIf clears the measured value where it stands, so a copy placed
+        # after a Measured is not redundant
+        if unit in seen and _memoryless(unit) and unit[-1].flag != Flag.MEASURED_IF:
+            stats.duplicates += len(unit)
+            continue
+        constant = _constant(unit)
+        flag = unit[-1].flag
+        if (constant is True and flag == Flag.NONE) or \
+                (constant is False and flag in (Flag.RESET_IF, Flag.PAUSE_IF)):
+            stats.constants += len(unit)
+            continue
+        seen.add(unit)
+        kept.append(unit)
+    if not kept and group:
+        # an always true group stays, as its first condition
+        kept.append(group[0])
+        stats.constants -= len(group[0])
+    return kept
+
+
+def _bit_check(unit: Unit) -> Optional[Tuple[Tuple[int, MemoryType], int, int]]:
+    """
+    ((address, type), bit, 0 or 1) for a lone `bitN(address) = 0/1` (or != 0/1) condition.
+    """
+    if len(unit) != 1:
+        return None
+    condition = unit[0]
+    value, constant = condition.lvalue, condition.rvalue
+    if condition.flag != Flag.NONE or condition.hits or condition.cmp not in ("=", "!=") \
+            or not isinstance(value, MemoryValue) or value.size not in BITS or value.mtype not in BIT_MTYPES \
+            or not isinstance(constant, ConstantValue) or constant.value not in (0, 1):
+        return None
+    expected = int(constant.value) if condition.cmp == "=" else 1 - int(constant.value)
+    return (value.address, value.mtype), BITS.index(value.size), expected
+
+
+def _bit_sum(unit: Unit) -> Optional[Condition]:
+    # AddSource of the 8 bits of a byte, compared to something: the byte's bitcount
+    *modifiers, last = unit
+    if len(unit) != 8 or any(c.flag != Flag.ADD_SOURCE or c.hits or c.rvalue is not None for c in modifiers):
+        return None
+    values = [c.lvalue for c in modifiers] + [last.lvalue]
+    if last.rvalue is None or last.cmp not in COMPARISONS or not _plain(last.rvalue) \
+            or not all(isinstance(v, MemoryValue) and v.mtype == MemoryType.MEM for v in values) \
+            or len({v.address for v in values}) != 1 or {v.size for v in values} != set(BITS):
+        return None
+    return Condition(MemoryValue(values[0].address, MemorySize.BITCOUNT), last.cmp, last.rvalue, last.flag, last.hits)
+
+
+def merge_bit_checks(group: Sequence[Condition]) -> List[Condition]:
+    """
+    Reads a byte once instead of once per bit:
+        0xM1234=1_0xN1234=1_0xP1234=0  ->  A:0xH1234&11_0=3
+        A:0xM1234_A:0xN1234_..._0xT1234>=5  ->  bitcount(0x1234) >= 5
+    Only lone bit conditions without flag or hits are merged (the group requires all of
+    them), two or more on the same byte (or delta), and never two that want the same bit
+    differently.
+    The mask goes on an AddSource: the runtime only accepts operators on modifiers.
+    """
+    group_units = units(group)
+    checks: dict = {}
+    for index, unit in enumerate(group_units):
+        check = _bit_check(unit)
+        if check is not None:
+            checks.setdefault(check[0], []).append((index, check[1], check[2]))
+
+    replaced: dict = {}
+    for (address, mtype), found in checks.items():
+        bits = {}
+        for _, bit, expected in found:
+            if bits.setdefault(bit, expected) != expected:
+                break
+        else:
+            if len(found) < 2:
+                continue
+            mask = sum(1 << bit for bit in bits)
+            value = sum(expected << bit for bit, expected in bits.items())
+            byte = MemoryValue(address, MemorySize.BIT8, mtype)
+            if mask == 0xFF:
+                merged: Unit = (Condition(byte, "=", value),)
+            else:
+                merged = (Condition(byte, "&", mask, Flag.ADD_SOURCE), Condition(0, "=", value))
+            replaced[found[0][0]] = merged
+            for index, _, _ in found[1:]:
+                replaced[index] = ()
+
+    result = []
+    for index, unit in enumerate(group_units):
+        unit = replaced.get(index, unit)
+        bitcount = _bit_sum(unit) if unit else None
+        result.extend((bitcount,) if bitcount is not None else unit)
+    return result
+
+
+def _lone_read(unit: Unit) -> Optional[Condition]:
+    # a byte/word compared to a constant or to another read of the same size
+    if len(unit) != 1:
+        return None
+    condition = unit[0]
+    value, other = condition.lvalue, condition.rvalue
+    if not isinstance(value, MemoryValue) or value.size not in JOINABLE or value.mtype not in READ_MTYPES \
+            or condition.cmp not in COMPARISONS:
+        return None
+    if isinstance(other, MemoryValue):
+        return condition if other.size == value.size and other.mtype in READ_MTYPES else None
+    if isinstance(other, ConstantValue) and type(other.value) is int:
+        return condition
+    return None
+
+
+def _adjacent_runs(addresses: Sequence[int], width: int) -> List[List[int]]:
+    runs: List[List[int]] = []
+    for address in sorted(addresses):
+        if runs and address == runs[-1][-1] + width:
+            runs[-1].append(address)
+        else:
+            runs.append([address])
+    return [run for run in runs if len(run) >= 2]
+
+
+def merge_adjacent_reads(group: Sequence[Condition]) -> Tuple[List[Condition], List[str]]:
+    """
+    Joins reads of consecutive bytes (or words) that the group requires to be equal to
+    something into one wider read:
+        0xH1000=1_0xH1001=2_0xH1002=0  ->  0xW1000=513
+        0xH1000=d0xH1000_0xH1001=d0xH1001  ->  0x 1000=d0x 1000
+    Equality does not depend on byte order, so the little endian sizes are used. Other
+    adjacent comparisons (ordered, with a flag or hits, or on prior values) are not the
+    same as one wide comparison; they are returned as text for a person to decide.
+    """
+    group_units = units(group)
+    exact: dict = {}       # (type, size, what it is compared to) -> {address: (unit index, constant)}
+    ambiguous = set()
+    others: dict = {}      # (type, size) -> [(address, condition)]
+    for index, unit in enumerate(group_units):
+        condition = _lone_read(unit)
+        if condition is None:
+            continue
+        value, other = condition.lvalue, condition.rvalue
+        width = JOINABLE[value.size]
+        if isinstance(other, MemoryValue):
+            target, constant = (other.mtype, other.address - value.address), None
+        else:
+            target, constant = None, other.value
+            if not 0 <= constant < 1 << 8 * width:
+                continue  # never true, not a read worth joining
+        key = (value.mtype, value.size, target)
+        prior = MemoryType.PRIOR in (value.mtype, target and target[0])
+        if condition.flag == Flag.NONE and not condition.hits and condition.cmp == "=" and not prior:
+            found = exact.setdefault(key, {})
+            if value.address in found:
+                ambiguous.add((key, value.address))
+            found.setdefault(value.address, (index, constant))
+        else:
+            others.setdefault((value.mtype, value.size), []).append((value.address, condition))
+
+    replaced: dict = {}
+    for key, found in exact.items():
+        mtype, size, target = key
+        width = JOINABLE[size]
+        addresses = [address for address in found if (key, address) not in ambiguous]
+        for run in _adjacent_runs(addresses, width):
+            for start in range(0, len(run), 4 // width):
+                chunk = run[start:start + 4 // width]
+                if len(chunk) < 2:
+                    continue
+                wide = WIDE_SIZES[len(chunk) * width][0]
+                if target is None:
+                    rvalue = ConstantValue(sum(found[address][1] << 8 * (address - chunk[0]) for address in chunk))
+                else:
+                    rvalue = MemoryValue(chunk[0] + target[1], wide, target[0])
+                indexes = sorted(found[address][0] for address in chunk)
+                replaced[indexes[0]] = (Condition(MemoryValue(chunk[0], wide, mtype), "=", rvalue),)
+                for index in indexes[1:]:
+                    replaced[index] = ()
+
+    candidates = []
+    for (mtype, size), found in others.items():
+        width = JOINABLE[size]
+        conditions = dict(found)
+        for run in _adjacent_runs(list(conditions), width):
+            reasons = set()
+            for address in run:
+                condition = conditions[address]
+                if condition.flag != Flag.NONE:
+                    reasons.add(condition.flag.name)
+                if condition.cmp != "=":
+                    reasons.add(condition.cmp)
+                if condition.hits:
+                    reasons.add("hits")
+                if MemoryType.PRIOR in (condition.lvalue.mtype, getattr(condition.rvalue, "mtype", None)):
+                    reasons.add("prior")
+            total = len(run) * width
+            wide = f"{WIDE_SIZES[total][1]} or {WIDE_SIZES[total][1]}_be" if total in WIDE_SIZES else "several dwords"
+            candidates.append(f"{len(run)} adjacent reads {conditions[run[0]].lvalue.render()}.."
+                              f"{conditions[run[-1]].lvalue.render()} ({', '.join(sorted(reasons))}): {wide}?")
+
+    result = []
+    for index, unit in enumerate(group_units):
+        result.extend(replaced.get(index, unit))
+    return result, candidates
+
+
+def share_pointer_chains(group: Sequence[Condition]) -> Tuple[List[Condition], int]:
+    """
+    Reads a pointer chain repeated in a group once per frame:
+        I:0xX1181a8_I:0xX02a0_0xH0038=1_I:0xX1181a8_I:0xX02a0_0xW00a0>5
+    becomes
+        I:0xX1181a8_K:0xX02a0_I:{recall}_0xH0038=1_I:{recall}_0xW00a0>5
+    The chain (two AddAddress or more, taken from the start of a run) that saves the most
+    reads is remembered right before the first logical condition using it. Groups that
+    already use Remember/Recall are left alone, as are PauseIf chains: the pause pass runs
+    first, before the Remember. Returns the group and the memory reads saved per frame.
+    """
+    group = list(group)
+    if _frozen(group):
+        return group, 0
+
+    # (start, length) of every run of hit-less AddAddress outside PauseIf chains
+    runs: List[Tuple[int, int]] = []
+    position = 0
+    for unit in units(group):
+        if unit[-1].flag != Flag.PAUSE_IF:
+            i = 0
+            while i < len(unit):
+                length = 0
+                while i + length < len(unit) and unit[i + length].flag == Flag.ADD_ADDRESS \
+                        and not unit[i + length].hits:
+                    length += 1
+                if length >= 2:
+                    runs.append((position + i, length))
+                i += length or 1
+        position += len(unit)
+
+    counts: dict = {}
+    for start, length in runs:
+        for size in range(2, length + 1):
+            prefix = tuple(group[start:start + size])
+            counts[prefix] = counts.get(prefix, 0) + 1
+    best, saved = None, 0
+    for prefix, count in counts.items():
+        # every copy after the first stops reading the prefix
+        reads = (count - 1) * len(prefix)
+        if count >= 2 and (reads, len(prefix)) > (saved, len(best or ())):
+            best, saved = prefix, reads
+    if best is None:
+        return group, 0
+
+    uses = [start for start, length in runs if tuple(group[start:start + len(best)]) == best]
+    first_unit = 0
+    position = 0
+    for unit in units(group):
+        if position + len(unit) > uses[0]:
+            first_unit = position
+            break
+        position += len(unit)
+    remember = list(best[:-1]) + [best[-1].with_flag(Flag.REMEMBER)]
+    recalled = Condition(RecallValue(), flag=Flag.ADD_ADDRESS)
+
+    result = group[:first_unit] + remember
+    position = first_unit
+    for start in uses:
+        result.extend(group[position:start])
+        result.append(recalled)
+        position = start + len(best)
+    result.extend(group[position:])
+    return result, saved
+
+
+def optimize_logic(core: Sequence[Condition], alts: Sequence[Sequence[Condition]]
+                   ) -> Tuple[List[Condition], List[List[Condition]], OptimizeStats]:
+    """
+    Returns core and alts with the same triggers, hits, resets, pauses and measured values
+    but fewer conditions:
+      - a logical condition without hits repeated in the same group is kept once;
+      - constant comparisons that are always true (or ResetIf/PauseIf that never are) go;
+      - stateless conditions already in core, or found in every alt, go from the alts
+        (into core, for the latter);
+      - alts that repeat another alt, can never be true, or require everything another
+        alt requires and more, go;
+      - bit checks on the same byte are merged (see merge_bit_checks), and so are equality
+        checks on adjacent bytes (see merge_adjacent_reads);
+      - a pointer chain repeated in a group is read once (see share_pointer_chains).
+    In groups using Remember/Recall only the first two apply, to the conditions that do not.
+    """
+    stats = OptimizeStats()
+    stats.before = len(core) + sum(len(alt) for alt in alts)
+
+    frozen_core = _frozen(core)
+    core_units = _clean_group(units(core), stats)
+    frozen = [_frozen(alt) for alt in alts]
+    groups = [_clean_group(units(alt), stats) for alt in alts]
+
+    # stateless conditions found in every alt move to core, as long as every alt keeps
+    # something else (an alt left empty would mean "always true")
+    hoisted = []
+    if len(groups) >= 2 and not any(frozen) and not frozen_core \
+            and (not core_units or core_units[-1][-1].flag not in MODIFIER_FLAGS):
+        common = set.intersection(*(set(unit for unit in group if _stateless(unit)) for group in groups))
+        common -= set(core_units)
+        covered = common | {unit for unit in core_units if _stateless(unit)}
+        if common and all(any(unit not in covered for unit in group) for group in groups):
+            hoisted = [unit for unit in groups[0] if unit in common]
+            core_units.extend(hoisted)
+            stats.hoisted -= len(_flatten(hoisted))
+
+    # stateless conditions already required by core are not needed again in an alt
+    if not frozen_core:
+        required = {unit for unit in core_units if _stateless(unit)}
+        for i, group in enumerate(groups):
+            kept = [unit for unit in group if unit not in required]
+            if frozen[i] or not kept or len(kept) == len(group):
+                continue
+            for unit in group:
+                if unit in required:
+                    if unit in hoisted:
+                        stats.hoisted += len(unit)
+                    else:
+                        stats.duplicates += len(unit)
+            groups[i] = kept
+
+    # whole alts: never true, repeated, or requiring more than another alt does
+    stateless = [not frozen[i] and all(_stateless(unit) for unit in group) for i, group in enumerate(groups)]
+    never = [stateless[i] and any(_constant(unit) is False for unit in group) for i, group in enumerate(groups)]
+    if groups and all(never):
+        # the achievement can never trigger; one of them says so
+        never[0] = False
+    kept_indexes: List[int] = []
+    for i, group in enumerate(groups):
+        redundant = never[i]
+        for j, other in enumerate(groups):
+            if redundant:
+                break
+            if j == i or frozen[j] or frozen[i] or never[j]:
+                continue
+            if stateless[i] and stateless[j]:
+                mine, theirs = set(group), set(other)
+                # any strict subset means some alt that is still kept requires even less
+                redundant = theirs < mine or (theirs == mine and j in kept_indexes)
+            else:
+                redundant = other == group and j in kept_indexes
+        if redundant:
+            stats.alts += len(_flatten(group))
+        else:
+            kept_indexes.append(i)
+
+    core_out = _flatten(core_units)
+    alts_out = [_flatten(groups[i]) for i in kept_indexes]
+
+    # merged after the alts are compared (it changes which conditions match), and pointer
+    # chains last, as the Remember they add would freeze the group for the rules above
+    for group in [core_out] + alts_out:
+        merged = merge_bit_checks(group)
+        stats.bits += len(group) - len(merged)
+        joined, candidates = merge_adjacent_reads(merged)
+        stats.adjacent += len(merged) - len(joined)
+        stats.candidates.extend(candidates)
+        group[:] = joined
+        shared, reads = share_pointer_chains(group)
+        stats.shared += len(group) - len(shared)
+        stats.pointer_reads += reads
+        group[:] = shared
+    stats.after = len(core_out) + sum(len(alt) for alt in alts_out)
+    return core_out, alts_out, stats
@@ -0,0 +1,156 @@
+import re
+from typing import Dict, List, Union
+from .constants import MemorySize, MemoryType, Flag
+from .condition import Condition
+from .value import MemoryValue, RecallValue, ConstantValue
+
+class ParseError(ValueError):
+    def __init__(self, message: str, text: str, position: int):
+        super().__init__(f"{message} at position {position}: '{text[:position]}' <-- '{text[position:position + 20]}'")
+        self.text = text
+        self.position = position
+
+# --- TOKENS ---
+
+# One operand: memory is (prefix) 0x(size)(address), float memory is (prefix) fF(address)
+# (K(address) is bitcount as older versions rendered it), constants are decimal, h(hex),
+# f(float) or a bare float like 0.5 (5.2. is 5 with 2 hits, as in rcheevos). No size letter is a hex digit, so "0xX1234" and "0x1234" are unambiguous.
+_OPERAND = r"""
+    (?P<recall>\{recall\})
+  | (?P<mtype>[dpb~]?)
+    (?: 0x(?P<size>[MNOPQRSTHWXIJGLUK\ ]?)(?P<address>[0-9a-f]+)
+      | (?P<wide>f[FBHIML]|K)(?P<wide_address>[0-9a-f]+) )
+  | f(?P<float>[-+]?(?:\d+(?:\.\d*)?|\.\d+))
+  | (?P<decimal>[-+]?\d+\.\d+)(?![\d.])
+  | h(?P<hex>[0-9a-f]+)
+  | (?P<int>[-+]?\d+)
+"""
+_OPERAND_TOKEN = re.compile(_OPERAND, re.VERBOSE | re.IGNORECASE)
+
+# A whole condition is matched at once; every part is optional so a failed match
+# still tells which part is missing.
+_CONDITION = re.compile(r"""
+    (?:(?P<flag>[A-Za-z]):)?
+    (?P<left>{operand})?
+    (?:(?P<cmp>!=|<=|>=|=|<|>|\*|/|&|\^|%)(?P<right>{operand})?)?
+    (?:[.(](?P<hits>\d+)[.)])?
+""".format(operand=re.sub(r"\?P<\w+>", "?:", _OPERAND)), re.VERBOSE | re.IGNORECASE)
+
+FLAGS = {flag.value[0]: flag for flag in Flag if flag is not Flag.NONE}
+SIZES = {size.value: size for size in MemorySize}
+SIZES[""] = MemorySize.BIT16
+TYPES = {"": MemoryType.MEM, "d": MemoryType.DELTA, "p": MemoryType.PRIOR,
+         "b": MemoryType.BCD, "~": MemoryType.INVERT}
+
+# Parsed conditions and operands by their text. Sets repeat the same conditions over and
+# over, so most conditions cost a single match and a lookup. Cleared when full.
+CACHE_SIZE = 1 << 16
+_conditions: Dict[str, Condition] = {}
+_operands: Dict[str, Union[MemoryValue, ConstantValue]] = {}
+
+# --- PARSER ---
+
+def _operand(token: str) -> Union[MemoryValue, ConstantValue]:
+    value = _operands.get(token)
+    if value is not None:
+        return value
+    match = _OPERAND_TOKEN.fullmatch(token)
+    group = match.lastgroup
+    if group == "recall":
+        value = RecallValue()
+    elif group in ("address", "wide_address"):
+        mtype = TYPES[match.group("mtype").lower()]
+        if group == "address":
+            size = SIZES[match.group("size").upper()]
+        else:
+            wide = match.group("wide")
+            size = SIZES["f" + wide[1].upper() if len(wide) == 2 else "K"]
+        value = MemoryValue(int(match.group(group), 16), size, mtype)
+    elif group in ("float", "decimal"):
+        value = ConstantValue(float(match.group(group)))
+    elif group == "hex":
+        value = ConstantValue(int(match.group(group), 16))
+    else:
+        value = ConstantValue(int(match.group(group)))
+    if len(_operands) >= CACHE_SIZE:
+        _operands.clear()
+    _operands[token] = value
+    return value
+
+
+def _condition(match, text: str, position: int) -> Condition:
+    # a _CONDITION match that was not in the cache yet
+    flag, left, cmp, right, hits = match.group("flag", "left", "cmp", "right", "hits")
+    if flag is not None:
+        position += 2
+        flag = FLAGS.get(flag.upper())
+        if flag is None:
+            raise ParseError(f"Unknown flag '{text[position - 2]}:'", text, position - 2)
+    if left is None:
+        raise ParseError("Expected an operand", text, position)
+    if cmp is not None and right is None:
+        raise ParseError("Expected an operand", text, match.end("cmp"))
+
+    condition = Condition(
+        _operand(left), cmp or "=", _operand(right) if right is not None else None,
+        flag or Flag.NONE, int(hits) if hits is not None else 0,
+    )
+    if len(_conditions) >= CACHE_SIZE:
+        _conditions.clear()
+    _conditions[match.group()] = condition
+    return condition
+
+
+def parse_memaddr(text: str) -> List[List[Condition]]:
+    """
+    Parses a whole memaddr string in one pass: returns the core group followed by
+    the alt groups, each a list of Condition.
+    """
+    group: List[Condition] = []
+    groups = [group]
+    position, end = 0, len(text)
+    match_condition, cached = _CONDITION.match, _conditions.get
+    while position < end:
+        if text[position] == "S":
+            group = []
+            groups.append(group)
+            position += 1
+            continue
+        match = match_condition(text, position)
+        condition = cached(match.group())
+        if condition is None:
+            condition = _condition(match, text, position)
+        group.append(condition)
+        position = match.end()
+        if position < end:
+            char = text[position]
+            if char == "_":
+                position += 1
+                if position == end or text[position] == "S":
+                    raise ParseError("Expected a condition", text, position)
+            elif char != "S":
+                raise ParseError("Expected '_' or 'S'", text, position)
+    return groups
+
+
+def parse_condition(text: str) -> Condition:
+    """
+    Parses a single condition, like "R:0xH0010=d0xH0010" or "A:0xX0020*2.5.".
+    """
+    match = _CONDITION.match(text)
+    condition = _conditions.get(match.group()) or _condition(match, text, 0)
+    if match.end() != len(text):
+        raise ParseError("Unexpected text after the condition", text, match.end())
+    return condition
+
+
+def parse_value(text: str) -> Union[MemoryValue, ConstantValue]:
+    """
+    Parses a single operand (memory, {recall} or constant).
+    """
+    match = _OPERAND_TOKEN.match(text)
+    if match is None:
+        raise ParseError("Expected an operand", text, 0)
+    if match.end() != len(text):
+        raise ParseError("Unexpected text after the operand", text, match.end())
+    return _operand(text)
@@ -1,16 +1,41 @@
-from typing import List, Union
+from typing import Dict, List, Union
+from weakref import ref
 from .constants import MemorySize, MemoryType, Flag
 
+# Values are immutable and interned: byte(0x10) always returns the same object while
+# something still references it, so a set with thousands of conditions keeps one
+# object per distinct address/size/type instead of one per helper call.
+# Entries are weak references that remove themselves once the value is collected.
+class _Entry(ref):
+    __slots__ = ("key",)
+
+def _forget(entry: _Entry):
+    if _values.get(entry.key) is entry:
+        del _values[entry.key]
+
+_values: Dict[tuple, _Entry] = {}
+
+def _intern(key: tuple, value):
+    entry = _Entry(value, _forget)
+    entry.key = key
+    _values[key] = entry
+    return value
+
+def _immutable(self, name, value=None):
+    raise AttributeError(f"{type(self).__name__} is immutable")
+
 class ConditionList(list):
+    # like Condition, these return a new list instead of changing a (possibly shared) one
+
     def with_hits(self, hits: int):
-        if self:
-            self[-1].hits = hits
-        return self
+        if not self:
+            return self
+        return ConditionList(self[:-1] + [self[-1].with_hits(hits)])
 
     def with_flag(self, flag: Flag):
-        if self:
-            self[-1].flag = flag
-        return self
+        if not self:
+            return self
+        return ConditionList(self[:-1] + [self[-1].with_flag(flag)])
 
 class MemoryExpression:
     def __init__(self, start_term, start_flag=Flag.ADD_SOURCE): 
@@ -93,11 +118,31 @@ class MemoryExpression:
     def __le__(self, other): return self._build_conditions("<=", other)
 
 class MemoryValue:
-    def __init__(self, address: int, size: MemorySize = MemorySize.BIT8, mtype: MemoryType = MemoryType.MEM):
-        self.address = address
-        self.size = size
-        self.mtype = mtype
-    
+    __slots__ = ("address", "size", "mtype", "__weakref__")
+
+    def __new__(cls, address: int, size: MemorySize = MemorySize.BIT8, mtype: MemoryType = MemoryType.MEM):
+        # enum members are singletons, and their ids hash much faster than they do
+        key = (cls, address, id(size), id(mtype))
+        reference = _values.get(key)
+        value = reference() if reference is not None else None
+        if value is None:
+            value = object.__new__(cls)
+            object.__setattr__(value, "address", address)
+            object.__setattr__(value, "size", size)
+            object.__setattr__(value, "mtype", mtype)
+            _intern(key, value)
+        return value
+
+    __setattr__ = _immutable
+    __delattr__ = _immutable
+
+    def __reduce__(self):
+        # unpickling (and copy/deepcopy) goes through the cache as well
+        return (MemoryValue, (self.address, self.size, self.mtype))
+
+    def __repr__(self):
+        return f"MemoryValue({self.render()})"
+
     @property
     def raw_address(self) -> int:
         return self.address
@@ -161,18 +206,43 @@ class MemoryValue:
 
         hex_addr = f"{self.address:04x}"
         
-        if self.size.value.startswith('f') or self.size.value == 'K':
+        if self.size.value.startswith('f'):
             return f"{self.mtype.value}{self.size.value}{hex_addr}"
         
         return f"{self.mtype.value}0x{self.size.value}{hex_addr}"
 
 class RecallValue(MemoryValue):
-    def __init__(self):
-        super().__init__(0, MemorySize.BIT8, MemoryType.RECALL)
+    __slots__ = ()
+
+    def __new__(cls):
+        return super().__new__(cls, 0, MemorySize.BIT8, MemoryType.RECALL)
+
+    def __reduce__(self):
+        return (RecallValue, ())
 
 class ConstantValue:
-    def __init__(self, value: Union[int, float]):
-        self.value = value
+    __slots__ = ("value", "__weakref__")
+
+    def __new__(cls, value: Union[int, float]):
+        # 1, 1.0 and True are equal keys but render differently (and 0.0 == -0.0)
+        key = (cls, value) if type(value) is int else (cls, type(value), repr(value))
+        reference = _values.get(key)
+        constant = reference() if reference is not None else None
+        if constant is None:
+            constant = object.__new__(cls)
+            object.__setattr__(constant, "value", value)
+            _intern(key, constant)
+        return constant
+
+    __setattr__ = _immutable
+    __delattr__ = _immutable
+
+    def __reduce__(self):
+        return (ConstantValue, (self.value,))
+
+    def __repr__(self):
+        return f"ConstantValue({self.value!r})"
+
     def render(self) -> str:
         if isinstance(self.value, float):
             return f"f{self.value}"
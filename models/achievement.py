@@ -1,5 +1,8 @@
-from typing import List, Union
+import copy
+from typing import List, Tuple, Union
 from core.condition import Condition
+from core.optimizer import OptimizeStats, optimize_logic
+from .fields import quote
 
 class Achievement:
     def __init__(self, title: str, description: str, points: int, id: int = 0, badge: str = "00000"):
@@ -44,7 +47,19 @@ class Achievement:
     def _render_group(self, conditions: List[Condition]) -> str:
         return "_".join([c.render() for c in conditions])
 
-    def render(self) -> str:
+    def optimized(self) -> Tuple["Achievement", OptimizeStats]:
+        """
+        A copy with the logic reduced by core/optimizer.py, and what was removed.
+        """
+        result = copy.copy(self)
+        result.core, result.alts, stats = optimize_logic(self.core + self.conditions, self.alts)
+        result.conditions = []
+        return result, stats
+
+    def render(self, optimize: bool = False) -> str:
+        if optimize:
+            return self.optimized()[0].render()
+
         if self.conditions:
             self.core.extend(self.conditions)
             self.conditions = []
@@ -58,6 +73,6 @@ class Achievement:
             full_mem = core_string
         
         return (
-            f'{self.id}:"{full_mem}":{self.title}:{self.description}'
+            f'{self.id}:"{full_mem}":{quote(self.title)}:{quote(self.description)}'
             f'::::{self.author}:{self.points}:::::{self.badge}'
         )
\ No newline at end of file
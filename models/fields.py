@@ -0,0 +1,39 @@
+from typing import List
+
+# User.txt lines are ':' separated fields. Fields that contain ':' or '"' are
+# written between double quotes, with '"' and '\' escaped by a backslash.
+
+def quote(text: str) -> str:
+    if ":" not in text and '"' not in text:
+        return text
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def split_fields(line: str) -> List[str]:
+    """
+    Splits a User.txt line into its fields, removing the quotes around quoted ones.
+    """
+    fields = []
+    position, end = 0, len(line)
+    while True:
+        if position < end and line[position] == '"':
+            chars = []
+            position += 1
+            while position < end and line[position] != '"':
+                if line[position] == "\\" and position + 1 < end:
+                    position += 1
+                chars.append(line[position])
+                position += 1
+            fields.append("".join(chars))
+            position += 1
+            if position < end and line[position] != ":":
+                raise ValueError(f"Expected ':' after a quoted field at position {position}: {line}")
+        else:
+            colon = line.find(":", position)
+            if colon < 0:
+                colon = end
+            fields.append(line[position:colon])
+            position = colon
+        if position >= end:
+            return fields
+        position += 1
@@ -1,6 +1,9 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from core.condition import Condition
 from core.constants import LeaderboardFormat
+from .fields import quote
+
+PARTS = ("start", "cancel", "submit", "value")
 
 class Leaderboard:
     def __init__(
@@ -21,6 +24,8 @@ class Leaderboard:
         self.cancel: List[Condition] = []
         self.submit: List[Condition] = []
         self.value: List[Condition] = []
+        # alt groups of each part; for the value they are alternatives whose maximum is used
+        self.alts: Dict[str, List[List[Condition]]] = {part: [] for part in PARTS}
 
     def _flatten(self, items) -> List[Condition]:
         flat_list = []
@@ -51,18 +56,28 @@ class Leaderboard:
         self.value = self._flatten(conditions)
         return self
 
+    def add_alt(self, part: str, conditions: Union[Condition, List]):
+        if not isinstance(conditions, list): conditions = [conditions]
+        self.alts[part].append(self._flatten(conditions))
+        return self
+
     def _render_group(self, conditions: List[Condition]) -> str:
         return "_".join([c.render() for c in conditions])
 
+    def _render_part(self, part: str) -> str:
+        separator = "$" if part == "value" else "S"
+        groups = [getattr(self, part)] + self.alts[part]
+        return separator.join(self._render_group(group) for group in groups)
+
     def render(self) -> str:
-        start = self._render_group(self.start)
-        cancel = self._render_group(self.cancel)
-        submit = self._render_group(self.submit)
-        value = self._render_group(self.value)
+        start = self._render_part("start")
+        cancel = self._render_part("cancel")
+        submit = self._render_part("submit")
+        value = self._render_part("value")
         
         lower = "1" if self.lower_is_better else "0"
 
         return (
             f'L{self.id}:"{start}":"{cancel}":"{submit}":"{value}":'
-            f'{self.format.value}:{self.title}:{self.description}:{lower}'
+            f'{self.format.value}:{quote(self.title)}:{quote(self.description)}:{lower}'
         )
\ No newline at end of file
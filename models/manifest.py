@@ -0,0 +1,78 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# The manifest is a small JSON file saved next to the output files. For every file it
+# keeps the sha256 of the content that was written, the size/mtime it had on disk right
+# after, and a short hash per line item (achievement, leaderboard) so a save can tell
+# what changed without reading the old files back.
+
+MANIFEST_VERSION = 1
+
+
+def line_hash(line: str) -> str:
+    return hashlib.blake2b(line.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def write_atomic(path: Path, chunks: Iterable[str]):
+    """
+    Streams chunks to a temporary file in the same folder and renames it over path,
+    so readers never see a half written file.
+    """
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+class Manifest:
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            # missing or unreadable: every file is written again
+            pass
+
+    def unchanged(self, path: Path, digest: str) -> bool:
+        """
+        True if path still holds exactly what the last save wrote and that had this digest.
+        """
+        entry = self.files.get(path.name)
+        if entry is None or entry["sha256"] != digest:
+            return False
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        # edited by someone else since (the toolkit, a text editor): write it again
+        return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def changed_items(self, path: Path, items: Dict[str, str]) -> int:
+        old = self.files.get(path.name, {}).get("items", {})
+        return sum(1 for key, value in items.items() if old.get(key) != value) + \
+            sum(1 for key in old if key not in items)
+
+    def record(self, path: Path, digest: str, items: Optional[Dict[str, str]] = None):
+        stat = path.stat()
+        self.files[path.name] = {
+            "sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "items": items or {},
+        }
+
+    def save(self):
+        data = json.dumps({"version": MANIFEST_VERSION, "files": self.files}, indent=1, sort_keys=True)
+        write_atomic(self.path, [data])
@@ -5,8 +5,42 @@ from core.constants import LeaderboardFormat
 
 class RichPresence:
     def __init__(self):
+        self.formats: Dict[str, str] = {}
         self.lookups: Dict[str, Dict[int, str]] = {}
         self.displays: List[tuple] = []
+
+    @classmethod
+    def parse(cls, text: str) -> "RichPresence":
+        """
+        Builds a RichPresence from a Rich.txt script (Format, Lookup and Display sections).
+        Lookup keys that are not plain numbers ("0x01", "1-5", "*") are kept as text.
+        """
+        rp = cls()
+        section = None
+        for line in text.splitlines():
+            if line.startswith("Format:"):
+                section, name = "format", line[len("Format:"):]
+            elif line.startswith("Lookup:"):
+                section, name = "lookup", line[len("Lookup:"):]
+                rp.lookups[name] = {}
+            elif line.startswith("Display:"):
+                section = "display"
+            elif section == "format" and line.startswith("FormatType="):
+                rp.formats[name] = line[len("FormatType="):]
+            elif section == "lookup" and "=" in line:
+                key, value = line.split("=", 1)
+                rp.lookups[name][int(key) if key.isdigit() and str(int(key)) == key else key] = value
+            elif section == "display" and line:
+                if line.startswith("?"):
+                    cond, display = line[1:].split("?", 1)
+                    rp.displays.append((cond, display))
+                else:
+                    rp.displays.append(("", line))
+        return rp
+
+    def add_format(self, name: str, format: str = "VALUE"):
+        self.formats[name] = format
+        return self
     
     def add_lookup(self, name: str, value: Dict[int, str]):
         self.lookups[name] = value
@@ -24,6 +58,11 @@ class RichPresence:
     def render(self) -> str:
         lines = []
 
+        for name, format in self.formats.items():
+            lines.append(f"Format:{name}")
+            lines.append(f"FormatType={format}")
+            lines.append("")
+
         for name, values in self.lookups.items():
             lines.append(f"Lookup:{name}")
             for k, v in values.items():
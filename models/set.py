@@ -1,9 +1,99 @@
-from typing import List, Optional
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+from typing import Iterator, List, Optional, Tuple, Union
 from pathlib import Path
+from core.constants import LeaderboardFormat
+from core.optimizer import OptimizeStats
+from core.parser import parse_memaddr
 from .achievement import Achievement
+from .fields import split_fields
 from .leaderboard import Leaderboard
+from .manifest import Manifest, line_hash, write_atomic
 from .rich_presence import RichPresence
 
+# Leaderboard formats the server still accepts under their older names
+FORMAT_ALIASES = {
+    "TIME": LeaderboardFormat.FRAMES,
+    "TIMESECS": LeaderboardFormat.SECS,
+    "POINTS": LeaderboardFormat.SCORE,
+    "OTHER": LeaderboardFormat.SCORE,
+}
+
+# Chunks handed to each worker by save(workers=N), so one slow chunk does not leave the
+# other processes idle
+CHUNKS_PER_WORKER = 4
+# Below this many achievements and leaderboards, save(workers=N) renders serially: starting
+# the pool costs about as much as rendering 500 items, and handing the objects over adds a
+# sixth to each one. Workers are forked so they share the objects instead of unpickling them
+# (spawned workers made a 20000 item save 8x slower); without fork, saving is serial.
+PARALLEL_MIN_ITEMS = 5000
+
+# --- LOADING ---
+
+def _leaderboard_format(name: str) -> LeaderboardFormat:
+    if name in FORMAT_ALIASES:
+        return FORMAT_ALIASES[name]
+    return LeaderboardFormat(name)
+
+def _set_logic(lb: Leaderboard, part: str, memaddr: str):
+    if part == "value":
+        # value alternatives are separated by '$' (the highest one is used)
+        groups = [group for value in memaddr.split("$") for group in parse_memaddr(value)]
+    else:
+        groups = parse_memaddr(memaddr)
+    setattr(lb, part, groups[0])
+    lb.alts[part] = groups[1:]
+
+def _achievement(ach_id, memaddr: str, title: str, description: str, points, author: str, badge: str) -> Achievement:
+    ach = Achievement(title, description, int(points or 0), id=int(ach_id), badge=badge)
+    ach.author = author
+    groups = parse_memaddr(memaddr)
+    ach.add_core(groups[0])
+    for alt in groups[1:]:
+        ach.add_alt(alt)
+    return ach
+
+def _leaderboard(lb_id, parts: dict, format: str, title: str, description: str, lower_is_better) -> Leaderboard:
+    lb = Leaderboard(title, description, id=int(lb_id), format=_leaderboard_format(format),
+                     lower_is_better=bool(int(lower_is_better or 0)))
+    for part, memaddr in parts.items():
+        _set_logic(lb, part, memaddr)
+    return lb
+
+# --- PARALLEL RENDERING ---
+
+_worker_items: List[Union[Achievement, Leaderboard]] = []
+
+
+def _init_render_worker(items: List[Union[Achievement, Leaderboard]]):
+    # the objects are handed over once per worker process instead of once per chunk
+    global _worker_items
+    _worker_items = items
+
+
+def _render_range(start: int, stop: int) -> Tuple[List[str], Optional[int], Optional[Exception]]:
+    # returns the lines rendered before a failure too, so the caller can report the
+    # failing object exactly like a serial save does
+    lines = []
+    for index in range(start, stop):
+        try:
+            lines.append(_worker_items[index].render() + "\n")
+        except Exception as e:
+            return lines, index, e
+    return lines, None, None
+
+
+def _report_render_error(item: Union[Achievement, Leaderboard]):
+    if isinstance(item, Leaderboard):
+        print(f"error in Leaderboard ID {item.id}: '{item.title}'")
+    else:
+        print(f"error in ID achievement {item.id}: '{item.title}'")
+        print(f" description: {item.description}")
+
+
 class AchievementSet:
     def __init__(self, game_id: int, title: str):
         self.game_id = game_id
@@ -12,6 +102,77 @@ class AchievementSet:
         self.leaderboards: List[Leaderboard] = []
         self.rich_presence: Optional[RichPresence] = None
         self.next_free_id = 111001
+        self.version = "1.0"
+
+    @classmethod
+    def load_user_txt(cls, path: Union[str, Path], game_id: Optional[int] = None) -> "AchievementSet":
+        """
+        Builds a set straight from a {game_id}-User.txt file (and the {game_id}-Rich.txt
+        next to it, if there is one), without generating a script. The file is read line
+        by line. Saving the set again writes the same logic, in the rendered form (see
+        core/parser.py): files PyCheevos saved come back byte for byte.
+        """
+        path = Path(path)
+        if game_id is None:
+            game_id = int(path.name.split("-")[0])
+
+        with open(path, encoding="utf-8") as f:
+            version = f.readline().rstrip("\r\n")
+            achievement_set = cls(game_id, f.readline().rstrip("\r\n"))
+            achievement_set.version = version
+            for line in f:
+                line = line.rstrip("\r\n")
+                if not line:
+                    continue
+                try:
+                    if line[0].isdigit():
+                        # id:"memaddr":title:description:::::author:points:::::badge
+                        fields = split_fields(line) + [""] * 14
+                        achievement_set.add_achievement(_achievement(
+                            fields[0], fields[1], fields[2], fields[3], fields[8], fields[7], fields[13]))
+                    elif line[0] == "L":
+                        # Lid:"start":"cancel":"submit":"value":format:title:description:lower_is_better
+                        fields = split_fields(line[1:]) + [""] * 9
+                        parts = dict(zip(("start", "cancel", "submit", "value"), fields[1:5]))
+                        achievement_set.add_leaderboard(_leaderboard(
+                            fields[0], parts, fields[5], fields[6], fields[7], fields[8]))
+                except ValueError as e:
+                    raise ValueError(f"{path}: {e}\n  in line: {line}") from e
+
+        rich = path.with_name(f"{game_id}-Rich.txt")
+        if rich.exists():
+            achievement_set.add_rich_presence(RichPresence.parse(rich.read_text(encoding="utf-8")))
+        return achievement_set
+
+    @classmethod
+    def load_patch_json(cls, patch: Union[dict, str, Path]) -> "AchievementSet":
+        """
+        Builds a set from the server's patch data: the response dict itself, or the path
+        of a RACache/Data/{game_id}.json file.
+        """
+        if not isinstance(patch, dict):
+            with open(patch, encoding="utf-8") as f:
+                patch = json.load(f)
+        data = patch.get("PatchData", patch)
+        achievement_set = cls(int(data.get("ID", data.get("GameId", 0))), data.get("Title", ""))
+
+        for source in data.get("Sets") or [data]:
+            for a in source.get("Achievements", []):
+                achievement_set.add_achievement(_achievement(
+                    a["ID"], a.get("MemAddr", ""), a.get("Title", ""), a.get("Description", ""),
+                    a.get("Points", 0), a.get("Author", ""), a.get("BadgeName", "00000")))
+            for l in source.get("Leaderboards", []):
+                # Mem is "STA:start::CAN:cancel::SUB:submit::VAL:value"
+                mem = dict(piece.split(":", 1) for piece in l.get("Mem", "").split("::") if ":" in piece)
+                parts = {"start": mem.get("STA", ""), "cancel": mem.get("CAN", ""),
+                         "submit": mem.get("SUB", ""), "value": mem.get("VAL", "")}
+                achievement_set.add_leaderboard(_leaderboard(
+                    l["ID"], parts, l.get("Format", "SCORE"), l.get("Title", ""), l.get("Description", ""),
+                    l.get("LowerIsBetter", 0)))
+
+        if data.get("RichPresencePatch"):
+            achievement_set.add_rich_presence(RichPresence.parse(data["RichPresencePatch"]))
+        return achievement_set
 
     def add_achievement(self, achievement: Achievement):
         if achievement.id == 0:
@@ -31,43 +192,119 @@ class AchievementSet:
         self.rich_presence = rp
         return self
 
-    def save(self, path: Optional[str] = None):
+    # --- SAVING ---
+
+    def _optimized(self) -> List[Achievement]:
         """
-        Generates the User.txt and Rich.txt files.
+        Optimized copies of the achievements (see core/optimizer.py); the set itself is not changed.
+        """
+        achievements, stats, candidates = [], OptimizeStats(), []
+        for achievement in self.achievements:
+            optimized, achievement_stats = achievement.optimized()
+            achievements.append(optimized)
+            stats += achievement_stats
+            candidates.extend(f"  {achievement.id} '{achievement.title}': {text}" for text in achievement_stats.candidates)
+        print(f"Optimized {len(achievements)} achievements: {stats.report()}")
+        for line in candidates:
+            print(line)
+        return achievements
+
+    def _rendered(self, workers: Optional[int] = None, achievements: Optional[List[Achievement]] = None
+                  ) -> Iterator[Tuple[Union[Achievement, Leaderboard], str]]:
+        """
+        Yields (object, line) for every achievement then every leaderboard, in order.
+        With workers > 1 (at most one per CPU) and at least PARALLEL_MIN_ITEMS objects, they
+        are rendered in a pool of forked processes, in contiguous chunks.
+        """
+        items = (self.achievements if achievements is None else achievements) + self.leaderboards
+        workers = min(workers or 1, os.cpu_count() or 1)
+        if workers <= 1 or len(items) < PARALLEL_MIN_ITEMS or "fork" not in get_all_start_methods():
+            for item in items:
+                try:
+                    line = item.render() + "\n"
+                except Exception as e:
+                    _report_render_error(item)
+                    raise e
+                yield item, line
+            return
+
+        chunk = -(-len(items) // (workers * CHUNKS_PER_WORKER)) or 1
+        ranges = [(start, min(start + chunk, len(items))) for start in range(0, len(items), chunk)]
+        with ProcessPoolExecutor(workers, get_context("fork"), _init_render_worker, (items,)) as pool:
+            futures = [pool.submit(_render_range, start, stop) for start, stop in ranges]
+            for (start, _), future in zip(ranges, futures):
+                lines, failed, error = future.result()
+                yield from zip(items[start:start + len(lines)], lines)
+                if failed is not None:
+                    for pending in futures:
+                        pending.cancel()
+                    _report_render_error(items[failed])
+                    raise error
+
+    def _user_lines(self, workers: Optional[int] = None, achievements: Optional[List[Achievement]] = None
+                    ) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (key, line) for each line of User.txt.
+        """
+        yield "version", f"{self.version}\n"
+        yield "title", f"{self.title}\n"
+        for item, line in self._rendered(workers, achievements):
+            yield f"{'L' if isinstance(item, Leaderboard) else 'A'}{item.id}", line
+
+    def output_dir(self, path: Optional[str] = None) -> Path:
+        """
+        The folder save(path) writes to: path, or output/{title} - {game_id} in the working directory.
         """
         if path is None:
-            root = Path.cwd()
-            output = root / "output" / f"{self.title} - {self.game_id}"
-        else:
-            output = Path(path)
+            return Path.cwd() / "output" / f"{self.title} - {self.game_id}"
+        return Path(path)
 
+    def save(self, path: Optional[str] = None, force: bool = False, workers: Optional[int] = None,
+             optimize: bool = False) -> List[Path]:
+        """
+        Generates the User.txt and Rich.txt files.
+        Files whose content did not change since the last save are left untouched (see
+        models/manifest.py), the others are replaced atomically. Returns the written files.
+        workers > 1 renders achievements and leaderboards in that many processes.
+        optimize writes the achievements' logic through core/optimizer.py (same triggers, fewer conditions).
+        """
+        output = self.output_dir(path)
         output.mkdir(parents=True, exist_ok=True)
-        
+        manifest = Manifest(output / f".{self.game_id}-manifest.json")
+        written = []
+
         # 1. Saves Achievements/Leaderboards (User.txt)
         user_file = output / f"{self.game_id}-User.txt"
-        with open(user_file, "w", encoding="utf-8") as f:
-            f.write("1.0\n")
-            f.write(f"{self.title}\n")
+        achievements = self._optimized() if optimize else None
+        # rendered once, then hashed and kept for the write below
+        rendered = list(self._user_lines(workers, achievements))
+        digest = hashlib.sha256()
+        items = {}
+        for key, line in rendered:
+            digest.update(line.encode("utf-8"))
+            items[key] = line_hash(line)
+        digest = digest.hexdigest()
 
-            for ach in self.achievements:
-                try:
-                    f.write(ach.render() + "\n")
-                except Exception as e:
-                    print(f"error in ID achievement {ach.id}: '{ach.title}'")
-                    print(f" description: {ach.description}")
-                    raise e
-            
-            for lb in self.leaderboards:
-                try:
-                    f.write(lb.render() + "\n")
-                except Exception as e:
-                    print(f"error in Leaderboard ID {lb.id}: '{lb.title}'")
-                    raise e
-        print(f"Generated User file: {user_file}")
+        if force or not manifest.unchanged(user_file, digest):
+            changed = manifest.changed_items(user_file, items)
+            write_atomic(user_file, (line for _, line in rendered))
+            manifest.record(user_file, digest, items)
+            written.append(user_file)
+            print(f"Generated User file: {user_file}" + (f" ({changed} changed)" if changed else ""))
 
         # 2. Saves Rich Presence (Rich.txt)
         if self.rich_presence:
             rp_file = output / f"{self.game_id}-Rich.txt"
-            with open(rp_file, "w", encoding="utf-8") as f:
-                f.write(self.rich_presence.render())
-            print(f"Generated Rich Presence file: {rp_file}")
\ No newline at end of file
+            script = self.rich_presence.render()
+            digest = hashlib.sha256(script.encode("utf-8")).hexdigest()
+            if force or not manifest.unchanged(rp_file, digest):
+                write_atomic(rp_file, [script])
+                manifest.record(rp_file, digest)
+                written.append(rp_file)
+                print(f"Generated Rich Presence file: {rp_file}")
+
+        if written:
+            manifest.save()
+        else:
+            print(f"Up to date: {output}")
+        return written
\ No newline at end of file
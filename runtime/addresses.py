@@ -0,0 +1,124 @@
+import re
+from typing import Iterable, List, Sequence, Set, Tuple
+from core.condition import Condition
+from core.constants import Flag, MemorySize, MemoryType
+from core.value import MemoryValue
+from models.set import AchievementSet
+from .evaluator import unwrap
+from .memory import SIZE_BYTES
+
+# Memory references inside already rendered logic (rich presence displays and macros)
+_MEMREF = re.compile(r"(?<![0-9A-Za-z])[dpb~]?(?:0x([MNOPQRSTHLUXWIJGK ]?)|f([FBHIML]))([0-9A-Fa-f]+)")
+_SIZE_CODES = {size.value: size for size in MemorySize}
+
+
+class WatchedAddresses:
+    """
+    Every memory read the logic of a set can make.
+
+    `reads` holds (address, width) pairs at fixed addresses. Reads behind an AddAddress
+    chain cannot be resolved statically; they are kept in `dynamic` as
+    (pointer chain, offset, width) so a recorder can capture them some other way.
+    """
+    def __init__(self):
+        self.reads: Set[Tuple[int, int]] = set()
+        self.dynamic: Set[Tuple[str, int, int]] = set()
+
+    def add(self, address: int, size: MemorySize):
+        self.reads.add((address, SIZE_BYTES.get(size, 1)))
+
+    def add_dynamic(self, chain: str, offset: int, size: MemorySize):
+        self.dynamic.add((chain, offset, SIZE_BYTES.get(size, 1)))
+
+    def ranges(self, gap: int = 0) -> List[Tuple[int, int]]:
+        """
+        Merges the static reads into sorted (start, length) ranges.
+        Ranges separated by `gap` bytes or less are joined into one.
+        """
+        merged: List[List[int]] = []
+        for address, width in sorted(self.reads):
+            end = address + width
+            if merged and address <= merged[-1][1] + gap:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([address, end])
+        return [(start, end - start) for start, end in merged]
+
+    @property
+    def bytes_per_frame(self) -> int:
+        return sum(length for _, length in self.ranges())
+
+    def render(self, gap: int = 0) -> str:
+        """
+        One "start length" line per range (hex), followed by the dynamic reads as comments.
+        """
+        lines = [f"0x{start:06x} {length}" for start, length in self.ranges(gap)]
+        for chain, offset, width in sorted(self.dynamic):
+            lines.append(f"# dynamic {chain} +0x{offset:x} {width}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.render()
+
+
+def _walk_conditions(watched: WatchedAddresses, conditions: Sequence[Condition]):
+    chain: List[str] = []
+    for cond in conditions:
+        cond = unwrap(cond)
+        values = [v for v in (cond.lvalue, cond.rvalue)
+                  if isinstance(v, MemoryValue) and v.mtype != MemoryType.RECALL]
+        for value in values:
+            if chain:
+                watched.add_dynamic("_".join(chain), value.address, value.size)
+            else:
+                watched.add(value.address, value.size)
+
+        if cond.flag == Flag.ADD_ADDRESS:
+            chain.append(cond.render())
+        else:
+            chain = []
+
+
+def _walk_rendered(watched: WatchedAddresses, text: str):
+    chain: List[str] = []
+    for part in text.split("_"):
+        for match in _MEMREF.finditer(part):
+            code = match.group(1) if match.group(1) is not None else "f" + match.group(2)
+            size = _SIZE_CODES.get(code or " ", MemorySize.BIT16)
+            address = int(match.group(3), 16)
+            if chain:
+                watched.add_dynamic("_".join(chain), address, size)
+            else:
+                watched.add(address, size)
+        if part.startswith("I:"):
+            chain.append(part)
+        else:
+            chain = []
+
+
+def _groups(achievement_set: AchievementSet) -> Iterable[Sequence[Condition]]:
+    for ach in achievement_set.achievements:
+        yield ach.core + ach.conditions
+        yield from ach.alts
+    for lb in achievement_set.leaderboards:
+        yield from (lb.start, lb.cancel, lb.submit, lb.value)
+        for alts in lb.alts.values():
+            yield from alts
+
+
+def watched_addresses(achievement_set: AchievementSet) -> WatchedAddresses:
+    """
+    Collects the addresses and byte widths read by the achievements, leaderboards
+    and rich presence of a set.
+    """
+    watched = WatchedAddresses()
+    for group in _groups(achievement_set):
+        _walk_conditions(watched, group)
+
+    rp = achievement_set.rich_presence
+    if rp:
+        for condition, text in rp.displays:
+            _walk_rendered(watched, condition)
+            for macro in re.findall(r"@\w+\(([^)]*)\)", text):
+                _walk_rendered(watched, macro)
+    return watched
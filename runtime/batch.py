@@ -0,0 +1,217 @@
+import csv
+import json
+import os
+import runpy
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from models.set import AchievementSet
+from .compiler import CompiledSet
+from .trace import Trace
+
+TRACE_SUFFIX = ".trace"
+
+# Shards handed to each worker, so a slow trace does not leave the other cores idle
+SHARDS_PER_WORKER = 4
+
+# (trace name, achievement id, [[first, last], ...] frame runs)
+Result = Tuple[str, int, List[List[int]]]
+
+
+def load_set(script: Union[str, Path]) -> AchievementSet:
+    """
+    Runs a set script (like the ones in scripts/) and returns the AchievementSet it builds,
+    without writing the output files its save() call would.
+    """
+    original = AchievementSet.save
+    AchievementSet.save = lambda self, *args, **kwargs: None
+    try:
+        namespace = runpy.run_path(str(script), run_name="__main__")
+    finally:
+        AchievementSet.save = original
+
+    sets = [value for value in namespace.values() if isinstance(value, AchievementSet)]
+    if not sets:
+        raise ValueError(f"{script} does not define an AchievementSet")
+    return sets[-1]
+
+
+def frame_runs(frames: Sequence[int]) -> List[List[int]]:
+    """
+    Compresses sorted frame numbers into [first, last] runs: logic that stays true
+    for a whole level is one entry instead of thousands.
+    """
+    runs: List[List[int]] = []
+    for frame in frames:
+        if runs and frame == runs[-1][1] + 1:
+            runs[-1][1] = frame
+        else:
+            runs.append([frame, frame])
+    return runs
+
+
+# --- WORKERS ---
+
+_worker_set: Optional[AchievementSet] = None
+_worker_compiled: Dict[Tuple[int, ...], CompiledSet] = {}
+
+
+def _init_worker(achievement_set: AchievementSet):
+    # the set is pickled once per worker process instead of once per task
+    global _worker_set
+    _worker_set = achievement_set
+    _worker_compiled.clear()
+
+
+def _compiled(indexes: Tuple[int, ...]) -> CompiledSet:
+    if indexes not in _worker_compiled:
+        subset = AchievementSet(_worker_set.game_id, _worker_set.title)
+        subset.achievements = [_worker_set.achievements[i] for i in indexes]
+        _worker_compiled[indexes] = CompiledSet(subset)
+    compiled = _worker_compiled[indexes]
+    compiled.reset()
+    return compiled
+
+
+def _evaluate(trace_path: str, indexes: Tuple[int, ...]) -> List[Result]:
+    compiled = _compiled(indexes)
+    name = Path(trace_path).name
+    with Trace(trace_path) as trace:
+        triggers = compiled.run(trace)
+    return [(name, ach_id, frame_runs(frames)) for ach_id, frames in triggers.items()]
+
+
+# --- RUNNER ---
+
+def find_traces(directory: Union[str, Path]) -> List[Path]:
+    directory = Path(directory)
+    if directory.is_file():
+        return [directory]
+    return sorted(p for p in directory.iterdir() if p.suffix == TRACE_SUFFIX)
+
+
+def _shards(count: int, traces: Sequence[Path], workers: int) -> List[Tuple[str, Tuple[int, ...]]]:
+    per_trace = max(1, min(count, -(-workers * SHARDS_PER_WORKER // max(1, len(traces)))))
+    chunks = [tuple(range(count))[i::per_trace] for i in range(per_trace)]
+    return [(str(trace), chunk) for trace in traces for chunk in chunks if chunk]
+
+
+def run_batch(achievement_set: AchievementSet, traces: Sequence[Union[str, Path]],
+              workers: Optional[int] = None) -> Iterator[Result]:
+    """
+    Evaluates every achievement against every trace, sharding the (achievement, trace)
+    pairs across a process pool, and yields the results as each shard finishes.
+    """
+    workers = workers or os.cpu_count() or 1
+    traces = [Path(t) for t in traces]
+    shards = _shards(len(achievement_set.achievements), traces, workers)
+
+    if workers == 1:
+        _init_worker(achievement_set)
+        for trace, indexes in shards:
+            yield from _evaluate(trace, indexes)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(achievement_set,)) as pool:
+        futures = [pool.submit(_evaluate, trace, indexes) for trace, indexes in shards]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+# --- REPORTS ---
+
+def build_report(achievement_set: AchievementSet, results: Sequence[Result]) -> dict:
+    """
+    Report layout: {"game_id", "title", "achievements": {id: title},
+    "results": {trace: {id: [[first, last], ...]}}}, with ids as strings (JSON keys).
+    """
+    report = {
+        "game_id": achievement_set.game_id,
+        "title": achievement_set.title,
+        "achievements": {str(ach.id): ach.title for ach in achievement_set.achievements},
+        "results": {},
+    }
+    for trace, ach_id, runs in sorted(results, key=lambda r: (r[0], r[1])):
+        report["results"].setdefault(trace, {})[str(ach_id)] = runs
+    return report
+
+
+def diff_reports(previous: dict, current: dict) -> List[dict]:
+    """
+    Lists every (trace, achievement) whose result changed between two reports:
+    "new" (now triggers), "gone" (no longer triggers) or "changed" (different frames).
+    """
+    changes = []
+    old_results = previous.get("results", {})
+    new_results = current["results"]
+    titles = {**previous.get("achievements", {}), **current["achievements"]}
+    for trace in sorted(old_results.keys() | new_results.keys()):
+        old_trace, new_trace = old_results.get(trace, {}), new_results.get(trace, {})
+        # a pair missing from either report did not trigger there
+        for ach_id in sorted(old_trace.keys() | new_trace.keys(), key=int):
+            old, runs = old_trace.get(ach_id, []), new_trace.get(ach_id, [])
+            if old == runs:
+                continue
+            if not old:
+                status = "new"
+            elif not runs:
+                status = "gone"
+            else:
+                status = "changed"
+            changes.append({
+                "trace": trace,
+                "id": int(ach_id),
+                "title": titles.get(ach_id, ""),
+                "status": status,
+                "first": runs[0][0] if runs else None,
+                "previous_first": old[0][0] if old else None,
+            })
+    return changes
+
+
+def write_report(report: dict, json_path: Union[str, Path], csv_path: Optional[Union[str, Path]] = None):
+    json_path = Path(json_path)
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    if csv_path is None:
+        return
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["trace", "id", "title", "first_frame", "true_frames", "runs"])
+        for trace, achievements in report["results"].items():
+            for ach_id, runs in achievements.items():
+                writer.writerow([
+                    trace, ach_id, report["achievements"].get(ach_id, ""),
+                    runs[0][0] if runs else "",
+                    sum(last - first + 1 for first, last in runs),
+                    " ".join(f"{first}-{last}" for first, last in runs),
+                ])
+
+
+def regression(achievement_set: AchievementSet, traces: Union[str, Path, Sequence],
+               report_path: Union[str, Path], csv_path: Optional[Union[str, Path]] = None,
+               workers: Optional[int] = None,
+               on_result: Optional[Callable[[Result], None]] = None) -> Tuple[dict, List[dict]]:
+    """
+    Runs the whole set against a directory (or list) of traces, writes the report and
+    returns it together with the differences from the report previously at `report_path`.
+    `on_result` is called with every result as soon as its shard finishes.
+    """
+    if isinstance(traces, (str, Path)):
+        traces = find_traces(traces)
+    report_path = Path(report_path)
+    previous = None
+    if report_path.exists():
+        with open(report_path, encoding="utf-8") as f:
+            previous = json.load(f)
+
+    results = []
+    for result in run_batch(achievement_set, traces, workers):
+        results.append(result)
+        if on_result:
+            on_result(result)
+    report = build_report(achievement_set, results)
+    write_report(report, report_path, csv_path)
+    return report, diff_reports(previous, report) if previous else []
@@ -0,0 +1,182 @@
+import io
+import os
+import ast
+import time
+import traceback
+import contextlib
+import multiprocessing
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+from .cache import BuildCache, cached_build, run_script
+
+# Output kept from each script (its prints), for the report
+OUTPUT_LIMIT = 4000
+
+
+def is_set_script(path: Path) -> bool:
+    """
+    A set script imports models.set and calls save() (benchmarks and helpers do not).
+    """
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, ValueError):
+        return False
+    imports_set = saves = False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module == "models.set":
+            imports_set = True
+        elif isinstance(node, ast.Import) and any(alias.name == "models.set" for alias in node.names):
+            imports_set = True
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "save":
+            saves = True
+    return imports_set and saves
+
+
+def find_scripts(paths: Sequence[Union[str, Path]]) -> List[Path]:
+    scripts = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            scripts.extend(p for p in sorted(path.glob("*.py")) if is_set_script(p))
+        else:
+            scripts.append(path)
+    return scripts
+
+
+class ScriptResult:
+    """
+    status is "built", "cached", "failed" or "timeout"; outputs are the files the script saved.
+    """
+    def __init__(self, script: Path, status: str, elapsed: float, outputs: Optional[List[str]] = None,
+                 achievements: int = 0, leaderboards: int = 0, error: Optional[str] = None, output: str = ""):
+        self.script = script
+        self.status = status
+        self.elapsed = elapsed
+        self.outputs = outputs or []
+        self.achievements = achievements
+        self.leaderboards = leaderboards
+        self.error = error
+        self.output = output
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("built", "cached")
+
+    def to_dict(self) -> dict:
+        return {
+            "script": str(self.script), "status": self.status, "seconds": round(self.elapsed, 4),
+            "outputs": self.outputs, "achievements": self.achievements, "leaderboards": self.leaderboards,
+            "error": self.error, "output": self.output,
+        }
+
+
+# --- WORKER ---
+
+def _count_lines(outputs: List[Path]):
+    achievements = leaderboards = 0
+    for path in outputs:
+        if path.name.endswith("-User.txt"):
+            for line in path.read_text(encoding="utf-8").splitlines()[2:]:
+                if line[:1].isdigit():
+                    achievements += 1
+                elif line.startswith("L"):
+                    leaderboards += 1
+    return achievements, leaderboards
+
+
+def _build_child(script: str, cache_dir: Optional[str], use_cache: bool, connection):
+    # runs in its own process: a crash, an exit() or a hang only takes this script down
+    captured = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(captured), contextlib.redirect_stderr(captured):
+            if use_cache:
+                hit, outputs = cached_build(script, BuildCache(cache_dir))
+            else:
+                hit, outputs = False, run_script(script)
+        achievements, leaderboards = _count_lines(outputs)
+        result = ScriptResult(Path(script), "cached" if hit else "built", time.perf_counter() - start,
+                              [str(path) for path in outputs], achievements, leaderboards)
+    except BaseException:
+        result = ScriptResult(Path(script), "failed", time.perf_counter() - start, error=traceback.format_exc())
+    result.output = captured.getvalue()[-OUTPUT_LIMIT:]
+    connection.send(result)
+    connection.close()
+
+
+# --- ORCHESTRATOR ---
+
+def build_scripts(scripts: Sequence[Union[str, Path]], workers: Optional[int] = None,
+                  cache_dir: Optional[Union[str, Path]] = None, use_cache: bool = True,
+                  timeout: Optional[float] = None) -> Iterator[ScriptResult]:
+    """
+    Builds every script in its own process, at most `workers` at a time, and yields the
+    results as they finish. A script that fails, exits or runs past `timeout` seconds only
+    produces a failed result; the others keep going.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = [Path(script) for script in scripts]
+    running = {}  # connection -> (process, script, start)
+
+    while pending or running:
+        while pending and len(running) < workers:
+            script = pending.pop(0)
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_build_child, args=(str(script), str(cache_dir) if cache_dir else None, use_cache, sender),
+                daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (process, script, time.perf_counter())
+
+        for connection in wait(list(running), timeout=0.1):
+            process, script, start = running.pop(connection)
+            try:
+                result = connection.recv()
+            except EOFError:
+                # the process died without reporting (os._exit, a crash, killed)
+                process.join()
+                result = ScriptResult(script, "failed", time.perf_counter() - start,
+                                      error=f"worker exited with code {process.exitcode}")
+            connection.close()
+            process.join()
+            yield result
+
+        if timeout is not None:
+            now = time.perf_counter()
+            for connection, (process, script, start) in list(running.items()):
+                if now - start > timeout:
+                    process.terminate()
+                    process.join()
+                    connection.close()
+                    del running[connection]
+                    yield ScriptResult(script, "timeout", now - start, error=f"stopped after {timeout:g} s")
+
+
+def build_report(results: Sequence[ScriptResult], wall_time: float) -> dict:
+    longest = max((result.elapsed for result in results), default=0.0)
+    return {
+        "scripts": [result.to_dict() for result in sorted(results, key=lambda result: str(result.script))],
+        "built": sum(1 for result in results if result.status == "built"),
+        "cached": sum(1 for result in results if result.status == "cached"),
+        "failed": sum(1 for result in results if not result.ok),
+        "seconds": round(wall_time, 4),
+        "script_seconds": round(sum(result.elapsed for result in results), 4),
+        "longest_seconds": round(longest, 4),
+    }
+
+
+def build_all(paths: Sequence[Union[str, Path]], workers: Optional[int] = None,
+              cache_dir: Optional[Union[str, Path]] = None, use_cache: bool = True,
+              timeout: Optional[float] = None,
+              on_result: Optional[Callable[[ScriptResult], None]] = None) -> dict:
+    """
+    Finds the set scripts in paths (files or folders), builds them all and returns the report.
+    """
+    start = time.perf_counter()
+    results = []
+    for result in build_scripts(find_scripts(paths), workers, cache_dir, use_cache, timeout):
+        results.append(result)
+        if on_result:
+            on_result(result)
+    return build_report(results, time.perf_counter() - start)
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import runpy
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from models.manifest import write_atomic
+from models.set import AchievementSet
+from .watch import imported_names
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# The rendered output only depends on the script, the local modules it imports and the
+# library code that turns the objects into text.
+LIBRARY_PACKAGES = ("core", "models")
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    if os.environ.get("PYCHEEVOS_CACHE"):
+        return Path(os.environ["PYCHEEVOS_CACHE"])
+    return Path.home() / ".cache" / "pycheevos"
+
+
+# --- KEYS ---
+
+def local_imports(script: Union[str, Path]) -> List[Path]:
+    """
+    The modules next to the script that it imports, directly or through each other.
+    """
+    script = Path(script).resolve()
+    directory = script.parent
+    found: List[Path] = []
+    pending = [script]
+    while pending:
+        for name in sorted(imported_names(pending.pop())):
+            base = directory.joinpath(*name.split("."))
+            for path in (base.with_suffix(".py"), base / "__init__.py"):
+                if path.is_file() and path not in found and path != script:
+                    found.append(path)
+                    pending.append(path)
+    return sorted(found)
+
+
+_library_hash: Optional[str] = None
+
+
+def library_hash() -> str:
+    """
+    Hash of the core/models sources: a new library version (or a local edit) is a new key.
+    """
+    global _library_hash
+    if _library_hash is None:
+        digest = hashlib.sha256()
+        for package in LIBRARY_PACKAGES:
+            for path in sorted((ROOT_DIR / package).glob("*.py")):
+                digest.update(f"{package}/{path.name}\0".encode("utf-8"))
+                digest.update(path.read_bytes())
+        _library_hash = digest.hexdigest()
+    return _library_hash
+
+
+def build_key(script: Union[str, Path]) -> str:
+    script = Path(script).resolve()
+    digest = hashlib.sha256(library_hash().encode("ascii"))
+    for path in [script] + local_imports(script):
+        digest.update(f"\0{path.relative_to(script.parent).as_posix()}\0".encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# --- CACHE ---
+
+class BuildCache:
+    """
+    Content-addressed store of rendered outputs:
+        entries/{key}.json  the files one build wrote: [[path, blob], ...], and its run time
+        blobs/{sha256}      the content of each file, shared between entries
+        stats.log           one line per lookup ("hit <seconds saved>" or "miss")
+    Entries are evicted least recently used first once the blobs exceed max_size.
+    """
+    def __init__(self, directory: Optional[Union[str, Path]] = None, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_size = max_size
+        self.entries = self.directory / "entries"
+        self.blobs = self.directory / "blobs"
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+
+    def _log(self, line: str):
+        # a single short append is atomic, so parallel builds can share the log
+        with open(self.directory / "stats.log", "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self.entries / f"{key}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if not all((self.blobs / blob).is_file() for _, blob in entry["files"]):
+                raise ValueError("missing blob")
+        except (OSError, ValueError, KeyError):
+            self._log("miss")
+            return None
+        os.utime(path)  # the entry's mtime is its last use, for the LRU
+        self._log(f"hit {entry.get('run_time', 0.0):.6f}")
+        return entry
+
+    def put(self, key: str, files: List[Tuple[str, bytes]], run_time: float):
+        stored = []
+        for name, content in files:
+            blob = hashlib.sha256(content).hexdigest()
+            if not (self.blobs / blob).is_file():
+                temp = self.blobs / f".{blob}.{os.getpid()}.tmp"
+                temp.write_bytes(content)
+                os.replace(temp, self.blobs / blob)
+            stored.append([name, blob])
+        entry = {"files": stored, "run_time": run_time, "created": time.time()}
+        write_atomic(self.entries / f"{key}.json", [json.dumps(entry, indent=1)])
+        self.evict()
+
+    def restore(self, entry: dict) -> List[Path]:
+        """
+        Writes the files of an entry where the original build wrote them, skipping the
+        ones that already hold that content. Returns the files written.
+        """
+        written = []
+        for name, blob in entry["files"]:
+            path = Path(name)
+            content = (self.blobs / blob).read_bytes()
+            try:
+                if path.read_bytes() == content:
+                    continue
+            except OSError:
+                path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            temp.write_bytes(content)
+            os.replace(temp, path)
+            written.append(path)
+        return written
+
+    def _entries(self) -> List[Tuple[float, Path, dict]]:
+        entries = []
+        for path in self.entries.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries.append((path.stat().st_mtime, path, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries, key=lambda entry: entry[0])
+
+    def _blob_sizes(self) -> Dict[str, int]:
+        # builds sharing the cache evict too: a blob listed here may be gone by its stat()
+        sizes = {}
+        for path in self.blobs.iterdir():
+            if not path.name.startswith("."):
+                try:
+                    sizes[path.name] = path.stat().st_size
+                except FileNotFoundError:
+                    continue
+        return sizes
+
+    def evict(self):
+        sizes = self._blob_sizes()
+        if sum(sizes.values()) <= self.max_size:
+            return
+        entries = self._entries()
+        while entries and sum(sizes.values()) > self.max_size:
+            _, path, _ = entries.pop(0)
+            path.unlink(missing_ok=True)
+            used = {blob for _, _, entry in entries for _, blob in entry["files"]}
+            for blob in [blob for blob in sizes if blob not in used]:
+                (self.blobs / blob).unlink(missing_ok=True)
+                del sizes[blob]
+
+    def stats(self) -> dict:
+        hits = misses = 0
+        saved = 0.0
+        try:
+            with open(self.directory / "stats.log", "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("hit"):
+                        hits += 1
+                        saved += float(line.split()[1])
+                    elif line.startswith("miss"):
+                        misses += 1
+        except OSError:
+            pass
+        sizes = self._blob_sizes()
+        return {
+            "hits": hits, "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "time_saved": saved,
+            "entries": sum(1 for _ in self.entries.glob("*.json")),
+            "size": sum(sizes.values()), "max_size": self.max_size,
+        }
+
+    def clear(self):
+        for path in list(self.entries.glob("*.json")) + list(self.blobs.iterdir()):
+            path.unlink(missing_ok=True)
+        (self.directory / "stats.log").unlink(missing_ok=True)
+
+
+# --- BUILD ---
+
+def _stored_name(path: Path) -> str:
+    # relative to the working directory when possible, like the default save() folder
+    try:
+        return path.resolve().relative_to(Path.cwd()).as_posix()
+    except ValueError:
+        return str(path.resolve())
+
+
+def run_script(script: Union[str, Path]) -> List[Path]:
+    """
+    Runs a set script and its save() calls. Returns every output file (written or already
+    up to date), the ones a cache entry has to bring back.
+    """
+    directory = str(Path(script).resolve().parent)
+    modules = set(sys.modules)
+    calls = []
+    original = AchievementSet.save
+    AchievementSet.save = lambda self, *args, **kwargs: calls.append((self, args, kwargs))
+    # like `python scripts/6675.py`: the script's folder is importable, it sees no
+    # arguments and exiting with 0 (after its saves) is a success
+    sys.path.insert(0, directory)
+    argv, sys.argv = sys.argv, [str(script)]
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (0, None):
+            raise
+    finally:
+        AchievementSet.save = original
+        sys.argv = argv
+        sys.path.remove(directory)
+        # local modules of one script must not be picked up by the next one
+        for name in set(sys.modules) - modules:
+            path = getattr(sys.modules[name], "__file__", None)
+            if path and str(Path(path).resolve()).startswith(directory + os.sep):
+                del sys.modules[name]
+
+    outputs = []
+    for achievement_set, args, kwargs in calls:
+        achievement_set.save(*args, **kwargs)
+        output = achievement_set.output_dir(args[0] if args else kwargs.get("path"))
+        outputs.append(output / f"{achievement_set.game_id}-User.txt")
+        if achievement_set.rich_presence:
+            outputs.append(output / f"{achievement_set.game_id}-Rich.txt")
+    return outputs
+
+
+def cached_build(script: Union[str, Path], cache: Optional[BuildCache] = None) -> Tuple[bool, List[Path]]:
+    """
+    Builds a set script unless an identical build is in the cache, in which case its files
+    are restored without running the script. Returns (cache hit, output files).
+    """
+    cache = cache or BuildCache()
+    key = build_key(script)
+    entry = cache.get(key)
+    if entry is not None:
+        try:
+            cache.restore(entry)
+            return True, [Path(name) for name, _ in entry["files"]]
+        except FileNotFoundError:
+            pass  # another build evicted it since get(): build it again
+
+    start = time.perf_counter()
+    outputs = run_script(script)
+    run_time = time.perf_counter() - start
+    cache.put(key, [(_stored_name(path), path.read_bytes()) for path in outputs], run_time)
+    return False, outputs
@@ -0,0 +1,606 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from core.condition import Condition
+from core.constants import Flag, MemorySize, MemoryType
+from core.value import MemoryValue, ConstantValue
+from models.achievement import Achievement
+from models.leaderboard import Leaderboard
+from models.set import AchievementSet
+from .evaluator import COMBINING_FLAGS, MODIFIERS, unwrap
+from .memory import BIT_INDEX, FLOAT_SIZES, READERS, SIZE_BYTES, SIZE_MASK, from_bcd
+
+# Python operator for each comparison
+OPERATORS = {"=": "==", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+MEASURED_FLAGS = (Flag.MEASURED, Flag.MEASURED_PERCENT)
+
+# Globals available to the generated source
+_NAMESPACE = {
+    "_bcd": from_bcd,
+    "_mul": MODIFIERS["*"],
+    "_div": MODIFIERS["/"],
+    "_mod": MODIFIERS["%"],
+    "_POP": tuple(bin(i).count("1") for i in range(256)),
+}
+_NAMESPACE.update({f"R_{size.name}": READERS[size] for size in MemorySize})
+
+# Compiled factories by source, so identical logic is only compiled once
+_CODE_CACHE: Dict[str, object] = {}
+
+
+def _read_expression(size: MemorySize, address: str) -> str:
+    """
+    Inline Python expression reading `size` at `address` from `ram` (length in `n`).
+    Reads that would run past the end fall back to the runtime readers, which pad with 0.
+    """
+    if size == MemorySize.BIT8:
+        return f"(ram[{address}] if {address} < n else 0)"
+    if size == MemorySize.BIT0:
+        return f"(ram[{address}] & 1 if {address} < n else 0)"
+    if size in BIT_INDEX:
+        return f"(ram[{address}] >> {BIT_INDEX[size]} & 1 if {address} < n else 0)"
+    if size == MemorySize.LOWER4:
+        return f"(ram[{address}] & 15 if {address} < n else 0)"
+    if size == MemorySize.UPPER4:
+        return f"(ram[{address}] >> 4 if {address} < n else 0)"
+    if size == MemorySize.BITCOUNT:
+        return f"(_POP[ram[{address}]] if {address} < n else 0)"
+
+    width = SIZE_BYTES[size]
+    if size in FLOAT_SIZES:
+        return f"R_{size.name}(ram, {address})"
+    shifts = range(width) if size in (MemorySize.BIT16, MemorySize.BIT24, MemorySize.BIT32) else range(width - 1, -1, -1)
+    if address.isdigit():
+        offset = lambda i: str(int(address) + i)
+    else:
+        offset = lambda i: f"{address} + {i}" if i else address
+    parts = [f"ram[{offset(i)}]" for i in range(width)]
+    value = " | ".join(p if s == 0 else f"{p} << {8 * s}" for p, s in zip(parts, shifts))
+    return f"(({value}) if {offset(width - 1)} < n else R_{size.name}(ram, {address}))"
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.depth = 0
+
+    def __call__(self, line: str):
+        self.lines.append("    " * self.depth + line)
+
+    def indent(self):
+        self.depth += 1
+
+    def dedent(self):
+        self.depth -= 1
+
+
+class _Generator:
+    """
+    Generates the source of a factory function that returns the step/reset/measured
+    closures of one or more pieces of logic sharing the same memory reads.
+    All evaluation state lives in closure cells of the factory.
+    """
+    def __init__(self):
+        self.slots: Dict[Tuple[int, MemorySize], int] = {}
+        self.slot_uses: List[set] = []
+        self.state: List[str] = []       # cell variables, initialised to 0
+        self.flags: List[str] = []       # cell variables, initialised to False
+        self.hits: List[List[str]] = []  # hit variables of each logic
+        self.measured: List[str] = []    # measured value of each logic
+        self.body = _Writer()
+        self.body.depth = 2
+        self._temp = 0
+
+    def _name(self, prefix: str) -> str:
+        self._temp += 1
+        return f"{prefix}{self._temp}"
+
+    # --- operands ---
+
+    def _slot(self, value: MemoryValue) -> int:
+        key = (value.address, value.size)
+        if key not in self.slots:
+            self.slots[key] = len(self.slots)
+            self.slot_uses.append(set())
+        slot = self.slots[key]
+        self.slot_uses[slot].add(value.mtype)
+        return slot
+
+    @staticmethod
+    def _transform(expression: str, size: MemorySize, mtype: MemoryType) -> str:
+        if size in FLOAT_SIZES:
+            return expression
+        if mtype == MemoryType.BCD:
+            return f"_bcd({expression})"
+        if mtype == MemoryType.INVERT:
+            return f"({expression} ^ {SIZE_MASK.get(size, 0xFFFFFFFF)})"
+        return expression
+
+    def operand(self, value, indirect: bool) -> Tuple[str, bool]:
+        """
+        Emits whatever reads an operand needs and returns (expression, is_int).
+        """
+        out = self.body
+        if isinstance(value, ConstantValue):
+            value = value.value
+        if isinstance(value, (int, float)):
+            return repr(value), isinstance(value, int)
+        if not isinstance(value, MemoryValue):
+            raise TypeError(f"Cannot evaluate operand of type {type(value).__name__}")
+
+        size, mtype = value.size, value.mtype
+        if mtype == MemoryType.RECALL:
+            return "rc", False
+        is_int = size not in FLOAT_SIZES
+
+        if not indirect:
+            slot = self._slot(value)
+            if mtype == MemoryType.DELTA:
+                return f"d{slot}", is_int
+            if mtype == MemoryType.PRIOR:
+                return f"p{slot}", is_int
+            return self._transform(f"c{slot}", size, mtype), is_int
+
+        # behind AddAddress: the address is only known now, so read it here
+        address = self._name("x")
+        read = self._name("v")
+        out(f"{address} = {value.address} + aa")
+        out(f"{read} = {_read_expression(size, address)}")
+        if mtype not in (MemoryType.DELTA, MemoryType.PRIOR):
+            return self._transform(read, size, mtype), is_int
+
+        # each indirect delta/prior operand keeps its own previous values
+        cur, old, pri = self._name("ic"), self._name("id"), self._name("ip")
+        self.state += [cur, old, pri]
+        out(f"{old} = {cur}")
+        out(f"if {read} != {cur}: {pri} = {cur}; {cur} = {read}")
+        return (old if mtype == MemoryType.DELTA else pri), is_int
+
+    def modified(self, cmp: str, left: Tuple[str, bool], right: Tuple[str, bool]) -> Tuple[str, bool]:
+        (a, a_int), (b, b_int) = left, right
+        both = a_int and b_int
+        if cmp == "*":
+            return (f"(({a} * {b}) & 0xFFFFFFFF)" if both else f"_mul({a}, {b})"), both
+        if cmp == "/":
+            return (f"({a} // {b} if {b} else 0)" if both else f"_div({a}, {b})"), both
+        if cmp == "%":
+            return (f"({a} % {b} if {b} else 0)" if both else f"_mod({a}, {b})"), both
+        if cmp == "&":
+            return (f"({a} & {b})" if both else f"(int({a}) & int({b}))"), True
+        return (f"({a} ^ {b})" if both else f"(int({a}) ^ int({b}))"), True
+
+    # --- logic ---
+
+    def group(self, conditions: Sequence[Condition], result: str, paused: Optional[str], logic: dict):
+        """
+        Emits one group, leaving its truth value in `result`.
+        """
+        out = self.body
+        if not conditions:
+            out(f"{result} = True")
+            return
+
+        conditions = [unwrap(c) for c in conditions]
+        pause = [False] * len(conditions)
+        start = 0
+        for i, cond in enumerate(conditions):
+            if cond.flag == Flag.PAUSE_IF:
+                for j in range(start, i + 1):
+                    pause[j] = True
+            if cond.flag not in COMBINING_FLAGS:
+                start = i + 1
+
+        hit_names = []
+        for cond in conditions:
+            # hits of plain conditions without a target are never read back
+            if cond.hits or cond.flag in (Flag.ADD_HITS, Flag.SUB_HITS):
+                hit_names.append(self._name("h"))
+                self.state.append(hit_names[-1])
+                logic["hits"].append(hit_names[-1])
+            else:
+                hit_names.append(None)
+
+        if any(pause):
+            self.flags.append(paused)
+            out("while True:")
+            out.indent()
+            self._pass(conditions, hit_names, pause, True, paused, logic)
+            out(f"{paused} = False")
+            out("break")
+            out.dedent()
+            out(f"if {paused}:")
+            out.indent()
+            out(f"{result} = False")
+            out.dedent()
+            out("else:")
+            out.indent()
+            self._pass(conditions, hit_names, pause, False, result, logic)
+            out.dedent()
+        else:
+            self._pass(conditions, hit_names, pause, False, result, logic)
+
+    def _pass(self, conditions, hit_names, pause, processing_pause: bool, result: str, logic: dict):
+        out = self.body
+        add_value = and_next = or_next = reset_next = add_hits = False
+        can_measure = True
+        has_measured = any(c.flag in MEASURED_FLAGS or c.flag == Flag.MEASURED_IF for c in conditions)
+        if not processing_pause:
+            out(f"{result} = True")
+        if has_measured:
+            out("ms = None")
+        if any(c.flag == Flag.MEASURED_IF for c in conditions):
+            out("cm = True")
+
+        for i, cond in enumerate(conditions):
+            if pause[i] is not processing_pause:
+                continue
+            flag, required, h = cond.flag, cond.hits, hit_names[i]
+            indirect = i > 0 and conditions[i - 1].flag == Flag.ADD_ADDRESS
+
+            left = self.operand(cond.lvalue, indirect)
+            right = self.operand(cond.rvalue, indirect) if cond.rvalue is not None else None
+            comparison = None
+            if right is not None:
+                if cond.cmp in OPERATORS:
+                    comparison = OPERATORS[cond.cmp]
+                elif cond.cmp in MODIFIERS:
+                    left = self.modified(cond.cmp, left, right)
+                else:
+                    raise ValueError(f"Unknown operator '{cond.cmp}' in {cond.render()}")
+
+            value = f"{left[0]} + av" if add_value else left[0]
+            if flag in (Flag.ADD_SOURCE, Flag.SUB_SOURCE):
+                sign = "+" if flag == Flag.ADD_SOURCE else "-"
+                out(f"av {sign}= {left[0]}" if add_value else f"av = {'-' if sign == '-' else ''}({left[0]})")
+                add_value = True
+                continue
+            if flag == Flag.ADD_ADDRESS:
+                out(f"aa = {left[0] if left[1] else f'int({left[0]})'} & 0xFFFFFFFF")
+                continue
+            if flag == Flag.REMEMBER:
+                out(f"rc = {value}")
+                add_value = False
+                continue
+
+            if flag in MEASURED_FLAGS and required == 0:
+                out(f"if cm: ms = {value}" if not can_measure else f"ms = {value}")
+                value = "ms" if can_measure else value
+            if comparison is None:
+                out("t = True")
+            else:
+                out(f"t = ({value}) {comparison} {right[0]}" if add_value else f"t = {value} {comparison} {right[0]}")
+            add_value = False
+
+            if and_next:
+                out("t = t and an")
+            elif or_next:
+                out("t = t or on")
+            and_next = or_next = False
+
+            self._hits(h, required, reset_next)
+
+            if flag == Flag.ADD_HITS or flag == Flag.SUB_HITS:
+                sign = "+" if flag == Flag.ADD_HITS else "-"
+                out(f"ah {sign}= {h}" if add_hits else f"ah = {sign if sign == '-' else ''}{h}")
+                add_hits, reset_next = True, False
+                continue
+            if flag == Flag.RESET_NEXT_IF:
+                out("rn = t")
+                reset_next = True
+                continue
+            if flag == Flag.AND_NEXT:
+                out("an = t")
+                and_next = True
+                continue
+            if flag == Flag.OR_NEXT:
+                out("on = t")
+                or_next = True
+                continue
+
+            reset_next = False
+            measured = flag in MEASURED_FLAGS
+            if add_hits:
+                if required:
+                    out("if ah:")
+                    out.indent()
+                    out(f"t = {h} + ah >= {required}")
+                    if measured:
+                        out(f"ms = max({h} + ah, 0)")
+                    out.dedent()
+                    if measured:
+                        out(f"else: ms = {h}")
+                add_hits = False
+            elif required and measured:
+                out(f"ms = {h}")
+
+            if flag == Flag.PAUSE_IF:
+                out(f"if t: {result} = True; break")
+                if required == 0 and h:
+                    out(f"{h} = 0")
+                continue
+            if flag == Flag.RESET_IF:
+                out(f"if t: wr = True; {result} = False" if not processing_pause else "if t: wr = True")
+                continue
+            if flag == Flag.MEASURED_IF:
+                out("if not t: cm = False; ms = 0")
+                can_measure = False
+            if not processing_pause:
+                out(f"if not t: {result} = False")
+
+        if has_measured:
+            me = logic["measured"]
+            out(f"if ms is not None and ({me} is None or ms > {me}): {me} = ms")
+
+    def _hits(self, h: Optional[str], required: int, reset_next: bool):
+        out = self.body
+        if h is None:
+            if reset_next:
+                out("if rn: t = False")
+            return
+        if reset_next:
+            out(f"if rn: {h} = 0; t = False")
+            out("elif t:")
+        else:
+            out("if t:")
+        out.indent()
+        if required == 0:
+            out(f"{h} += 1")
+        else:
+            out(f"if {h} < {required}: {h} += 1; t = {h} == {required}")
+        out.dedent()
+        if required:
+            out(f"elif {h}: t = {h} == {required}")
+
+    def logic(self, core: Sequence[Condition], alts: Iterable[Sequence[Condition]], result: str) -> dict:
+        """
+        Emits a core group plus alts, leaving the truth value of the frame in `result`.
+        """
+        out = self.body
+        logic = {"hits": [], "measured": self._name("me")}
+        self.measured.append(logic["measured"])
+        out(f"{logic['measured']} = None")
+        groups = [core] + list(alts)
+        names = [self._name("g") for _ in groups]
+        uses_recall = any(
+            any(isinstance(v, MemoryValue) and v.mtype == MemoryType.RECALL
+                for c in map(unwrap, group) for v in (c.lvalue, c.rvalue))
+            or any(unwrap(c).flag == Flag.REMEMBER for c in group)
+            for group in groups
+        )
+        for name, group in zip(names, groups):
+            if uses_recall:
+                out("rc = 0")
+            self.group(group, name, self._name("P"), logic)
+        if len(names) == 1:
+            out(f"{result} = {names[0]}")
+        else:
+            out(f"{result} = {names[0]} and ({' or '.join(names[1:])})")
+        if logic["hits"]:
+            out("if wr:")
+            out.indent()
+            out(" = ".join(logic["hits"]) + " = 0")
+            out(f"{result} = False")
+            out("wr = False")
+            out.dedent()
+        else:
+            out(f"if wr: {result} = False; wr = False")
+        self.hits.append(logic["hits"])
+        return logic
+
+    def source(self, returns: str) -> str:
+        """
+        Source of the factory: step(ram) refreshes every direct read once, then runs the logic.
+        """
+        out = _Writer()
+        out("def _factory():")
+        out.indent()
+        cells = [f"c{s}" for s in self.slots.values()]
+        cells += [f"d{s}" for s, uses in enumerate(self.slot_uses) if MemoryType.DELTA in uses]
+        cells += [f"p{s}" for s, uses in enumerate(self.slot_uses) if MemoryType.PRIOR in uses]
+        cells += self.state
+        declared = ", ".join(cells + self.flags + self.measured)
+
+        def initial():
+            if cells:
+                out(" = ".join(cells) + " = 0")
+            if self.flags:
+                out(" = ".join(self.flags) + " = False")
+            if self.measured:
+                out(" = ".join(self.measured) + " = None")
+            elif not cells:
+                out("pass")
+
+        initial()
+        out("def step(ram):")
+        out.indent()
+        if declared:
+            out(f"nonlocal {declared}")
+        out("n = len(ram)")
+        out("wr = False")
+        for (address, size), slot in self.slots.items():
+            uses = self.slot_uses[slot]
+            read = _read_expression(size, str(address))
+            if MemoryType.DELTA in uses:
+                out(f"d{slot} = c{slot}")
+            if MemoryType.PRIOR in uses:
+                out(f"v = {read}")
+                out(f"if v != c{slot}: p{slot} = c{slot}; c{slot} = v")
+            else:
+                out(f"c{slot} = {read}")
+        out.lines += self.body.lines
+        out(f"return {returns}")
+        out.dedent()
+
+        out("def reset():")
+        out.indent()
+        if declared:
+            out(f"nonlocal {declared}")
+        initial()
+        out.dedent()
+        out("def hits():")
+        out(f"    return [{', '.join('[' + ', '.join(h) + ']' for h in self.hits)}]")
+        out("def measured():")
+        out(f"    return [{', '.join(self.measured)}]")
+        out("return step, reset, hits, measured")
+        return "\n".join(out.lines) + "\n"
+
+
+def _build(source: str):
+    factory = _CODE_CACHE.get(source)
+    if factory is None:
+        namespace = dict(_NAMESPACE)
+        exec(compile(source, "<pycheevos-compiled>", "exec"), namespace)
+        factory = _CODE_CACHE[source] = namespace["_factory"]
+    return factory()
+
+
+class CompiledLogic:
+    """
+    A core group plus alts compiled into a generated Python function, with the same
+    results as TriggerEvaluator (rcheevos semantics) at a fraction of the cost per frame.
+
+    Addresses, sizes, flags and comparisons are baked into the generated source, which is
+    compiled once per distinct logic and cached; every CompiledLogic gets its own state.
+    """
+    def __init__(self, core: Sequence[Condition], alts: Iterable[Sequence[Condition]] = ()):
+        generator = _Generator()
+        generator.logic(core, alts, "result")
+        self.source = generator.source("result")
+        self.step, self.reset, self._hits, self._measured = _build(self.source)
+
+    @property
+    def hits(self) -> List[int]:
+        """
+        Current hit counts of the conditions with a hit target (and of AddHits/SubHits), in order.
+        """
+        return self._hits()[0]
+
+    @property
+    def measured(self):
+        return self._measured()[0]
+
+    def run(self, snapshots: Iterable) -> List[int]:
+        """
+        Steps through every snapshot and returns the frames where the logic was true.
+        """
+        step = self.step
+        return [frame for frame, ram in enumerate(snapshots) if step(ram)]
+
+
+class CompiledAchievement(CompiledLogic):
+    def __init__(self, achievement: Achievement):
+        self.achievement = achievement
+        super().__init__(achievement.core + achievement.conditions, achievement.alts)
+
+
+class CompiledSet:
+    """
+    Every achievement of a set compiled into a single function, so each address is only
+    read once per frame no matter how many achievements use it.
+    step(ram) returns the indexes (into achievement_set.achievements) that are true.
+    """
+    def __init__(self, achievement_set: AchievementSet):
+        self.achievement_set = achievement_set
+        generator = _Generator()
+        names = []
+        for index, ach in enumerate(achievement_set.achievements):
+            name = f"a{index}"
+            generator.logic(ach.core + ach.conditions, ach.alts, name)
+            names.append(name)
+        self.source = generator.source(f"[i for i, r in enumerate(({''.join(name + ', ' for name in names)})) if r]")
+        self.step, self.reset, self._hits, self._measured = _build(self.source)
+
+    @property
+    def measured(self) -> list:
+        """
+        Measured value of each achievement on the last frame (None when it has none).
+        """
+        return self._measured()
+
+    def run(self, snapshots: Iterable) -> Dict[int, List[int]]:
+        """
+        Steps through every snapshot and returns the trigger frames of each achievement, by ID.
+        """
+        achievements = self.achievement_set.achievements
+        triggers: Dict[int, List[int]] = {ach.id: [] for ach in achievements}
+        step = self.step
+        for frame, ram in enumerate(snapshots):
+            for index in step(ram):
+                triggers[achievements[index].id].append(frame)
+        return triggers
+
+
+def _value_group(group: Sequence) -> List[Condition]:
+    # set_value() also takes bare memory values. A value without a Measured condition is
+    # the legacy form: rcheevos adds up every condition and measures the sum.
+    group = [c if isinstance(c, Condition) else Condition(c) for c in group]
+    if group and not any(unwrap(c).flag in MEASURED_FLAGS for c in group):
+        group = [c.with_flag(Flag.ADD_SOURCE) for c in group[:-1]] + [group[-1].with_flag(Flag.MEASURED)]
+    return group
+
+
+class CompiledLeaderboard:
+    """
+    A leaderboard's start, cancel, submit and value logic compiled into one function,
+    driven by the rcheevos leaderboard states: an attempt can only start once the start
+    logic has been false, and the value is tracked while it is running.
+    """
+    WAITING, ACTIVE, STARTED = "waiting", "active", "started"
+
+    def __init__(self, leaderboard: Leaderboard):
+        self.leaderboard = leaderboard
+        generator = _Generator()
+        for part in ("start", "cancel", "submit"):
+            generator.logic(getattr(leaderboard, part), leaderboard.alts[part], part)
+        generator.logic(_value_group(leaderboard.value), map(_value_group, leaderboard.alts["value"]), "value")
+        self.source = generator.source("start, cancel, submit, value")
+        self._step, self._reset, self._hits, self._measured = _build(self.source)
+        self.state = self.WAITING
+        self.value = 0
+
+    def step(self, ram) -> Optional[str]:
+        """
+        Evaluates one frame and returns "started", "canceled" or "submitted" when the
+        attempt changes state on it.
+        """
+        start, cancel, submit, _ = self._step(ram)
+        event = None
+        if self.state == self.WAITING:
+            if not start:
+                self.state = self.ACTIVE
+        elif self.state == self.ACTIVE:
+            if start and not cancel:
+                if submit:
+                    event, self.state = "submitted", self.WAITING
+                elif self.leaderboard.start:
+                    event, self.state = "started", self.STARTED
+        elif cancel:
+            event, self.state = "canceled", self.WAITING
+        elif submit:
+            event, self.state = "submitted", self.WAITING
+        measured = self._measured()[3]
+        self.value = measured if measured is not None else 0
+        return event
+
+    def reset(self):
+        self._reset()
+        self.state = self.WAITING
+        self.value = 0
+
+    def run(self, snapshots: Iterable) -> List[Tuple[int, str, object]]:
+        """
+        Steps through every snapshot and returns (frame, event, value) for every state change.
+        """
+        events = []
+        for frame, ram in enumerate(snapshots):
+            event = self.step(ram)
+            if event:
+                events.append((frame, event, self.value))
+        return events
+
+
+def compile_achievement(achievement: Achievement) -> CompiledAchievement:
+    return CompiledAchievement(achievement)
+
+
+def compile_set(achievement_set: AchievementSet) -> CompiledSet:
+    return CompiledSet(achievement_set)
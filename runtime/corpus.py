@@ -0,0 +1,257 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from core.condition import Condition
+from core.constants import Flag
+from core.helpers import byte, word, word_be, bit0, bit1, bit2, bit3, bitcount, bcd, invert, delta, prior, recall
+from core.optimizer import optimize_logic
+from models.leaderboard import Leaderboard
+
+# Size of the RAM every reference case runs on
+RAM_SIZE = 8
+
+
+class ReferenceCase:
+    """
+    A piece of logic, a sequence of RAM writes (one dict of address -> value per frame,
+    applied on top of the previous frame) and the frames rcheevos reports it true on.
+    """
+    def __init__(self, name: str, core: Sequence[Condition], frames: Sequence[Dict[int, int]],
+                 expected: Sequence[int], alts: Sequence[Sequence[Condition]] = (),
+                 measured: Optional[Sequence] = None):
+        self.name = name
+        self.core = list(core)
+        self.alts = [list(alt) for alt in alts]
+        self.frames = list(frames)
+        self.expected = list(expected)
+        self.measured = list(measured) if measured is not None else None
+
+    def snapshots(self) -> List[bytes]:
+        ram = bytearray(RAM_SIZE)
+        result = []
+        for writes in self.frames:
+            for address, value in writes.items():
+                ram[address] = value
+            result.append(bytes(ram))
+        return result
+
+
+CASES = [
+    ReferenceCase("compare", [byte(0) == 1], [{0: 0}, {0: 1}, {0: 2}, {0: 1}], [1, 3]),
+    ReferenceCase("hit target stays met", [(byte(0) == 1).with_hits(2)], [{0: 1}, {}, {0: 0}, {}], [1, 2, 3]),
+    ReferenceCase("delta", [byte(0) > delta(byte(0))], [{0: 1}, {}, {0: 2}, {0: 1}], [0, 2]),
+    ReferenceCase("prior keeps the last different value", [prior(byte(0)) == 1], [{0: 1}, {0: 2}, {}, {0: 3}], [1, 2]),
+    ReferenceCase("word little endian", [word(0) == 0x0201], [{0: 1, 1: 2}], [0]),
+    ReferenceCase("word big endian", [word_be(0) == 0x0102], [{0: 1, 1: 2}], [0]),
+    ReferenceCase("read past the end pads with zero", [word(7) == 5], [{7: 5}], [0]),
+    ReferenceCase("address out of range reads zero", [byte(100) == 0], [{}], [0]),
+    ReferenceCase("bit", [bit3(0) == 1], [{0: 8}, {0: 7}], [0]),
+    ReferenceCase("bitcount", [bitcount(0) == 3], [{0: 7}, {0: 8}], [0]),
+    ReferenceCase("bcd", [bcd(byte(0)) == 12], [{0: 0x12}, {0: 13}], [0]),
+    ReferenceCase("invert", [invert(byte(0)) == 0xFE], [{0: 1}, {0: 2}], [0]),
+    ReferenceCase("alt groups", [byte(0) == 1], [{0: 1}, {1: 1}, {1: 0, 2: 1}, {0: 0}], [1, 2],
+                  alts=[[byte(1) == 1], [byte(2) == 1]]),
+    ReferenceCase("ResetIf clears hits", [
+        (byte(0) == 1).with_hits(2),
+        Condition(byte(1), "=", 1, Flag.RESET_IF),
+    ], [{0: 1}, {}, {1: 1}, {1: 0}, {}, {}], [1, 4, 5]),
+    ReferenceCase("PauseIf keeps hits", [
+        (byte(0) == 1).with_hits(2),
+        Condition(byte(1), "=", 1, Flag.PAUSE_IF),
+    ], [{0: 1}, {1: 1}, {}, {1: 0}, {}], [3, 4]),
+    ReferenceCase("PauseIf with hits locks", [
+        byte(0) == 1,
+        Condition(byte(1), "=", 1, Flag.PAUSE_IF, 2),
+    ], [{0: 1, 1: 1}, {}, {1: 0}, {}], [0]),
+    ReferenceCase("ResetNextIf", [
+        Condition(byte(1), "=", 1, Flag.RESET_NEXT_IF),
+        (byte(0) == 1).with_hits(3),
+    ], [{0: 1}, {}, {1: 1}, {1: 0}, {}, {}], [5]),
+    ReferenceCase("AndNext", [
+        Condition(byte(0), "=", 1, Flag.AND_NEXT),
+        (byte(1) == 1).with_hits(2),
+    ], [{0: 1, 1: 1}, {0: 0}, {0: 1}], [2]),
+    ReferenceCase("OrNext", [
+        Condition(byte(0), "=", 1, Flag.OR_NEXT),
+        byte(1) == 1,
+    ], [{0: 1}, {0: 0}, {1: 1}], [0, 2]),
+    ReferenceCase("AddSource", [
+        Condition(byte(0), flag=Flag.ADD_SOURCE),
+        byte(1) == 5,
+    ], [{0: 2, 1: 3}, {1: 4}, {0: 1}], [0, 2]),
+    ReferenceCase("SubSource", [
+        Condition(byte(0), flag=Flag.SUB_SOURCE),
+        byte(1) == 1,
+    ], [{0: 2, 1: 3}, {1: 4}], [0]),
+    ReferenceCase("AddSource with modifier", [
+        Condition(byte(0), "*", 2, Flag.ADD_SOURCE),
+        byte(1) == 7,
+    ], [{0: 3, 1: 1}, {1: 2}], [0]),
+    ReferenceCase("AddHits", [
+        Condition(byte(0), "=", 1, Flag.ADD_HITS),
+        (byte(1) == 1).with_hits(3),
+    ], [{0: 1}, {}, {1: 1}], [2]),
+    ReferenceCase("SubHits", [
+        Condition(byte(0), "=", 1, Flag.SUB_HITS),
+        (byte(1) == 1).with_hits(2),
+    ], [{1: 1}, {}, {0: 1}, {}], [1]),
+    ReferenceCase("AddAddress", [
+        Condition(byte(0), flag=Flag.ADD_ADDRESS),
+        byte(4) == 7,
+    ], [{0: 0, 4: 7}, {0: 2, 6: 7}, {6: 0}], [0, 1]),
+    ReferenceCase("Remember and Recall", [
+        Condition(byte(0), "*", 2, Flag.REMEMBER),
+        recall() == 6,
+    ], [{0: 3}, {0: 4}], [0]),
+    ReferenceCase("MeasuredIf", [
+        Condition(byte(0), ">=", 3, Flag.MEASURED),
+        Condition(byte(1), "=", 1, Flag.MEASURED_IF),
+    ], [{0: 3}, {1: 1}], [1], measured=[0, 3]),
+    ReferenceCase("Measured value", [
+        Condition(byte(1), flag=Flag.ADD_SOURCE),
+        Condition(byte(0), flag=Flag.MEASURED),
+    ], [{0: 1, 1: 2}, {0: 5}], [0, 1], measured=[3, 7]),
+    ReferenceCase("Measured hits", [
+        Condition(byte(0), "=", 1, Flag.MEASURED, 3),
+    ], [{0: 1}, {}, {0: 0}, {0: 1}], [3], measured=[1, 2, 2, 3]),
+]
+
+
+class OptimizerCase(ReferenceCase):
+    """
+    A reference case for one rewrite of core/optimizer.py: the memaddr the logic is
+    expected to become, and the frames rcheevos reports the original logic true on.
+    """
+    def __init__(self, name: str, core: Sequence[Condition], optimized: str, frames: Sequence[Dict[int, int]],
+                 expected: Sequence[int], alts: Sequence[Sequence[Condition]] = (),
+                 measured: Optional[Sequence] = None):
+        super().__init__(name, core, frames, expected, alts, measured)
+        self.optimized = optimized
+
+
+OPTIMIZER_CASES = [
+    OptimizerCase("duplicate removed", [
+        byte(0) == 1, byte(2) == 2, byte(0) == 1,
+    ], "0xH0000=1_0xH0002=2", [{0: 1}, {2: 2}, {0: 0}, {0: 1}], [1, 3]),
+    OptimizerCase("duplicates with hits kept", [
+        (byte(0) == 1).with_hits(2),
+        (byte(0) == 1).with_hits(2),
+        Condition(byte(1), "=", 1, Flag.RESET_IF),
+    ], "0xH0000=1.2._0xH0000=1.2._R:0xH0001=1", [{0: 1}, {}, {1: 1}, {1: 0}, {}], [1, 4]),
+    OptimizerCase("duplicate MeasuredIf kept", [
+        Condition(byte(0), ">=", 3, Flag.MEASURED),
+        Condition(byte(1), "=", 1, Flag.MEASURED_IF),
+        Condition(byte(1), "=", 1, Flag.MEASURED_IF),
+    ], "M:0xH0000>=3_Q:0xH0001=1_Q:0xH0001=1", [{0: 3}, {1: 1}, {1: 0}], [1], measured=[0, 3, 0]),
+    OptimizerCase("condition of every alt hoisted into core", [byte(0) == 1],
+                  "0xH0000=1_0xH0002=1S0xH0003=1S0xH0004=1",
+                  [{0: 1, 2: 1}, {3: 1}, {2: 0}, {4: 1, 2: 1}, {0: 0}], [1, 3],
+                  alts=[[byte(2) == 1, byte(3) == 1], [byte(2) == 1, byte(4) == 1]]),
+    OptimizerCase("hits of each alt not hoisted", [byte(0) == 1],
+                  "0xH0000=1S0xH0002=1.2._P:0xH0003=1S0xH0002=1.2._0xH0004=1",
+                  [{0: 1, 2: 1, 3: 1}, {4: 1}, {4: 0}, {3: 0}, {}], [1, 4],
+                  alts=[[(byte(2) == 1).with_hits(2), Condition(byte(3), "=", 1, Flag.PAUSE_IF)],
+                        [(byte(2) == 1).with_hits(2), byte(4) == 1]]),
+    OptimizerCase("pointer chain shared through Remember", [
+        Condition(byte(0), flag=Flag.ADD_ADDRESS), Condition(byte(1), flag=Flag.ADD_ADDRESS), byte(4) == 7,
+        Condition(byte(0), flag=Flag.ADD_ADDRESS), Condition(byte(1), flag=Flag.ADD_ADDRESS), byte(5) == 3,
+    ], "I:0xH0000_K:0xH0001_I:{recall}_0xH0004=7_I:{recall}_0xH0005=3",
+        [{4: 7, 5: 3}, {1: 1}, {5: 7, 6: 3}, {0: 1}, {5: 3}], [0, 2, 4]),
+    OptimizerCase("bit checks merged into a mask", [
+        bit0(0) == 1, bit1(0) == 0, bit2(0) == 1,
+    ], "A:0xH0000&7_0=5", [{0: 5}, {0: 7}, {0: 13}, {0: 4}], [0, 2]),
+    OptimizerCase("delta bit checks merged", [
+        delta(bit0(0)) == 1, delta(bit1(0)) == 0,
+    ], "A:d0xH0000&3_0=1", [{0: 1}, {0: 2}, {0: 3}, {0: 0}, {}], [1]),
+    OptimizerCase("prior bit checks not merged", [
+        prior(bit0(0)) == 0, prior(bit1(0)) == 0,
+    ], "p0xM0000=0_p0xN0000=0", [{0: 0}, {0: 1}, {0: 3}, {0: 2}], [0, 1, 2]),
+    OptimizerCase("adjacent reads joined", [
+        byte(0) == 1, byte(1) == 2,
+    ], "0x 0000=513", [{0: 1}, {1: 2}, {0: 0}], [1]),
+    OptimizerCase("adjacent prior reads not joined", [
+        prior(byte(0)) == 0, prior(byte(1)) == 0,
+    ], "p0xH0000=0_p0xH0001=0", [{0: 1}, {1: 1}, {0: 0}], [0, 1]),
+]
+
+
+class LeaderboardCase(ReferenceCase):
+    """
+    A leaderboard, RAM writes per frame and the (frame, event, value) rcheevos reports.
+    """
+    def __init__(self, name: str, leaderboard: Leaderboard, frames: Sequence[Dict[int, int]],
+                 expected: Sequence[Tuple[int, str, int]]):
+        super().__init__(name, (), frames, expected)
+        self.leaderboard = leaderboard
+
+
+def _leaderboard(value, value_alts=()) -> Leaderboard:
+    # starts on byte 0 == 1, cancels on byte 0 == 2, submits on byte 1 == 1
+    leaderboard = Leaderboard("case", "").set_start(byte(0) == 1).set_cancel(byte(0) == 2)
+    leaderboard.set_submit(byte(1) == 1).set_value(value)
+    for alt in value_alts:
+        leaderboard.add_alt("value", alt)
+    return leaderboard
+
+
+LEADERBOARD_CASES = [
+    LeaderboardCase("legacy value adds up every term", _leaderboard([
+        Condition(byte(2), "*", 2),
+        Condition(byte(3)),
+    ]), [{}, {0: 1, 2: 5, 3: 5}, {2: 6}, {1: 1}], [(1, "started", 15), (3, "submitted", 17)]),
+    LeaderboardCase("value alternatives take the highest", _leaderboard(
+        [Condition(byte(2))], [[Condition(byte(3), "*", 3)]],
+    ), [{}, {0: 1, 2: 5, 3: 1}, {3: 2}, {1: 1}], [(1, "started", 5), (3, "submitted", 6)]),
+    LeaderboardCase("Measured value", _leaderboard([
+        Condition(byte(3), flag=Flag.ADD_SOURCE),
+        Condition(byte(2), flag=Flag.MEASURED),
+    ]), [{}, {0: 1, 2: 1, 3: 2}, {0: 2}], [(1, "started", 3), (2, "canceled", 3)]),
+    LeaderboardCase("bare memory value", _leaderboard(byte(2)),
+                    [{}, {0: 1, 2: 9}, {1: 1}], [(1, "started", 9), (2, "submitted", 9)]),
+]
+
+
+def check(factory: Callable, cases: Sequence[ReferenceCase] = CASES) -> List[str]:
+    """
+    Runs every reference case through `factory(core, alts)`, which must return an object
+    with step(ram) -> bool and a `measured` attribute. Returns one message per mismatch.
+    """
+    failures = []
+    for case in cases:
+        logic = factory(case.core, case.alts)
+        frames, measured = [], []
+        for frame, ram in enumerate(case.snapshots()):
+            if logic.step(ram):
+                frames.append(frame)
+            measured.append(logic.measured)
+        if frames != case.expected:
+            failures.append(f"{case.name}: true on frames {frames}, expected {case.expected}")
+        if case.measured is not None and measured != case.measured:
+            failures.append(f"{case.name}: measured {measured}, expected {case.measured}")
+    return failures
+
+
+def check_leaderboards(factory: Callable, cases: Sequence[LeaderboardCase] = LEADERBOARD_CASES) -> List[str]:
+    """
+    Runs every leaderboard case through `factory(leaderboard)`, which must return an object
+    with run(snapshots) -> [(frame, event, value)]. Returns one message per mismatch.
+    """
+    failures = []
+    for case in cases:
+        events = factory(case.leaderboard).run(case.snapshots())
+        if events != case.expected:
+            failures.append(f"{case.name}: events {events}, expected {case.expected}")
+    return failures
+
+
+def check_optimized(factory: Callable, cases: Sequence[OptimizerCase] = OPTIMIZER_CASES) -> List[str]:
+    """
+    Like check(), for the optimizer cases: each one must be rewritten to the expected
+    memaddr, and both the original and the optimized logic must match the frames.
+    """
+    failures = []
+    for case in cases:
+        core, alts, _ = optimize_logic(case.core, case.alts)
+        optimized = "S".join("_".join(condition.render() for condition in group) for group in [core] + alts)
+        if optimized != case.optimized:
+            failures.append(f"{case.name}: optimized to {optimized}, expected {case.optimized}")
+    optimized_factory = lambda core, alts: factory(*optimize_logic(core, alts)[:2])
+    return failures + check(factory, cases) + [f"optimized {failure}" for failure in check(optimized_factory, cases)]
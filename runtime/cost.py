@@ -0,0 +1,192 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from core.condition import Condition
+from core.constants import Flag, MemoryType
+from core.parser import parse_memaddr
+from core.value import MemoryExpression, MemoryValue
+from models.set import AchievementSet
+from .evaluator import unwrap
+
+# Relative cost of what the runtime does each frame, in "condition evaluations". Memory
+# reads are shared by the whole set (the emulator reads every address once per frame), a
+# pointer is one more read plus an address to resolve, and delta/prior values and hit
+# counters are state copied or updated every frame.
+COST_WEIGHTS = {"conditions": 1.0, "reads": 1.0, "pointers": 2.0, "deltas": 0.5, "hits": 0.5}
+METRICS = tuple(COST_WEIGHTS)
+
+# Rough limits for a set (all items) and for a single item, in cost units per frame
+DEFAULT_BUDGET = 10000.0
+DEFAULT_ITEM_BUDGET = 400.0
+
+_MACRO = re.compile(r"@\w+\(([^)]*)\)")
+
+
+class ItemCost:
+    """
+    What one achievement, leaderboard or rich presence display makes the runtime do each
+    frame. reads, pointers and deltas count distinct memory references, as the runtime
+    keeps one per address (and pointer chain) however many conditions use it.
+    """
+    def __init__(self, kind: str, id, title: str):
+        self.kind = kind
+        self.id = id
+        self.title = title
+        self.conditions = 0
+        self.hits = 0
+        self.memrefs: Set[tuple] = set()
+        self.chains: Set[tuple] = set()
+        self.delta_refs: Set[tuple] = set()
+        self.error: Optional[str] = None
+
+    @property
+    def reads(self) -> int:
+        return len(self.memrefs)
+
+    @property
+    def pointers(self) -> int:
+        return len(self.chains)
+
+    @property
+    def deltas(self) -> int:
+        return len(self.delta_refs)
+
+    @property
+    def cost(self) -> float:
+        return sum(getattr(self, metric) * weight for metric, weight in COST_WEIGHTS.items())
+
+    def add_group(self, group: Sequence[Condition]):
+        chain: Tuple[Condition, ...] = ()
+        for condition in group:
+            condition = unwrap(condition)
+            self.conditions += 1
+            if condition.hits or condition.flag in (Flag.ADD_HITS, Flag.SUB_HITS):
+                self.hits += 1
+            for value in _memory_values(condition):
+                self.memrefs.add((chain, value.address, value.size))
+                if value.mtype in (MemoryType.DELTA, MemoryType.PRIOR):
+                    self.delta_refs.add((chain, value.address, value.size, value.mtype))
+            if condition.flag == Flag.ADD_ADDRESS:
+                chain += (condition,)
+                self.chains.add(chain)
+            else:
+                chain = ()
+
+    def add_rendered(self, text: str):
+        for group in parse_memaddr(text):
+            self.add_group(group)
+
+    def to_dict(self) -> dict:
+        data = {"kind": self.kind, "id": self.id, "title": self.title, "cost": self.cost}
+        data.update((metric, getattr(self, metric)) for metric in METRICS)
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+def _memory_values(operand) -> Iterable[MemoryValue]:
+    # operands nest: Condition(mem * 2) holds a Condition, pointer sums a MemoryExpression
+    if isinstance(operand, MemoryValue):
+        if operand.mtype != MemoryType.RECALL:
+            yield operand
+    elif isinstance(operand, Condition):
+        yield from _memory_values(operand.lvalue)
+        yield from _memory_values(operand.rvalue)
+    elif isinstance(operand, MemoryExpression):
+        for term, _ in operand.terms:
+            yield from _memory_values(term)
+
+
+class CostReport:
+    """
+    Static per-frame cost of every item of a set, and the set totals against a budget.
+    The totals count each memory reference once for the whole set, like the runtime does.
+    """
+    def __init__(self, items: List[ItemCost], budget: float = DEFAULT_BUDGET,
+                 item_budget: float = DEFAULT_ITEM_BUDGET):
+        self.items = items
+        self.budget = budget
+        self.item_budget = item_budget
+
+    def totals(self) -> Dict[str, float]:
+        memrefs, chains, delta_refs = set(), set(), set()
+        for item in self.items:
+            memrefs |= item.memrefs
+            chains |= item.chains
+            delta_refs |= item.delta_refs
+        totals = {
+            "conditions": sum(item.conditions for item in self.items),
+            "reads": len(memrefs), "pointers": len(chains), "deltas": len(delta_refs),
+            "hits": sum(item.hits for item in self.items),
+        }
+        totals["cost"] = sum(totals[metric] * weight for metric, weight in COST_WEIGHTS.items())
+        return totals
+
+    def ranked(self, top: Optional[int] = None) -> List[ItemCost]:
+        return sorted(self.items, key=lambda item: -item.cost)[:top]
+
+    def over_item_budget(self) -> List[ItemCost]:
+        return [item for item in self.ranked() if item.cost > self.item_budget]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.totals()["cost"] > self.budget or bool(self.over_item_budget())
+
+    def to_dict(self) -> dict:
+        return {
+            "totals": self.totals(), "budget": self.budget, "item_budget": self.item_budget,
+            "over_budget": self.over_budget,
+            "items": [item.to_dict() for item in self.ranked()],
+        }
+
+    def render(self, top: Optional[int] = None) -> str:
+        """
+        Text report: the set totals, then the most expensive items first.
+        """
+        totals = self.totals()
+        status = "OVER BUDGET" if totals["cost"] > self.budget else "ok"
+        lines = [
+            f"{len(self.items)} items: {totals['cost']:.0f} / {self.budget:.0f} per frame ({status})",
+            "  " + ", ".join(f"{totals[metric]} {metric}" for metric in METRICS),
+        ]
+        for item in self.ranked(top):
+            flag = "  OVER BUDGET" if item.cost > self.item_budget else ""
+            counts = " ".join(f"{getattr(item, metric):>4} {metric}" for metric in METRICS)
+            lines.append(f"{item.cost:>8.1f}  {item.kind:<12} {str(item.id):>8} {item.title[:30]:<30} {counts}{flag}")
+            if item.error:
+                lines.append(f"          {item.error}")
+        return "\n".join(lines)
+
+
+def _item(kind: str, id, title: str, groups: Iterable[Sequence[Condition]] = (), rendered: Iterable[str] = ()) -> ItemCost:
+    item = ItemCost(kind, id, title)
+    try:
+        for group in groups:
+            item.add_group(group)
+        for text in rendered:
+            item.add_rendered(text)
+    except ValueError as e:
+        # counted as far as it could be read
+        item.error = str(e).strip().splitlines()[0]
+    return item
+
+
+def cost_report(achievement_set: AchievementSet, budget: float = DEFAULT_BUDGET,
+                item_budget: float = DEFAULT_ITEM_BUDGET) -> CostReport:
+    """
+    Estimates what every achievement, leaderboard and rich presence display of a set costs
+    the runtime each frame, without running it.
+    """
+    items = []
+    for ach in achievement_set.achievements:
+        items.append(_item("achievement", ach.id, ach.title, [ach.core + ach.conditions] + ach.alts))
+    for lb in achievement_set.leaderboards:
+        groups = [lb.start, lb.cancel, lb.submit, lb.value] + [alt for alts in lb.alts.values() for alt in alts]
+        items.append(_item("leaderboard", lb.id, lb.title, groups))
+    rp = achievement_set.rich_presence
+    if rp:
+        for index, (condition, text) in enumerate(rp.displays):
+            # macro parameters may be several values separated by '$' (the highest one is shown)
+            values = [value for parameter in _MACRO.findall(text) for value in parameter.split("$")]
+            rendered = ([condition] if condition and condition != "True" else []) + values
+            items.append(_item("display", index, text, rendered=rendered))
+    return CostReport(items, budget, item_budget)
@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from core.value import MemoryValue
+from core.constants import MemoryType
+from models.achievement import Achievement
+from models.set import AchievementSet
+from .evaluator import AchievementEvaluator, MemorySlots, is_stateless, unwrap
+from .memory import SIZE_BYTES
+
+# (evaluator index, group position)
+GroupKey = Tuple[int, int]
+
+
+class DirtySetEvaluator:
+    """
+    Frame-stepping evaluator for a whole set that only re-evaluates the groups whose
+    inputs changed.
+
+    Groups without hit counts, AddAddress or AddHits/SubHits give the same result for the
+    same memory values, so their last result is reused until one of their addresses changes
+    (or changed on the previous frame, which moves its delta). Groups that keep state between
+    frames are evaluated every frame, so hits, resets and pauses behave exactly as in the
+    plain evaluator.
+    """
+    def __init__(self, achievement_set: AchievementSet):
+        self.achievement_set = achievement_set
+        self.slots = MemorySlots()
+        self.evaluators = [AchievementEvaluator(ach, self.slots) for ach in achievement_set.achievements]
+
+        # inverted index: byte address -> slots covering it -> groups reading them
+        self.byte_slots: Dict[int, List[int]] = {}
+        self.slot_groups: Dict[int, Set[GroupKey]] = {}
+        self.always: List[GroupKey] = []
+        self._cache: Dict[GroupKey, Tuple[bool, bool]] = {}
+
+        for index, evaluator in enumerate(self.evaluators):
+            ach = evaluator.achievement
+            for position, group in enumerate([ach.core + ach.conditions] + ach.alts):
+                key = (index, position)
+                if not is_stateless(group):
+                    self.always.append(key)
+                    continue
+                for slot in self._group_slots(group):
+                    self.slot_groups.setdefault(slot, set()).add(key)
+
+        for slot, (address, size) in enumerate(self.slots.keys):
+            for byte in range(address, address + SIZE_BYTES.get(size, 1)):
+                self.byte_slots.setdefault(byte, []).append(slot)
+
+        self._changed_last: Set[int] = set()
+        self._true: Set[int] = set()
+
+    def _group_slots(self, group) -> Iterable[int]:
+        for cond in group:
+            cond = unwrap(cond)
+            for value in (cond.lvalue, cond.rvalue):
+                if isinstance(value, MemoryValue) and value.mtype != MemoryType.RECALL:
+                    yield self.slots.slot(value.address, value.size)
+
+    def _changed_slots(self, changed: Optional[Iterable[Tuple[int, int]]]) -> Iterable[int]:
+        if changed is None or self.slots.frame < 0:
+            return range(len(self.slots.keys))
+        slots = set()
+        for start, length in changed:
+            for byte in range(start, start + length):
+                slots.update(self.byte_slots.get(byte, ()))
+        return slots
+
+    def _test(self, key: GroupKey, ram) -> Tuple[bool, bool]:
+        index, position = key
+        evaluator = self.evaluators[index]
+        group = evaluator.core if position == 0 else evaluator.alts[position - 1]
+        evaluator.was_reset = False
+        evaluator.recall = 0
+        result = evaluator._test_group(position, group, ram)
+        return result, evaluator.was_reset
+
+    def step(self, ram, changed: Optional[Iterable[Tuple[int, int]]] = None) -> List[Achievement]:
+        """
+        Evaluates one frame and returns the achievements whose logic is true on it.
+        `changed` lists the (start, length) byte runs that differ from the previous frame;
+        when omitted, every watched address is compared instead.
+        """
+        first = self.slots.frame < 0
+        changed_last = self._changed_last
+        refresh = set(self._changed_slots(changed)) | changed_last
+        changed_now = set(self.slots.refresh(ram, sorted(refresh)))
+        self._changed_last = changed_now
+
+        dirty: Set[GroupKey] = set()
+        if first:
+            dirty.update(key for keys in self.slot_groups.values() for key in keys)
+            dirty.update((i, p) for i, e in enumerate(self.evaluators) for p in range(1 + len(e.alts)))
+        # a slot that changed last frame has a new delta now
+        for slot in changed_now | changed_last:
+            dirty.update(self.slot_groups.get(slot, ()))
+        dirty.update(self.always)
+
+        touched = set()
+        for key in dirty:
+            self._cache[key] = self._test(key, ram)
+            touched.add(key[0])
+
+        for index in touched:
+            evaluator = self.evaluators[index]
+            groups = 1 + len(evaluator.alts)
+            results = [self._cache[(index, p)] for p in range(groups)]
+            result = results[0][0] and (groups == 1 or any(r for r, _ in results[1:]))
+            if any(reset for _, reset in results):
+                evaluator.reset_hits()
+                result = False
+            if result:
+                self._true.add(index)
+            else:
+                self._true.discard(index)
+
+        return [self.evaluators[index].achievement for index in sorted(self._true)]
+
+    def run(self, snapshots: Iterable) -> Dict[int, List[int]]:
+        """
+        Steps through every snapshot and returns the trigger frames of each achievement, by ID.
+        `snapshots` may also yield (ram, changed) pairs, like Trace.iter_changes().
+        """
+        triggers: Dict[int, List[int]] = {ach.id: [] for ach in self.achievement_set.achievements}
+        for frame, item in enumerate(snapshots):
+            if isinstance(item, tuple):
+                achievements = self.step(*item)
+            else:
+                achievements = self.step(item)
+            for ach in achievements:
+                triggers[ach.id].append(frame)
+        return triggers
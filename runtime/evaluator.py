@@ -0,0 +1,498 @@
+import operator
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from core.condition import Condition
+from core.constants import Flag, MemorySize, MemoryType
+from core.value import MemoryValue, ConstantValue
+from models.achievement import Achievement
+from .memory import READERS, transform
+
+def _div(a, b):
+    if not b:
+        return 0
+    if isinstance(a, int) and isinstance(b, int):
+        return a // b
+    return a / b
+
+def _mod(a, b):
+    if not b:
+        return 0
+    return a % b
+
+def _mul(a, b):
+    result = a * b
+    if isinstance(result, int):
+        return result & 0xFFFFFFFF
+    return result
+
+COMPARISONS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+MODIFIERS = {
+    "*": _mul,
+    "/": _div,
+    "%": _mod,
+    "&": lambda a, b: int(a) & int(b),
+    "^": lambda a, b: int(a) ^ int(b),
+}
+
+# Flags that feed the next condition instead of being tested on their own
+COMBINING_FLAGS = (
+    Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.ADD_ADDRESS, Flag.ADD_HITS, Flag.SUB_HITS,
+    Flag.AND_NEXT, Flag.OR_NEXT, Flag.RESET_NEXT_IF, Flag.REMEMBER,
+)
+
+# Flags whose effect depends on state kept across frames
+STATEFUL_FLAGS = (Flag.ADD_ADDRESS, Flag.ADD_HITS, Flag.SUB_HITS)
+
+NONE, ADD_SOURCE, SUB_SOURCE, ADD_ADDRESS, REMEMBER = Flag.NONE, Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.ADD_ADDRESS, Flag.REMEMBER
+ADD_HITS, SUB_HITS, RESET_NEXT_IF, AND_NEXT, OR_NEXT = Flag.ADD_HITS, Flag.SUB_HITS, Flag.RESET_NEXT_IF, Flag.AND_NEXT, Flag.OR_NEXT
+PAUSE_IF, RESET_IF, MEASURED, MEASURED_PERCENT, MEASURED_IF = Flag.PAUSE_IF, Flag.RESET_IF, Flag.MEASURED, Flag.MEASURED_PERCENT, Flag.MEASURED_IF
+
+# (flag, left getter, right getter, comparison, hits, pause, index into the evaluator's hit list)
+Operation = Tuple
+
+
+def unwrap(condition: Condition) -> Condition:
+    """
+    Conditions built like Condition(0 == mem) hold another Condition as lvalue.
+    The rendered string is the same as the inner comparison with the outer flag and hits.
+    """
+    inner = condition.lvalue
+    if not isinstance(inner, Condition):
+        return condition
+    inner = unwrap(inner)
+    if inner.flag != Flag.NONE and condition.flag != Flag.NONE:
+        raise ValueError(f"Nested condition with two flags: {condition.render()}")
+    return Condition(
+        inner.lvalue, inner.cmp, inner.rvalue,
+        condition.flag if condition.flag != Flag.NONE else inner.flag,
+        condition.hits or inner.hits,
+    )
+
+
+def is_stateless(conditions: Sequence[Condition]) -> bool:
+    """
+    True when a group's result only depends on the memory values of the current frame
+    (and their delta/prior): no hit counts, no AddAddress and no AddHits/SubHits.
+    """
+    for cond in conditions:
+        cond = unwrap(cond)
+        if cond.hits or cond.flag in STATEFUL_FLAGS:
+            return False
+    return True
+
+
+class MemorySlots:
+    """
+    Memory state shared by every piece of logic evaluated against the same snapshots.
+    Direct reads are refreshed once per frame; reads behind AddAddress are refreshed
+    when they are evaluated, since their address is only known at that point.
+    """
+    def __init__(self):
+        self.frame = -1
+        self.index: Dict[Tuple[int, MemorySize], int] = {}
+        self.keys: List[Tuple[int, MemorySize]] = []
+        self.readers: list = []
+        self.current: list = []
+        self.delta: list = []
+        self.prior: list = []
+        # indirect slot id -> [frame, current, delta, prior]
+        self.indirect: Dict[int, list] = {}
+        self._next_indirect = 0
+
+    def slot(self, address: int, size: MemorySize) -> int:
+        key = (address, size)
+        if key not in self.index:
+            self.index[key] = len(self.keys)
+            self.keys.append(key)
+            self.readers.append(READERS[size])
+            self.current.append(0)
+            self.delta.append(0)
+            self.prior.append(0)
+        return self.index[key]
+
+    def indirect_slot(self) -> int:
+        self._next_indirect += 1
+        self.indirect[self._next_indirect] = [-1, 0, 0, 0]
+        return self._next_indirect
+
+    def update(self, ram):
+        self.frame += 1
+        current, delta, prior = self.current, self.delta, self.prior
+        for i, (address, _) in enumerate(self.keys):
+            value = self.readers[i](ram, address)
+            old = current[i]
+            delta[i] = old
+            if value != old:
+                prior[i] = old
+                current[i] = value
+
+    def refresh(self, ram, slots: Iterable[int]) -> List[int]:
+        """
+        Like update(), but only re-reads the given slots. Every other slot must have been
+        unchanged on the previous frame, so its delta already equals its current value.
+        Returns the slots whose value changed.
+        """
+        self.frame += 1
+        current, delta, prior = self.current, self.delta, self.prior
+        changed = []
+        for i in slots:
+            value = self.readers[i](ram, self.keys[i][0])
+            old = current[i]
+            delta[i] = old
+            if value != old:
+                prior[i] = old
+                current[i] = value
+                changed.append(i)
+        return changed
+
+    def read_indirect(self, slot: int, value):
+        state = self.indirect[slot]
+        if state[0] != self.frame:
+            state[0] = self.frame
+            state[2] = state[1]
+            if value != state[1]:
+                state[3] = state[1]
+                state[1] = value
+        return state
+
+    def get_state(self) -> dict:
+        """
+        Copy of every value the slots hold, as plain lists (JSON and pickle friendly).
+        """
+        return {
+            "frame": self.frame,
+            "current": list(self.current),
+            "delta": list(self.delta),
+            "prior": list(self.prior),
+            "indirect": [[slot] + list(state) for slot, state in self.indirect.items()],
+        }
+
+    def set_state(self, state: dict):
+        self.frame = state["frame"]
+        self.current[:] = state["current"]
+        self.delta[:] = state["delta"]
+        self.prior[:] = state["prior"]
+        for slot, *values in state["indirect"]:
+            self.indirect[slot][:] = values
+
+    def reset(self):
+        self.frame = -1
+        for i in range(len(self.keys)):
+            self.current[i] = self.delta[i] = self.prior[i] = 0
+        for state in self.indirect.values():
+            state[:] = [-1, 0, 0, 0]
+
+
+class TriggerEvaluator:
+    """
+    Evaluates a core group plus alt groups frame by frame with rcheevos semantics:
+    hit counts, ResetIf/PauseIf/ResetNextIf, AndNext/OrNext, AddSource/SubSource,
+    AddHits/SubHits, AddAddress, Remember/Recall, Measured/MeasuredIf and delta/prior.
+
+    A frame is reported as triggered whenever the logic is true on it; the emulator
+    would stop evaluating the achievement after the first one.
+    """
+    def __init__(self, core: Sequence[Condition], alts: Iterable[Sequence[Condition]] = (), slots: Optional[MemorySlots] = None):
+        self.slots = slots if slots is not None else MemorySlots()
+        self.owns_slots = slots is None
+        self.hits: List[int] = []
+        self.conditions: List[Condition] = []
+        self.core = self._compile_group(core)
+        self.alts = [self._compile_group(alt) for alt in alts]
+        self.has_pause = [any(op[5] for op in group) for group in (self.core, *self.alts)]
+        self.paused = [False] * (1 + len(self.alts))
+        self.recall = 0
+        self.measured = None
+        self.was_reset = False
+        self.groups: List[bool] = []
+
+    # --- compilation ---
+
+    def _compile_operand(self, value, indirect: bool):
+        """
+        Turns an operand into a getter called as getter(ram, add_address).
+        """
+        if value is None:
+            return None
+        if isinstance(value, ConstantValue):
+            value = value.value
+        if isinstance(value, (int, float)):
+            return lambda ram, add_address: value
+        if not isinstance(value, MemoryValue):
+            raise TypeError(f"Cannot evaluate operand of type {type(value).__name__}")
+
+        size, mtype = value.size, value.mtype
+        if mtype == MemoryType.RECALL:
+            return lambda ram, add_address: self.recall
+
+        slots = self.slots
+        if indirect:
+            address, reader, slot = value.address, READERS[size], slots.indirect_slot()
+            read_indirect = slots.read_indirect
+            position = {MemoryType.DELTA: 2, MemoryType.PRIOR: 3}.get(mtype, 1)
+            if mtype in (MemoryType.BCD, MemoryType.INVERT):
+                return lambda ram, add_address: transform(read_indirect(slot, reader(ram, address + add_address))[1], size, mtype)
+            return lambda ram, add_address: read_indirect(slot, reader(ram, address + add_address))[position]
+
+        slot = slots.slot(value.address, size)
+        if mtype == MemoryType.DELTA:
+            delta = slots.delta
+            return lambda ram, add_address: delta[slot]
+        if mtype == MemoryType.PRIOR:
+            prior = slots.prior
+            return lambda ram, add_address: prior[slot]
+        current = slots.current
+        if mtype == MemoryType.MEM:
+            return lambda ram, add_address: current[slot]
+        return lambda ram, add_address: transform(current[slot], size, mtype)
+
+    def _compile_group(self, conditions: Sequence[Condition]) -> Tuple[Operation, ...]:
+        conditions = [unwrap(c) for c in conditions]
+        pause = [False] * len(conditions)
+
+        # A PauseIf takes the whole chain of combining conditions before it with it
+        start = 0
+        for i, cond in enumerate(conditions):
+            if cond.flag == Flag.PAUSE_IF:
+                for j in range(start, i + 1):
+                    pause[j] = True
+            if cond.flag not in COMBINING_FLAGS:
+                start = i + 1
+
+        group = []
+        for i, cond in enumerate(conditions):
+            indirect = i > 0 and conditions[i - 1].flag == Flag.ADD_ADDRESS
+            left = self._compile_operand(cond.lvalue, indirect)
+            right = self._compile_operand(cond.rvalue, indirect)
+            comparison = None
+            if right is not None:
+                if cond.cmp in COMPARISONS:
+                    comparison = COMPARISONS[cond.cmp]
+                elif cond.cmp in MODIFIERS:
+                    left = self._modified(left, MODIFIERS[cond.cmp], right)
+                    right = None
+                else:
+                    raise ValueError(f"Unknown operator '{cond.cmp}' in {cond.render()}")
+            group.append((cond.flag, left, right, comparison, cond.hits, pause[i], len(self.hits)))
+            self.hits.append(0)
+            self.conditions.append(cond)
+        return tuple(group)
+
+    @staticmethod
+    def _modified(left, modifier, right):
+        return lambda ram, add_address: modifier(left(ram, add_address), right(ram, add_address))
+
+    # --- evaluation ---
+
+    def _test_group_internal(self, group, ram, processing_pause: bool) -> bool:
+        hits = self.hits
+        set_valid = True
+        add_value = 0
+        add_hits = 0
+        add_address = 0
+        and_next = True
+        or_next = False
+        reset_next = False
+        can_measure = True
+        measured = None
+
+        for flag, left, right, comparison, required, pause, index in group:
+            if pause is not processing_pause:
+                continue
+
+            if flag is ADD_SOURCE:
+                add_value += left(ram, add_address)
+                add_address = 0
+                continue
+            if flag is SUB_SOURCE:
+                add_value -= left(ram, add_address)
+                add_address = 0
+                continue
+            if flag is ADD_ADDRESS:
+                add_address = int(left(ram, add_address)) & 0xFFFFFFFF
+                continue
+            if flag is REMEMBER:
+                self.recall = left(ram, add_address) + add_value
+                add_value = 0
+                add_address = 0
+                continue
+
+            value = left(ram, add_address) + add_value
+            if (flag is MEASURED or flag is MEASURED_PERCENT) and required == 0 and can_measure:
+                measured = value
+            is_true = comparison is None or comparison(value, right(ram, add_address))
+            add_value = 0
+            add_address = 0
+
+            valid = is_true and and_next or or_next
+            and_next = True
+            or_next = False
+
+            if reset_next:
+                hits[index] = 0
+                valid = False
+            elif valid:
+                if required == 0:
+                    hits[index] += 1
+                elif hits[index] < required:
+                    hits[index] += 1
+                    valid = hits[index] == required
+            elif hits[index]:
+                valid = hits[index] == required
+
+            if flag is not NONE:
+                if flag is ADD_HITS:
+                    add_hits += hits[index]
+                    reset_next = False
+                    continue
+                if flag is SUB_HITS:
+                    add_hits -= hits[index]
+                    reset_next = False
+                    continue
+                if flag is RESET_NEXT_IF:
+                    reset_next = valid
+                    continue
+                if flag is AND_NEXT:
+                    and_next = valid
+                    continue
+                if flag is OR_NEXT:
+                    or_next = valid
+                    continue
+
+            reset_next = False
+            if add_hits:
+                if required:
+                    valid = hits[index] + add_hits >= required
+                    if flag is MEASURED or flag is MEASURED_PERCENT:
+                        measured = max(hits[index] + add_hits, 0)
+                add_hits = 0
+            elif required and (flag is MEASURED or flag is MEASURED_PERCENT):
+                measured = hits[index]
+
+            if flag is not NONE:
+                if flag is PAUSE_IF:
+                    if valid:
+                        return True
+                    set_valid = False
+                    if required == 0:
+                        hits[index] = 0
+                    continue
+                if flag is RESET_IF:
+                    if valid:
+                        self.was_reset = True
+                        set_valid = False
+                    continue
+                if flag is MEASURED_IF and not valid:
+                    can_measure = False
+                    measured = 0
+
+            if not valid:
+                set_valid = False
+
+        if measured is not None:
+            self.measured = measured if self.measured is None else max(self.measured, measured)
+        return set_valid
+
+    def _test_group(self, position: int, group, ram) -> bool:
+        if not group:
+            return True
+        if self.has_pause[position]:
+            paused = self._test_group_internal(group, ram, True)
+            self.paused[position] = paused
+            if paused:
+                return False
+        return self._test_group_internal(group, ram, False)
+
+    def evaluate(self, ram) -> bool:
+        """
+        Evaluates the logic for the frame already loaded into the memory slots.
+        """
+        self.was_reset = False
+        self.measured = None
+        self.recall = 0
+        result = self._test_group(0, self.core, ram)
+        groups = [result]
+        if self.alts:
+            for position, alt in enumerate(self.alts, 1):
+                self.recall = 0
+                groups.append(self._test_group(position, alt, ram))
+            result = result and any(groups[1:])
+        self.groups = groups
+        if self.was_reset:
+            self.reset_hits()
+            result = False
+        return result
+
+    def step(self, ram) -> bool:
+        """
+        Loads the next RAM snapshot and evaluates the logic on it.
+        """
+        if self.owns_slots:
+            self.slots.update(ram)
+        return self.evaluate(ram)
+
+    def reset_hits(self):
+        for i in range(len(self.hits)):
+            self.hits[i] = 0
+
+    def reset(self):
+        self.reset_hits()
+        self.paused = [False] * (1 + len(self.alts))
+        self.recall = 0
+        self.measured = None
+        if self.owns_slots:
+            self.slots.reset()
+
+    def get_state(self) -> dict:
+        """
+        Everything needed to resume evaluation later: hit counts, pause flags, the
+        Remember value and, when the evaluator owns them, the delta/prior buffers.
+        """
+        state = {
+            "hits": list(self.hits),
+            "paused": list(self.paused),
+            "recall": self.recall,
+            "measured": self.measured,
+            "was_reset": self.was_reset,
+            "groups": list(self.groups),
+        }
+        if self.owns_slots:
+            state["slots"] = self.slots.get_state()
+        return state
+
+    def set_state(self, state: dict):
+        self.hits[:] = state["hits"]
+        self.paused[:] = state["paused"]
+        self.recall = state["recall"]
+        self.measured = state["measured"]
+        self.was_reset = state["was_reset"]
+        self.groups = list(state["groups"])
+        if "slots" in state:
+            self.slots.set_state(state["slots"])
+
+    def run(self, snapshots: Iterable) -> List[int]:
+        """
+        Steps through every snapshot and returns the frames where the logic was true.
+        """
+        return [frame for frame, ram in enumerate(snapshots) if self.step(ram)]
+
+
+class AchievementEvaluator(TriggerEvaluator):
+    def __init__(self, achievement: Achievement, slots: Optional[MemorySlots] = None):
+        self.achievement = achievement
+        core = achievement.core + achievement.conditions
+        super().__init__(core, achievement.alts, slots)
+
+
+def evaluate_achievement(achievement: Achievement, snapshots: Iterable) -> List[int]:
+    """
+    Returns the frames of a RAM trace on which the achievement would trigger.
+    """
+    return AchievementEvaluator(achievement).run(snapshots)
@@ -0,0 +1,363 @@
+import asyncio
+import random
+import struct
+import time
+from multiprocessing import Event, Process, resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional
+
+from models.set import AchievementSet
+from .compiler import CompiledLeaderboard, CompiledSet
+from .trace import Trace
+
+# Ring layout: header, then `slots` slots of (sequence u64, timestamp ns u64, RAM).
+# A slot's sequence is odd while the writer is filling it and 2 * (frame + 1) once done,
+# so a reader can tell a complete frame from one that is being overwritten.
+MAGIC = b"PYCRING1"
+HEADER = struct.Struct("<8sIIQ")
+COUNT_OFFSET = 16
+SLOT_HEADER = struct.Struct("<QQ")
+_COUNT = struct.Struct("<Q")
+
+# How long the consumer sleeps when no new frame is available
+POLL_INTERVAL = 0.0005
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Only the creator unlinks the block; keep attaching processes from
+    # registering it with their resource tracker (Python < 3.13 has no track=False)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class RingWriter:
+    """
+    Producer side of the ring buffer: an emulator (or FakeEmulator) writes one RAM
+    snapshot per frame. With create=False it attaches to a ring created elsewhere.
+    """
+    def __init__(self, name: Optional[str] = None, ram_size: int = 0, slots: int = 64, create: bool = True):
+        if create:
+            self.slot_size = SLOT_HEADER.size + ram_size
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + slots * self.slot_size)
+            HEADER.pack_into(self.shm.buf, 0, MAGIC, ram_size, slots, 0)
+        else:
+            self.shm = _attach(name)
+            magic, ram_size, slots, _ = HEADER.unpack_from(self.shm.buf, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Shared memory '{name}' is not a PyCheevos ring buffer")
+            self.slot_size = SLOT_HEADER.size + ram_size
+        self.name = self.shm.name
+        self.ram_size = ram_size
+        self.slots = slots
+        self.created = create
+        self.count = _COUNT.unpack_from(self.shm.buf, COUNT_OFFSET)[0]
+
+    def write(self, ram):
+        frame = self.count
+        offset = HEADER.size + (frame % self.slots) * self.slot_size
+        buf = self.shm.buf
+        SLOT_HEADER.pack_into(buf, offset, 2 * frame + 1, 0)
+        buf[offset + SLOT_HEADER.size:offset + self.slot_size] = ram
+        SLOT_HEADER.pack_into(buf, offset, 2 * frame + 2, time.monotonic_ns())
+        self.count = frame + 1
+        _COUNT.pack_into(buf, COUNT_OFFSET, self.count)
+
+    def close(self):
+        self.shm.close()
+        if self.created:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RingReader:
+    """
+    Consumer side of the ring buffer. read() copies one frame into a local buffer,
+    and returns None when the writer has already overwritten it.
+    """
+    def __init__(self, name: str):
+        self.shm = _attach(name)
+        magic, self.ram_size, self.slots, _ = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory '{name}' is not a PyCheevos ring buffer")
+        self.slot_size = SLOT_HEADER.size + self.ram_size
+        self.buffer = bytearray(self.ram_size)
+
+    @property
+    def count(self) -> int:
+        """
+        Number of frames written so far.
+        """
+        return _COUNT.unpack_from(self.shm.buf, COUNT_OFFSET)[0]
+
+    def read(self, frame: int) -> Optional[int]:
+        """
+        Copies `frame` into self.buffer and returns the time (monotonic ns) it was written.
+        """
+        offset = HEADER.size + (frame % self.slots) * self.slot_size
+        buf = self.shm.buf
+        expected = 2 * frame + 2
+        sequence, written = SLOT_HEADER.unpack_from(buf, offset)
+        if sequence != expected:
+            return None
+        self.buffer[:] = buf[offset + SLOT_HEADER.size:offset + self.slot_size]
+        if SLOT_HEADER.unpack_from(buf, offset)[0] != expected:
+            return None
+        return written
+
+    def close(self):
+        self.shm.close()
+
+
+# --- FAKE EMULATOR ---
+
+def _emulate(name: str, fps: float, frames: int, trace_path: Optional[str], seed: int, stop):
+    writer = RingWriter(name, create=False)
+    period = 1.0 / fps if fps else 0
+    source = None
+    if trace_path:
+        source = Trace(trace_path)
+        snapshots = iter(source)
+    else:
+        # a handful of random byte writes per frame, like a game updating its variables
+        rng = random.Random(seed)
+        ram = bytearray(writer.ram_size)
+
+        def random_frames():
+            while True:
+                for _ in range(8):
+                    ram[rng.randrange(min(writer.ram_size, 0x1000))] = rng.randrange(4)
+                yield ram
+        snapshots = random_frames()
+
+    start = time.perf_counter()
+    try:
+        for frame, ram in enumerate(snapshots):
+            if frame >= frames or stop.is_set():
+                break
+            delay = start + frame * period - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            writer.write(ram)
+    finally:
+        if source is not None:
+            source.close()
+        writer.shm.close()
+
+
+class FakeEmulator:
+    """
+    Stand-in for an emulator: a separate process writing RAM into a ring buffer at a
+    fixed frame rate, either replaying a trace file or making random writes.
+    """
+    def __init__(self, ram_size: int = 0x2000, fps: float = 60, frames: int = 600,
+                 trace: Optional[str] = None, slots: int = 64, seed: int = 0):
+        if trace:
+            with Trace(trace) as source:
+                ram_size = source.ram_size
+                frames = min(frames, len(source))
+        self.ring = RingWriter(ram_size=ram_size, slots=slots)
+        self.name = self.ring.name
+        self.frames = frames
+        self._stop = Event()
+        self.process = Process(target=_emulate, args=(self.name, fps, frames, trace, seed, self._stop), daemon=True)
+
+    def start(self):
+        self.process.start()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self):
+        self._stop.set()
+        self.process.join()
+        self.ring.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- LIVE EVALUATION ---
+
+class LiveEvent:
+    """
+    kind is "trigger", "measured", "started", "canceled" or "submitted"; `id` is the
+    achievement or leaderboard ID and `value` the measured or leaderboard value.
+    """
+    __slots__ = ("kind", "frame", "id", "value", "latency")
+
+    def __init__(self, kind: str, frame: int, id: int, value=None, latency: float = 0.0):
+        self.kind = kind
+        self.frame = frame
+        self.id = id
+        self.value = value
+        self.latency = latency
+
+    def __repr__(self):
+        return f"LiveEvent({self.kind}, frame={self.frame}, id={self.id}, value={self.value})"
+
+
+class LatencyStats:
+    """
+    Time from a frame being written to its evaluation finishing, in milliseconds.
+    """
+    def __init__(self):
+        self.samples: List[float] = []
+        self.dropped = 0
+
+    def add(self, milliseconds: float):
+        self.samples.append(milliseconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def report(self) -> str:
+        if not self.samples:
+            return "no frames evaluated"
+        mean = sum(self.samples) / len(self.samples)
+        return (f"{len(self.samples)} frames, {self.dropped} dropped, latency mean {mean:.3f} ms, "
+                f"p50 {self.percentile(50):.3f} ms, p99 {self.percentile(99):.3f} ms, "
+                f"max {max(self.samples):.3f} ms")
+
+
+class LiveEvaluator:
+    """
+    Evaluates a whole set on frames read from a ring buffer as they arrive, and emits
+    LiveEvent objects: a trigger the first time an achievement is true (like the emulator,
+    it is not reported again), measured progress whenever it changes, and leaderboard
+    starts, cancels and submissions.
+    """
+    def __init__(self, achievement_set: AchievementSet, on_event: Optional[Callable[[LiveEvent], None]] = None):
+        self.achievement_set = achievement_set
+        self.on_event = on_event
+        self.compiled = CompiledSet(achievement_set)
+        self.leaderboards = [CompiledLeaderboard(lb) for lb in achievement_set.leaderboards]
+        self.triggered: Dict[int, int] = {}
+        self.stats = LatencyStats()
+        self.frame = 0
+        self._measured = [None] * len(achievement_set.achievements)
+
+    def evaluate(self, ram, written: int = 0, frame: Optional[int] = None) -> List[LiveEvent]:
+        """
+        Evaluates one frame and returns (and emits) its events. `frame` is the frame number
+        the events carry (the ring buffer's, when frames were dropped); by default the one
+        after the previous call.
+        """
+        if frame is None:
+            frame = self.frame
+        achievements = self.achievement_set.achievements
+        events = []
+        for index in self.compiled.step(ram):
+            ach = achievements[index]
+            if ach.id not in self.triggered:
+                self.triggered[ach.id] = frame
+                events.append(LiveEvent("trigger", frame, ach.id))
+
+        measured = self.compiled.measured
+        previous = self._measured
+        for index, value in enumerate(measured):
+            if value != previous[index]:
+                if value is not None and achievements[index].id not in self.triggered:
+                    events.append(LiveEvent("measured", frame, achievements[index].id, value))
+                previous[index] = value
+
+        for lb in self.leaderboards:
+            kind = lb.step(ram)
+            if kind:
+                events.append(LiveEvent(kind, frame, lb.leaderboard.id, lb.value))
+
+        if written:
+            latency = (time.monotonic_ns() - written) / 1e6
+            self.stats.add(latency)
+            for event in events:
+                event.latency = latency
+        if self.on_event:
+            for event in events:
+                self.on_event(event)
+        self.frame = frame + 1
+        return events
+
+    def _poll(self, reader: RingReader, next_frame: int):
+        """
+        Evaluates every frame available after `next_frame`; returns the new next frame.
+        """
+        count = reader.count
+        if count - next_frame > reader.slots:
+            # fell behind: frames still in the ring are the only ones left
+            self.stats.dropped += count - reader.slots - next_frame
+            next_frame = count - reader.slots
+        while next_frame < count:
+            written = reader.read(next_frame)
+            if written is None:
+                self.stats.dropped += 1
+            else:
+                self.evaluate(reader.buffer, written, next_frame)
+            next_frame += 1
+        return next_frame
+
+    def run(self, name: str, frames: Optional[int] = None, timeout: float = 1.0):
+        """
+        Consumes the ring buffer `name` until `frames` frames were seen, or no new frame
+        arrived for `timeout` seconds.
+        """
+        reader = RingReader(name)
+        next_frame = 0
+        idle_since = time.perf_counter()
+        try:
+            while frames is None or next_frame < frames:
+                advanced = self._poll(reader, next_frame)
+                if advanced == next_frame:
+                    if time.perf_counter() - idle_since > timeout:
+                        break
+                    time.sleep(POLL_INTERVAL)
+                else:
+                    idle_since = time.perf_counter()
+                next_frame = advanced
+        finally:
+            reader.close()
+
+    async def run_async(self, name: str, queue: "asyncio.Queue", frames: Optional[int] = None,
+                        timeout: float = 1.0):
+        """
+        Same as run(), but yields to the event loop while waiting and puts every event
+        into `queue`; None is put last to signal the end.
+        """
+        previous = self.on_event
+        self.on_event = queue.put_nowait
+        reader = RingReader(name)
+        next_frame = 0
+        idle_since = time.perf_counter()
+        try:
+            while frames is None or next_frame < frames:
+                advanced = self._poll(reader, next_frame)
+                if advanced == next_frame:
+                    if time.perf_counter() - idle_since > timeout:
+                        break
+                    await asyncio.sleep(POLL_INTERVAL)
+                else:
+                    idle_since = time.perf_counter()
+                    await asyncio.sleep(0)
+                next_frame = advanced
+        finally:
+            reader.close()
+            self.on_event = previous
+            queue.put_nowait(None)
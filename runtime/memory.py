@@ -0,0 +1,132 @@
+import struct
+from typing import Callable, Dict, Union
+from core.constants import MemorySize, MemoryType
+
+Number = Union[int, float]
+
+# Bytes touched by a read of each size, starting at the address
+SIZE_BYTES = {
+    MemorySize.BIT0: 1, MemorySize.BIT1: 1, MemorySize.BIT2: 1, MemorySize.BIT3: 1,
+    MemorySize.BIT4: 1, MemorySize.BIT5: 1, MemorySize.BIT6: 1, MemorySize.BIT7: 1,
+    MemorySize.BIT8: 1, MemorySize.LOWER4: 1, MemorySize.UPPER4: 1, MemorySize.BITCOUNT: 1,
+    MemorySize.BIT16: 2, MemorySize.BIT16_BE: 2,
+    MemorySize.BIT24: 3, MemorySize.BIT24_BE: 3,
+    MemorySize.BIT32: 4, MemorySize.BIT32_BE: 4,
+    MemorySize.FLOAT: 4, MemorySize.FLOAT_BE: 4,
+    MemorySize.DOUBLE32: 4, MemorySize.DOUBLE32_BE: 4,
+    MemorySize.MBF32: 4, MemorySize.MBF32_LE: 4,
+}
+
+# Largest value an integer read can produce, used by invert()
+SIZE_MASK = {
+    MemorySize.BIT0: 1, MemorySize.BIT1: 1, MemorySize.BIT2: 1, MemorySize.BIT3: 1,
+    MemorySize.BIT4: 1, MemorySize.BIT5: 1, MemorySize.BIT6: 1, MemorySize.BIT7: 1,
+    MemorySize.LOWER4: 0xF, MemorySize.UPPER4: 0xF, MemorySize.BITCOUNT: 0xF,
+    MemorySize.BIT8: 0xFF,
+    MemorySize.BIT16: 0xFFFF, MemorySize.BIT16_BE: 0xFFFF,
+    MemorySize.BIT24: 0xFFFFFF, MemorySize.BIT24_BE: 0xFFFFFF,
+    MemorySize.BIT32: 0xFFFFFFFF, MemorySize.BIT32_BE: 0xFFFFFFFF,
+}
+
+BIT_INDEX = {
+    MemorySize.BIT0: 0, MemorySize.BIT1: 1, MemorySize.BIT2: 2, MemorySize.BIT3: 3,
+    MemorySize.BIT4: 4, MemorySize.BIT5: 5, MemorySize.BIT6: 6, MemorySize.BIT7: 7,
+}
+
+FLOAT_SIZES = (
+    MemorySize.FLOAT, MemorySize.FLOAT_BE,
+    MemorySize.DOUBLE32, MemorySize.DOUBLE32_BE,
+    MemorySize.MBF32, MemorySize.MBF32_LE,
+)
+
+_float_le = struct.Struct("<f")
+_double = struct.Struct("<d")
+
+
+def _u32_to_double32(raw: int) -> float:
+    # Double32 only carries the 32 most significant bits of a 64-bit double
+    return _double.unpack(struct.pack("<Q", raw << 32))[0]
+
+
+def _mbf_to_float(exponent: int, m1: int, m2: int, m3: int) -> float:
+    if exponent == 0:
+        return 0.0
+    mantissa = ((m1 | 0x80) << 16) | (m2 << 8) | m3
+    value = mantissa * 2.0 ** (exponent - 152)
+    return -value if m1 & 0x80 else value
+
+
+def _bytes(ram, address: int, count: int):
+    chunk = ram[address:address + count]
+    if len(chunk) < count:
+        chunk = bytes(chunk) + bytes(count - len(chunk))
+    return chunk
+
+
+def _reader_for(size: MemorySize) -> Callable:
+    if size == MemorySize.BIT8:
+        return lambda ram, a: ram[a] if 0 <= a < len(ram) else 0
+    if size in BIT_INDEX:
+        bit = BIT_INDEX[size]
+        return lambda ram, a: (ram[a] >> bit) & 1 if 0 <= a < len(ram) else 0
+    if size == MemorySize.LOWER4:
+        return lambda ram, a: ram[a] & 0x0F if 0 <= a < len(ram) else 0
+    if size == MemorySize.UPPER4:
+        return lambda ram, a: ram[a] >> 4 if 0 <= a < len(ram) else 0
+    if size == MemorySize.BITCOUNT:
+        return lambda ram, a: bin(ram[a]).count("1") if 0 <= a < len(ram) else 0
+
+    width = SIZE_BYTES[size]
+    if size in (MemorySize.BIT16, MemorySize.BIT24, MemorySize.BIT32):
+        return lambda ram, a: int.from_bytes(_bytes(ram, a, width), "little") if 0 <= a < len(ram) else 0
+    if size in (MemorySize.BIT16_BE, MemorySize.BIT24_BE, MemorySize.BIT32_BE):
+        return lambda ram, a: int.from_bytes(_bytes(ram, a, width), "big") if 0 <= a < len(ram) else 0
+
+    if size == MemorySize.FLOAT:
+        convert = lambda raw: _float_le.unpack(bytes(raw))[0]
+    elif size == MemorySize.FLOAT_BE:
+        convert = lambda raw: _float_le.unpack(bytes(raw)[::-1])[0]
+    elif size == MemorySize.DOUBLE32:
+        convert = lambda raw: _u32_to_double32(int.from_bytes(raw, "little"))
+    elif size == MemorySize.DOUBLE32_BE:
+        convert = lambda raw: _u32_to_double32(int.from_bytes(raw, "big"))
+    elif size == MemorySize.MBF32:
+        convert = lambda raw: _mbf_to_float(raw[0], raw[1], raw[2], raw[3])
+    elif size == MemorySize.MBF32_LE:
+        convert = lambda raw: _mbf_to_float(raw[3], raw[2], raw[1], raw[0])
+    else:
+        raise ValueError(f"Unsupported memory size: {size}")
+    return lambda ram, a: convert(_bytes(ram, a, 4)) if 0 <= a < len(ram) else 0.0
+
+
+# One specialized reader per size, called as reader(ram, address)
+READERS: Dict[MemorySize, Callable] = {size: _reader_for(size) for size in MemorySize}
+
+
+def read(ram, address: int, size: MemorySize) -> Number:
+    """
+    Reads a value of the given size from a RAM snapshot.
+    Addresses outside the snapshot read as 0, like the emulator does.
+    """
+    return READERS[size](ram, address)
+
+
+def from_bcd(value: int) -> int:
+    result = 0
+    scale = 1
+    while value:
+        result += (value & 0x0F) * scale
+        value >>= 4
+        scale *= 10
+    return result
+
+
+def transform(value: Number, size: MemorySize, mtype: MemoryType) -> Number:
+    """
+    Applies the bcd/invert modifiers to a value that was already read.
+    """
+    if mtype == MemoryType.BCD and isinstance(value, int):
+        return from_bcd(value)
+    if mtype == MemoryType.INVERT and isinstance(value, int):
+        return value ^ SIZE_MASK.get(size, 0xFFFFFFFF)
+    return value
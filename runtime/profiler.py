@@ -0,0 +1,180 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.achievement import Achievement
+from models.set import AchievementSet
+from .evaluator import AchievementEvaluator
+
+
+def memaddr_positions(achievement: Achievement) -> List[List[Tuple[int, int]]]:
+    """
+    (start, end) character positions of every condition in the rendered memaddr
+    (the Achievement._render_group strings joined by "S"), group by group. Measured on
+    the same render() the memaddr is made of, not on the unwrapped conditions.
+    """
+    positions = []
+    offset = 0
+    for group in [achievement.core + achievement.conditions] + achievement.alts:
+        group_positions = []
+        for cond in group:
+            end = offset + len(cond.render())
+            group_positions.append((offset, end))
+            offset = end + 1  # "_" between conditions, "S" between groups
+        if not group:
+            offset += 1
+        positions.append(group_positions)
+    return positions
+
+
+class ProfilingEvaluator(AchievementEvaluator):
+    """
+    AchievementEvaluator that counts, for every condition, how often it was evaluated
+    and how often its comparison was true, how often each group was true, and the
+    time spent per frame.
+    """
+    def __init__(self, achievement: Achievement):
+        super().__init__(achievement)
+        self.evaluated = [0] * len(self.hits)
+        self.true: List[Optional[int]] = [None] * len(self.hits)
+        self.group_true = [0] * (1 + len(self.alts))
+        self.frames = 0
+        self.seconds = 0.0
+        self.core = self._instrument(self.core)
+        self.alts = [self._instrument(alt) for alt in self.alts]
+
+    def _instrument(self, group):
+        evaluated, true = self.evaluated, self.true
+
+        def counted_left(left, index):
+            def getter(ram, add_address):
+                evaluated[index] += 1
+                return left(ram, add_address)
+            return getter
+
+        def counted_comparison(comparison, index):
+            def compare(a, b):
+                result = comparison(a, b)
+                if result:
+                    true[index] += 1
+                return result
+            return compare
+
+        ops = []
+        for flag, left, right, comparison, required, pause, index in group:
+            if comparison is not None:
+                true[index] = 0
+                comparison = counted_comparison(comparison, index)
+            ops.append((flag, counted_left(left, index), right, comparison, required, pause, index))
+        return tuple(ops)
+
+    def step(self, ram) -> bool:
+        start = time.perf_counter()
+        result = super().step(ram)
+        self.seconds += time.perf_counter() - start
+        self.frames += 1
+        for position, value in enumerate(self.groups):
+            if value:
+                self.group_true[position] += 1
+        return result
+
+
+class ProfileReport:
+    """
+    Per-condition evaluation/true counts, per-group match counts and per-achievement cost,
+    accumulated over any number of traces. `true` is None for conditions without a
+    comparison (AddSource, AddAddress, ...).
+    """
+    def __init__(self, achievement_set: AchievementSet):
+        self.achievement_set = achievement_set
+        self.evaluators: Dict[int, ProfilingEvaluator] = {}
+        self.traces = 0
+
+    def add_trace(self, snapshots: Iterable):
+        """
+        Profiles every achievement over one trace (each starts from a fresh state).
+        """
+        for ach in self.achievement_set.achievements:
+            evaluator = self.evaluators.get(ach.id)
+            if evaluator is None:
+                evaluator = self.evaluators[ach.id] = ProfilingEvaluator(ach)
+            else:
+                evaluator.reset()
+            evaluator.run(snapshots)
+        self.traces += 1
+
+    def to_dict(self) -> dict:
+        achievements = []
+        for ach in self.achievement_set.achievements:
+            evaluator = self.evaluators.get(ach.id)
+            if evaluator is None:
+                continue
+            positions = memaddr_positions(ach)
+            groups = []
+            index = 0
+            for position, group_positions in enumerate(positions):
+                conditions = []
+                for start, end in group_positions:
+                    conditions.append({
+                        "memaddr": evaluator.conditions[index].render(),
+                        "position": [start, end],
+                        "evaluated": evaluator.evaluated[index],
+                        "true": evaluator.true[index],
+                    })
+                    index += 1
+                groups.append({
+                    "group": "core" if position == 0 else f"alt{position}",
+                    "true": evaluator.group_true[position],
+                    "conditions": conditions,
+                })
+            frames = evaluator.frames
+            achievements.append({
+                "id": ach.id,
+                "title": ach.title,
+                "frames": frames,
+                "us_per_frame": evaluator.seconds / frames * 1e6 if frames else 0.0,
+                "groups": groups,
+            })
+        return {"traces": self.traces, "achievements": achievements}
+
+    def dead_alts(self) -> List[Tuple[int, str]]:
+        """
+        (achievement id, "altN") for every alt group that was never true.
+        """
+        return [
+            (ach["id"], group["group"])
+            for ach in self.to_dict()["achievements"]
+            for group in ach["groups"][1:]
+            if group["true"] == 0
+        ]
+
+    def render(self, top: Optional[int] = None) -> str:
+        """
+        Text report, most expensive achievements first. Every condition line starts with
+        its [start:end] position in the rendered memaddr.
+        """
+        data = sorted(self.to_dict()["achievements"], key=lambda a: -a["us_per_frame"])
+        lines = []
+        for ach in data[:top]:
+            lines.append(f"{ach['id']} '{ach['title']}': {ach['us_per_frame']:.1f} us/frame over {ach['frames']} frames")
+            for group in ach["groups"]:
+                never = "  (never true)" if group["true"] == 0 else ""
+                lines.append(f"  {group['group']}: true on {group['true']} frames{never}")
+                for cond in group["conditions"]:
+                    start, end = cond["position"]
+                    if not cond["evaluated"]:
+                        rate = "never evaluated"
+                    elif cond["true"] is None:
+                        rate = "value only"
+                    else:
+                        rate = f"true {cond['true'] / cond['evaluated']:.1%}"
+                    lines.append(f"    [{start}:{end}] {cond['memaddr']:<28} evaluated {cond['evaluated']:>9}  {rate}")
+        return "\n".join(lines)
+
+
+def profile_set(achievement_set: AchievementSet, traces: Iterable[Iterable]) -> ProfileReport:
+    """
+    Profiles a set over a corpus of traces (each one a Trace or a list of snapshots).
+    """
+    report = ProfileReport(achievement_set)
+    for snapshots in traces:
+        report.add_trace(snapshots)
+    return report
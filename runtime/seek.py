@@ -0,0 +1,177 @@
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+from models.achievement import Achievement
+from .evaluator import AchievementEvaluator
+
+
+def _frames(snapshots, start: int, stop: Optional[int]) -> Iterator:
+    if hasattr(snapshots, "iter_frames"):
+        return snapshots.iter_frames(start, stop)
+    if hasattr(snapshots, "__getitem__"):
+        stop = len(snapshots) if stop is None else min(stop, len(snapshots))
+        return (snapshots[k] for k in range(start, stop))
+    return islice(snapshots, start, stop)
+
+
+class SeekableEvaluator:
+    """
+    Evaluates an achievement over a random-access sequence of snapshots (a Trace or a list)
+    and keeps a checkpoint of the evaluator state every `interval` frames, so seeking to
+    any frame only replays from the nearest checkpoint before it.
+
+    `checkpoints[k]` is the state right before frame k is evaluated. Along with them,
+    `summaries[k]` records which groups were true at least once in the interval starting
+    at k, which lets first_true() skip whole intervals.
+    """
+    def __init__(self, achievement: Achievement, snapshots, interval: int = 10000):
+        if interval < 1:
+            raise ValueError("interval must be at least 1")
+        self.achievement = achievement
+        self.snapshots = snapshots
+        self.interval = interval
+        self.evaluator = AchievementEvaluator(achievement)
+        self.frame = -1
+        self.result = False
+        self.checkpoints: Dict[int, dict] = {0: self.evaluator.get_state()}
+        self.summaries: Dict[int, List[bool]] = {}
+        self._summary: List[bool] = []
+
+    @property
+    def groups(self) -> List[bool]:
+        """
+        Result of each group (core first, then alts) on the current frame.
+        """
+        return self.evaluator.groups
+
+    def __len__(self) -> int:
+        return len(self.snapshots)
+
+    # --- stepping ---
+
+    def _restore(self, frame: int):
+        state = self.checkpoints[frame]
+        self.evaluator.set_state(state)
+        self.frame = frame - 1
+        self.result = False
+        self._summary = []
+
+    def _advance(self, ram) -> bool:
+        frame = self.frame + 1
+        if frame % self.interval == 0:
+            if frame not in self.checkpoints:
+                self.checkpoints[frame] = self.evaluator.get_state()
+            self._summary = [False] * (1 + len(self.evaluator.alts))
+
+        self.result = self.evaluator.step(ram)
+        self.frame = frame
+        summary = self._summary
+        for position, value in enumerate(self.evaluator.groups):
+            if value:
+                summary[position] = True
+        if (frame + 1) % self.interval == 0:
+            self.summaries[frame + 1 - self.interval] = summary
+        return self.result
+
+    def _replay(self, stop: int):
+        # evaluates frames up to, but not including, `stop`
+        for ram in _frames(self.snapshots, self.frame + 1, stop):
+            self._advance(ram)
+
+    def seek(self, frame: int) -> bool:
+        """
+        Evaluates up to and including `frame`, starting from the nearest checkpoint,
+        and returns whether the logic is true on it.
+        """
+        if frame < 0:
+            frame += len(self)
+        if not 0 <= frame < len(self):
+            raise IndexError(f"Frame {frame} out of range ({len(self)} frames)")
+        if frame == self.frame:
+            return self.result
+        checkpoint = max(k for k in self.checkpoints if k <= frame)
+        if frame <= self.frame or checkpoint > self.frame + 1:
+            self._restore(checkpoint)
+        self._replay(frame + 1)
+        return self.result
+
+    def index(self):
+        """
+        Runs through every frame once, creating all the checkpoints and summaries.
+        """
+        self._restore(max(self.checkpoints))
+        self._replay(len(self))
+
+    # --- searching ---
+
+    def first_true(self, group: Optional[int] = None, start: int = 0) -> Optional[int]:
+        """
+        First frame at or after `start` where the logic (or only the given group,
+        0 for core, 1+ for alts) is true. Intervals whose summary shows the group
+        was never true are skipped without replaying them.
+        """
+        check = (lambda: self.result) if group is None else (lambda: self.evaluator.groups[group])
+        # the whole logic can only be true where the core group is
+        position = 0 if group is None else group
+        frame = start
+        while frame < len(self):
+            interval_start = frame - frame % self.interval
+            stop = min(interval_start + self.interval, len(self))
+            summary = self.summaries.get(interval_start)
+            if summary is not None and not summary[position]:
+                frame = stop
+                continue
+            self.seek(frame)
+            if check():
+                return frame
+            for ram in _frames(self.snapshots, frame + 1, stop):
+                self._advance(ram)
+                if check():
+                    return self.frame
+            frame = stop
+        return None
+
+    def bisect(self, predicate: Callable[["SeekableEvaluator"], bool], lo: int = 0,
+               hi: Optional[int] = None) -> Optional[int]:
+        """
+        First frame in [lo, hi) where predicate(self) holds after evaluating it, assuming
+        that once it holds it keeps holding (like a hit count reaching its target without
+        a reset in between). Each probe is a seek, so it costs at most one interval.
+        """
+        hi = len(self) if hi is None else hi
+        found = None
+        while lo < hi:
+            middle = (lo + hi) // 2
+            self.seek(middle)
+            if predicate(self):
+                found = middle
+                hi = middle
+            else:
+                lo = middle + 1
+        return found
+
+    # --- checkpoint files ---
+
+    def save(self, path: Union[str, Path]):
+        """
+        Writes the checkpoints and summaries to a JSON file, so a later session can seek
+        straight away.
+        """
+        data = {
+            "achievement": self.achievement.id,
+            "interval": self.interval,
+            "checkpoints": {str(k): v for k, v in self.checkpoints.items()},
+            "summaries": {str(k): v for k, v in self.summaries.items()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def load(self, path: Union[str, Path]):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data["interval"] != self.interval:
+            raise ValueError(f"Checkpoints were saved every {data['interval']} frames, not {self.interval}")
+        self.checkpoints = {int(k): v for k, v in data["checkpoints"].items()}
+        self.summaries = {int(k): v for k, v in data["summaries"].items()}
+        self._restore(0)
@@ -0,0 +1,276 @@
+import mmap
+import struct
+import numpy as np
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+# File layout (all integers little endian):
+#   header   MAGIC, version, ram_size, frame_count, keyframe_interval, index_offset
+#   records  one per frame, either a full snapshot or a list of changed byte runs
+#   index    frame_count u64 offsets (bit 63 marks full snapshots)
+MAGIC = b"PYCTRACE"
+VERSION = 1
+HEADER = struct.Struct("<8sHxxQQIxxxxQ")
+RUN_HEADER = np.dtype([("offset", "<u4"), ("length", "<u4")])
+FULL_FRAME = np.uint64(1 << 63)
+
+# Changed bytes closer than this are stored as one run, saving a run header
+RUN_GAP = 8
+
+
+def _runs(previous: np.ndarray, current: np.ndarray):
+    changed = np.flatnonzero(previous != current)
+    if changed.size == 0:
+        return np.zeros(0, dtype=RUN_HEADER)
+    breaks = np.flatnonzero(np.diff(changed) > RUN_GAP)
+    starts = changed[np.concatenate(([0], breaks + 1))]
+    ends = changed[np.concatenate((breaks, [changed.size - 1]))] + 1
+    runs = np.empty(starts.size, dtype=RUN_HEADER)
+    runs["offset"] = starts
+    runs["length"] = ends - starts
+    return runs
+
+
+class TraceWriter:
+    """
+    Writes RAM snapshots to a trace file: one full keyframe every `keyframe_interval`
+    frames, and only the changed byte runs for the frames in between.
+    """
+    def __init__(self, path: Union[str, Path], ram_size: int, keyframe_interval: int = 600):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.path = Path(path)
+        self.ram_size = ram_size
+        self.keyframe_interval = keyframe_interval
+        self.frame_count = 0
+        self._offsets = []
+        self._previous = np.zeros(ram_size, dtype=np.uint8)
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, ram_size, 0, keyframe_interval, 0))
+
+    def append(self, ram):
+        current = np.frombuffer(ram, dtype=np.uint8)
+        if current.size != self.ram_size:
+            raise ValueError(f"Snapshot has {current.size} bytes, expected {self.ram_size}")
+
+        offset = self._file.tell()
+        runs = None
+        if self.frame_count % self.keyframe_interval:
+            runs = _runs(self._previous, current)
+            # a delta bigger than the snapshot itself is stored as a full frame
+            if runs.size * RUN_HEADER.itemsize + int(runs["length"].sum()) >= self.ram_size:
+                runs = None
+
+        if runs is None:
+            self._file.write(current.tobytes())
+            self._offsets.append(offset | (1 << 63))
+        else:
+            self._file.write(struct.pack("<I", runs.size))
+            self._file.write(runs.tobytes())
+            for start, length in runs.tolist():
+                self._file.write(current[start:start + length].tobytes())
+            self._offsets.append(offset)
+
+        self._previous = current.copy()
+        self.frame_count += 1
+
+    def extend(self, snapshots: Iterable):
+        for ram in snapshots:
+            self.append(ram)
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(np.array(self._offsets, dtype="<u8").tobytes())
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.ram_size, self.frame_count,
+                                     self.keyframe_interval, index_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_trace(path: Union[str, Path], snapshots: Iterable, ram_size: Optional[int] = None,
+                keyframe_interval: int = 600) -> Path:
+    """
+    Writes a sequence of RAM snapshots to a trace file.
+    """
+    snapshots = iter(snapshots)
+    first = next(snapshots, None)
+    if first is None:
+        raise ValueError("Cannot write an empty trace")
+    if ram_size is None:
+        ram_size = len(first)
+    with TraceWriter(path, ram_size, keyframe_interval) as writer:
+        writer.append(first)
+        writer.extend(snapshots)
+    return Path(path)
+
+
+class Trace:
+    """
+    Memory-mapped reader for trace files.
+    Opening only reads the header and maps the offset index, so it is instant
+    regardless of the file size; frames are decoded on demand.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, ram_size, frame_count, interval, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a PyCheevos trace file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported trace version {version}")
+        if index_offset == 0:
+            raise ValueError(f"{self.path} was not closed properly (missing index)")
+
+        self.ram_size = ram_size
+        self.frame_count = frame_count
+        self.keyframe_interval = interval
+        self._data = np.frombuffer(self._map, dtype=np.uint8)
+        self._index = np.frombuffer(self._map, dtype="<u8", count=frame_count, offset=index_offset)
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def _check(self, frame: int) -> int:
+        if frame < 0:
+            frame += self.frame_count
+        if not 0 <= frame < self.frame_count:
+            raise IndexError(f"Frame {frame} out of range (trace has {self.frame_count} frames)")
+        return frame
+
+    def is_full(self, frame: int) -> bool:
+        return bool(self._index[frame] & FULL_FRAME)
+
+    def _full(self, frame: int) -> np.ndarray:
+        offset = int(self._index[frame] & ~FULL_FRAME)
+        return self._data[offset:offset + self.ram_size]
+
+    def _apply(self, frame: int, buffer: np.ndarray):
+        if self.is_full(frame):
+            buffer[:] = self._full(frame)
+            return
+        offset = int(self._index[frame])
+        count = struct.unpack_from("<I", self._map, offset)[0]
+        runs = np.frombuffer(self._map, dtype=RUN_HEADER, count=count, offset=offset + 4)
+        position = offset + 4 + count * RUN_HEADER.itemsize
+        for start, length in runs.tolist():
+            buffer[start:start + length] = self._data[position:position + length]
+            position += length
+
+    def _base(self, frame: int) -> int:
+        # nearest full frame at or before `frame`; every keyframe is a full frame
+        base = frame - frame % self.keyframe_interval
+        for candidate in range(frame, base, -1):
+            if self.is_full(candidate):
+                return candidate
+        return base
+
+    def frame(self, frame: int) -> np.ndarray:
+        """
+        RAM at the given frame. Full frames are returned as a read-only view into
+        the mapped file (zero-copy); other frames are rebuilt from the nearest keyframe.
+        """
+        frame = self._check(frame)
+        if self.is_full(frame):
+            return self._full(frame)
+        base = self._base(frame)
+        buffer = self._full(base).copy()
+        for k in range(base + 1, frame + 1):
+            self._apply(k, buffer)
+        return buffer
+
+    def window(self, start: int, stop: int) -> np.ndarray:
+        """
+        Frames [start, stop) as a (frames, ram_size) matrix, ready for VectorizedEvaluator.
+        """
+        start = max(0, start)
+        stop = min(stop, self.frame_count)
+        if stop <= start:
+            return np.zeros((0, self.ram_size), dtype=np.uint8)
+
+        result = np.empty((stop - start, self.ram_size), dtype=np.uint8)
+        result[0] = self.frame(start)
+        for k in range(start + 1, stop):
+            if self.is_full(k):
+                result[k - start] = self._full(k)
+            else:
+                result[k - start] = result[k - start - 1]
+                self._apply(k, result[k - start])
+        return result
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.frame_count)
+            if step != 1:
+                raise ValueError("Trace slices do not support steps")
+            return self.window(start, stop)
+        return self.frame(key)
+
+    def __iter__(self) -> Iterator[memoryview]:
+        """
+        Yields every frame in order. The same buffer is updated in place and
+        yielded each time, so copy it if a frame must be kept.
+        """
+        return self.iter_frames()
+
+    def iter_frames(self, start: int = 0, stop: Optional[int] = None) -> Iterator[memoryview]:
+        """
+        Like iterating the trace, but only over frames [start, stop).
+        """
+        stop = self.frame_count if stop is None else min(stop, self.frame_count)
+        if start >= stop:
+            return
+        buffer = self.frame(start).copy() if start else np.zeros(self.ram_size, dtype=np.uint8)
+        view = buffer.data
+        if start:
+            yield view
+            start += 1
+        for k in range(start, stop):
+            self._apply(k, buffer)
+            yield view
+
+    def iter_changes(self) -> Iterator[Tuple[memoryview, List[Tuple[int, int]]]]:
+        """
+        Like iterating the trace, but also yields the (start, length) byte runs that
+        changed on each frame, which change-driven evaluators use to skip work.
+        """
+        buffer = np.zeros(self.ram_size, dtype=np.uint8)
+        view = buffer.data
+        for k in range(self.frame_count):
+            if self.is_full(k):
+                full = self._full(k)
+                runs = _runs(buffer, full).tolist()
+                buffer[:] = full
+            else:
+                offset = int(self._index[k])
+                count = struct.unpack_from("<I", self._map, offset)[0]
+                runs = np.frombuffer(self._map, dtype=RUN_HEADER, count=count, offset=offset + 4).tolist()
+                self._apply(k, buffer)
+            yield view, runs
+
+    def close(self):
+        """
+        Releases the file. Full frames returned by frame() are views into the mapping:
+        if one is still alive, the mapping is freed with the last of them instead.
+        """
+        self._data = self._index = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
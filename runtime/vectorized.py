@@ -0,0 +1,379 @@
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Sequence
+from core.condition import Condition
+from core.constants import Flag, MemorySize, MemoryType
+from core.value import MemoryValue, ConstantValue
+from models.achievement import Achievement
+from models.set import AchievementSet
+from .evaluator import COMPARISONS, MemorySlots, TriggerEvaluator, is_stateless, unwrap
+from .memory import BIT_INDEX, SIZE_BYTES, SIZE_MASK
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _memory_values(groups) -> Iterator[MemoryValue]:
+    for group in groups:
+        for cond in group:
+            cond = unwrap(cond)
+            for value in (cond.lvalue, cond.rvalue):
+                if isinstance(value, MemoryValue) and value.mtype != MemoryType.RECALL:
+                    yield value
+
+
+def _vector_div(a, b):
+    if a.dtype.kind == "f" or b.dtype.kind == "f":
+        return np.where(b == 0, 0.0, a / np.where(b == 0, 1, b))
+    return np.where(b == 0, 0, a // np.where(b == 0, 1, b))
+
+
+def _vector_mod(a, b):
+    return np.where(b == 0, 0, a % np.where(b == 0, 1, b))
+
+
+VECTOR_MODIFIERS = {
+    "*": lambda a, b: a * b if a.dtype.kind == "f" or b.dtype.kind == "f" else (a * b) & 0xFFFFFFFF,
+    "/": _vector_div,
+    "%": _vector_mod,
+    "&": lambda a, b: a.astype(np.int64) & b.astype(np.int64),
+    "^": lambda a, b: a.astype(np.int64) ^ b.astype(np.int64),
+}
+
+
+class ColumnSlots(MemorySlots):
+    """
+    Memory slots fed from precomputed per-address columns instead of reading
+    every snapshot, used when stateful groups are stepped over a trace matrix.
+    """
+    def __init__(self, vectorized: "VectorizedEvaluator"):
+        super().__init__()
+        self.vectorized = vectorized
+        self.columns: list = []
+
+    def prepare(self):
+        self.columns = []
+        for address, size in self.keys:
+            self.columns.append((
+                self.vectorized.read(address, size).tolist(),
+                self.vectorized.delta(address, size).tolist(),
+                self.vectorized.prior(address, size).tolist(),
+            ))
+
+    def update(self, ram):
+        self.frame += 1
+        frame = self.frame
+        for i, (current, delta, prior) in enumerate(self.columns):
+            self.current[i] = current[frame]
+            self.delta[i] = delta[frame]
+            self.prior[i] = prior[frame]
+
+
+class VectorizedEvaluator:
+    """
+    Evaluates logic over a whole trace at once, given as a (frames, ram_size) uint8 matrix.
+
+    Hitless groups are computed as boolean arrays over all frames; only groups that carry
+    state between frames (hit counts, AddAddress, AddHits/SubHits) are stepped frame by frame.
+    """
+    def __init__(self, trace):
+        self.trace = np.asarray(trace, dtype=np.uint8)
+        if self.trace.ndim != 2:
+            raise ValueError("The trace must be a (frames, ram_size) matrix")
+        self.frames, self.ram_size = self.trace.shape
+        self._columns: Dict[tuple, np.ndarray] = {}
+        self._bytes: Dict[int, np.ndarray] = {}
+
+    # --- memory columns ---
+
+    def _byte(self, address: int) -> np.ndarray:
+        if address in self._bytes:
+            return self._bytes[address]
+        if 0 <= address < self.ram_size:
+            return self.trace[:, address].astype(np.int64)
+        return np.zeros(self.frames, dtype=np.int64)
+
+    def prefetch(self, values: Iterable[MemoryValue]):
+        """
+        Gathers every byte the given reads touch in a single pass over the trace,
+        which is much cheaper than one strided pass per address on wide snapshots.
+        """
+        addresses = set()
+        for value in values:
+            width = SIZE_BYTES.get(value.size, 1)
+            addresses.update(a for a in range(value.address, value.address + width)
+                             if 0 <= a < self.ram_size and a not in self._bytes)
+        if not addresses:
+            return
+        addresses = sorted(addresses)
+        block = np.take(self.trace, addresses, axis=1)
+        for i, address in enumerate(addresses):
+            self._bytes[address] = block[:, i].astype(np.int64)
+
+    def _unsigned(self, address: int, count: int, big_endian: bool) -> np.ndarray:
+        value = np.zeros(self.frames, dtype=np.int64)
+        for i in range(count):
+            shift = 8 * (count - 1 - i) if big_endian else 8 * i
+            value |= self._byte(address + i) << shift
+        return value
+
+    def read(self, address: int, size: MemorySize) -> np.ndarray:
+        """
+        Values of a memory read for every frame of the trace.
+        """
+        key = ("mem", address, size)
+        if key in self._columns:
+            return self._columns[key]
+
+        if not 0 <= address < self.ram_size:
+            value = np.zeros(self.frames, dtype=np.float64 if size.value.startswith("f") else np.int64)
+        elif size == MemorySize.BIT8:
+            value = self._byte(address)
+        elif size in BIT_INDEX:
+            value = (self._byte(address) >> BIT_INDEX[size]) & 1
+        elif size == MemorySize.LOWER4:
+            value = self._byte(address) & 0x0F
+        elif size == MemorySize.UPPER4:
+            value = self._byte(address) >> 4
+        elif size == MemorySize.BITCOUNT:
+            value = _POPCOUNT[self._byte(address)]
+        elif size in (MemorySize.BIT16, MemorySize.BIT24, MemorySize.BIT32):
+            value = self._unsigned(address, SIZE_BYTES[size], False)
+        elif size in (MemorySize.BIT16_BE, MemorySize.BIT24_BE, MemorySize.BIT32_BE):
+            value = self._unsigned(address, SIZE_BYTES[size], True)
+        elif size in (MemorySize.FLOAT, MemorySize.FLOAT_BE):
+            raw = self._unsigned(address, 4, size == MemorySize.FLOAT_BE).astype(np.uint32)
+            value = raw.view(np.float32).astype(np.float64)
+        elif size in (MemorySize.DOUBLE32, MemorySize.DOUBLE32_BE):
+            raw = self._unsigned(address, 4, size == MemorySize.DOUBLE32_BE).astype(np.uint64)
+            value = (raw << np.uint64(32)).view(np.float64)
+        elif size in (MemorySize.MBF32, MemorySize.MBF32_LE):
+            order = [0, 1, 2, 3] if size == MemorySize.MBF32 else [3, 2, 1, 0]
+            exponent, m1, m2, m3 = (self._byte(address + i) for i in order)
+            mantissa = (((m1 | 0x80) << 16) | (m2 << 8) | m3).astype(np.float64)
+            value = mantissa * np.exp2(exponent - 152.0)
+            value = np.where(m1 & 0x80, -value, value)
+            value = np.where(exponent == 0, 0.0, value)
+        else:
+            raise ValueError(f"Unsupported memory size: {size}")
+
+        self._columns[key] = value
+        return value
+
+    def delta(self, address: int, size: MemorySize) -> np.ndarray:
+        key = ("delta", address, size)
+        if key not in self._columns:
+            current = self.read(address, size)
+            delta = np.zeros_like(current)
+            delta[1:] = current[:-1]
+            self._columns[key] = delta
+        return self._columns[key]
+
+    def prior(self, address: int, size: MemorySize) -> np.ndarray:
+        key = ("prior", address, size)
+        if key not in self._columns:
+            current = self.read(address, size)
+            delta = self.delta(address, size)
+            changed = current != delta
+            # index of the latest change at or before each frame
+            last = np.maximum.accumulate(np.where(changed, np.arange(self.frames), -1))
+            self._columns[key] = np.where(last >= 0, delta[np.maximum(last, 0)], 0)
+        return self._columns[key]
+
+    def _operand(self, value, recall):
+        if isinstance(value, ConstantValue):
+            value = value.value
+        if isinstance(value, (int, float)):
+            return np.asarray(value, dtype=np.float64 if isinstance(value, float) else np.int64)
+        if not isinstance(value, MemoryValue):
+            raise TypeError(f"Cannot evaluate operand of type {type(value).__name__}")
+        if value.mtype == MemoryType.RECALL:
+            return recall
+        if value.mtype == MemoryType.DELTA:
+            return self.delta(value.address, value.size)
+        if value.mtype == MemoryType.PRIOR:
+            return self.prior(value.address, value.size)
+        current = self.read(value.address, value.size)
+        if value.mtype == MemoryType.BCD:
+            result = np.zeros_like(current)
+            digits = current.copy()
+            scale = 1
+            while digits.any():
+                result += (digits & 0x0F) * scale
+                digits >>= 4
+                scale *= 10
+            return result
+        if value.mtype == MemoryType.INVERT:
+            return current ^ SIZE_MASK.get(value.size, 0xFFFFFFFF)
+        return current
+
+    # --- logic ---
+
+    def _group_pass(self, conditions: List[Condition], pause_pass: bool, state: dict):
+        frames = self.frames
+        set_valid = np.ones(frames, dtype=bool)
+        paused = np.zeros(frames, dtype=bool)
+        reset = np.zeros(frames, dtype=bool)
+        true = np.ones(frames, dtype=bool)
+        false = np.zeros(frames, dtype=bool)
+        add_value = 0
+        and_next = true
+        or_next = false
+        reset_next = false
+
+        for cond, pause in conditions:
+            if pause != pause_pass:
+                continue
+            value = self._operand(cond.lvalue, state["recall"])
+            right = None
+            if cond.rvalue is not None:
+                right = self._operand(cond.rvalue, state["recall"])
+                if cond.cmp not in COMPARISONS:
+                    value = VECTOR_MODIFIERS[cond.cmp](value, right)
+                    right = None
+
+            if cond.flag == Flag.ADD_SOURCE:
+                add_value = add_value + value
+                continue
+            if cond.flag == Flag.SUB_SOURCE:
+                add_value = add_value - value
+                continue
+            if cond.flag == Flag.REMEMBER:
+                state["recall"] = value + add_value
+                add_value = 0
+                continue
+
+            if right is None:
+                is_true = true
+            else:
+                is_true = COMPARISONS[cond.cmp](value + add_value, right)
+            add_value = 0
+
+            valid = ((is_true & and_next) | or_next) & ~reset_next
+            and_next = true
+            or_next = false
+
+            # ResetNextIf carries through an AndNext/OrNext chain to the condition that closes it
+            if cond.flag == Flag.RESET_NEXT_IF:
+                reset_next = valid
+                continue
+            if cond.flag == Flag.AND_NEXT:
+                and_next = valid
+                continue
+            if cond.flag == Flag.OR_NEXT:
+                or_next = valid
+                continue
+
+            reset_next = false
+            if cond.flag == Flag.PAUSE_IF:
+                paused |= valid
+            elif cond.flag == Flag.RESET_IF:
+                reset |= valid
+                set_valid &= ~valid
+            else:
+                set_valid &= valid
+
+        return set_valid, paused, reset
+
+    def group(self, conditions: Sequence[Condition]):
+        """
+        Evaluates a stateless group for every frame.
+        Returns (true, reset) boolean arrays; reset marks frames where a ResetIf fired.
+        """
+        conditions = [unwrap(c) for c in conditions]
+        if not conditions:
+            return np.ones(self.frames, dtype=bool), np.zeros(self.frames, dtype=bool)
+
+        pause = [False] * len(conditions)
+        start = 0
+        for i, cond in enumerate(conditions):
+            if cond.flag == Flag.PAUSE_IF:
+                for j in range(start, i + 1):
+                    pause[j] = True
+            if cond.flag not in (Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.AND_NEXT, Flag.OR_NEXT,
+                                 Flag.RESET_NEXT_IF, Flag.REMEMBER):
+                start = i + 1
+
+        tagged = list(zip(conditions, pause))
+        state = {"recall": np.zeros(self.frames, dtype=np.int64)}
+        paused = np.zeros(self.frames, dtype=bool)
+        if any(pause):
+            _, paused, _ = self._group_pass(tagged, True, state)
+        valid, _, reset = self._group_pass(tagged, False, state)
+        return valid & ~paused, reset & ~paused
+
+    def evaluate(self, core: Sequence[Condition], alts: Sequence[Sequence[Condition]] = ()) -> np.ndarray:
+        """
+        Returns the frames where the logic is true.
+        """
+        groups = [list(core)] + [list(alt) for alt in alts]
+        self.prefetch(_memory_values(groups))
+        stateless = [is_stateless(group) for group in groups]
+        arrays = [self.group(group) if stateless[i] else None for i, group in enumerate(groups)]
+
+        reset = np.zeros(self.frames, dtype=bool)
+        for result in arrays:
+            if result is not None:
+                reset |= result[1]
+
+        if all(stateless):
+            result = arrays[0][0].copy()
+            if len(groups) > 1:
+                result &= np.logical_or.reduce([valid for valid, _ in arrays[1:]])
+            return np.flatnonzero(result & ~reset)
+
+        return self._step_stateful(groups, stateless, arrays, reset)
+
+    def _step_stateful(self, groups, stateless, arrays, reset) -> np.ndarray:
+        slots = ColumnSlots(self)
+        stepped = [[] if stateless[i] else group for i, group in enumerate(groups)]
+        evaluator = TriggerEvaluator(stepped[0], stepped[1:], slots)
+        slots.prepare()
+
+        valid = [array[0].tolist() if array is not None else None for array in arrays]
+        reset = reset.tolist()
+        compiled = [evaluator.core] + evaluator.alts
+        needs_ram = bool(slots.indirect)
+        trace = self.trace
+        triggered = []
+
+        for frame in range(self.frames):
+            slots.update(None)
+            ram = trace[frame].data if needs_ram else None
+            evaluator.was_reset = False
+            evaluator.measured = None
+
+            results = []
+            for position, group in enumerate(compiled):
+                if stateless[position]:
+                    results.append(valid[position][frame])
+                else:
+                    evaluator.recall = 0
+                    results.append(evaluator._test_group(position, group, ram))
+
+            result = results[0] and (len(results) == 1 or any(results[1:]))
+            if evaluator.was_reset or reset[frame]:
+                evaluator.reset_hits()
+                result = False
+            if result:
+                triggered.append(frame)
+
+        return np.array(triggered, dtype=np.int64)
+
+    def evaluate_achievement(self, achievement: Achievement) -> np.ndarray:
+        return self.evaluate(achievement.core + achievement.conditions, achievement.alts)
+
+    def evaluate_set(self, achievement_set: AchievementSet) -> Dict[int, np.ndarray]:
+        """
+        Trigger frames of every achievement in the set, keyed by achievement ID.
+        """
+        self.prefetch(_memory_values(
+            [ach.core + ach.conditions for ach in achievement_set.achievements]
+            + [alt for ach in achievement_set.achievements for alt in ach.alts]
+        ))
+        return {ach.id: self.evaluate_achievement(ach) for ach in achievement_set.achievements}
+
+
+def evaluate_trace(achievement_set: AchievementSet, trace) -> Dict[int, np.ndarray]:
+    """
+    Returns, for each achievement of the set, the frames of the trace it triggers on.
+    """
+    return VectorizedEvaluator(trace).evaluate_set(achievement_set)
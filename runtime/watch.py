@@ -0,0 +1,194 @@
+import ast
+import sys
+import time
+import runpy
+import traceback
+import importlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+from models.set import AchievementSet
+
+# Polling is portable and, for the handful of files a set script is made of, a stat()
+# per file every 50 ms is far cheaper than rebuilding.
+POLL_INTERVAL = 0.05
+
+
+def imported_names(path: Path) -> Set[str]:
+    """
+    Absolute module names a file imports (read from its import statements, not executed).
+    """
+    names = set()
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, ValueError):
+        return names
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    return names
+
+
+class Build:
+    """
+    The outcome of one run of the script: timings in seconds, the files save() wrote
+    and the error, if the script failed.
+    """
+    def __init__(self, changed: List[Path]):
+        self.changed = changed
+        self.reloaded: List[str] = []
+        self.run_time = 0.0
+        self.save_time = 0.0
+        self.written: List[Path] = []
+        self.sets: List[AchievementSet] = []
+        self.error: Optional[str] = None
+
+    def report(self) -> str:
+        names = ", ".join(path.name for path in self.changed) or "first build"
+        if self.error:
+            return f"[{time.strftime('%H:%M:%S')}] {names}: failed\n{self.error}"
+        written = ", ".join(path.name for path in self.written) or "nothing changed"
+        if not self.sets:
+            written = "no save() call"
+        reloaded = f", reloaded {', '.join(self.reloaded)}" if self.reloaded else ""
+        return (f"[{time.strftime('%H:%M:%S')}] {names}: run {self.run_time * 1000:.0f} ms, "
+                f"save {self.save_time * 1000:.0f} ms ({written}){reloaded}")
+
+
+class ScriptWatcher:
+    """
+    Keeps a set script warm: core/models stay imported, local modules (files next to
+    the script) are only reloaded when they or something they import changed, and the
+    script's save() calls go through the incremental save of models/set.py.
+    """
+    def __init__(self, script: Union[str, Path], on_build: Optional[Callable[[Build], None]] = None,
+                 interval: float = POLL_INTERVAL):
+        self.script = Path(script).resolve()
+        self.directory = self.script.parent
+        self.on_build = on_build
+        self.interval = interval
+        self.mtimes: Dict[Path, int] = {}
+        self.imports: Dict[Path, Tuple[int, Set[str]]] = {}
+        # the previous run's objects are kept until the next run has built its own, so the
+        # interned conditions (and their cached render) are reused instead of rebuilt
+        self.namespace: dict = {}
+
+        if str(self.directory) not in sys.path:
+            # like `python scripts/6675.py`, the script's folder is importable
+            sys.path.insert(0, str(self.directory))
+        # a .pyc written in the same second as an edit could be picked up as up to date
+        sys.dont_write_bytecode = True
+
+    # --- FILES ---
+
+    def local_modules(self) -> Dict[str, Path]:
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if path and Path(path).parent == self.directory and path.endswith(".py"):
+                modules[name] = Path(path)
+        return modules
+
+    def _mtime(self, path: Path) -> int:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return -1
+
+    def _imported_names(self, path: Path) -> Set[str]:
+        mtime = self._mtime(path)
+        cached = self.imports.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = self.imports[path] = (mtime, imported_names(path))
+        return cached[1]
+
+    def changed_files(self) -> List[Path]:
+        files = [self.script] + list(self.local_modules().values())
+        changed = [path for path in files if self.mtimes.get(path) != self._mtime(path)]
+        return changed
+
+    def stale_modules(self, changed: List[Path]) -> List[str]:
+        """
+        Local modules that changed, plus the local modules that import them (directly or not).
+        """
+        modules = self.local_modules()
+        stale = {name for name, path in modules.items() if path in changed}
+        grew = True
+        while grew:
+            grew = False
+            for name, path in modules.items():
+                if name not in stale and self._imported_names(path) & stale:
+                    stale.add(name)
+                    grew = True
+        return sorted(stale)
+
+    # --- BUILD ---
+
+    def build(self, changed: Optional[List[Path]] = None) -> Build:
+        build = Build(changed or [])
+        # taken before running: an edit saved while the script runs is seen by the next poll
+        seen = {path: self._mtime(path) for path in [self.script] + list(self.local_modules().values())}
+        for name in self.stale_modules(build.changed):
+            del sys.modules[name]
+            build.reloaded.append(name)
+        importlib.invalidate_caches()
+
+        calls = []
+        original = AchievementSet.save
+        AchievementSet.save = lambda self, *args, **kwargs: calls.append((self, args, kwargs))
+        start = time.perf_counter()
+        try:
+            namespace = runpy.run_path(str(self.script), run_name="__main__")
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            build.error = self._format_error(e)
+            namespace = None
+        finally:
+            AchievementSet.save = original
+        build.run_time = time.perf_counter() - start
+
+        if namespace is not None:
+            start = time.perf_counter()
+            try:
+                for achievement_set, args, kwargs in calls:
+                    build.written.extend(achievement_set.save(*args, **kwargs))
+                    build.sets.append(achievement_set)
+            except Exception as e:
+                # save() already printed which achievement/leaderboard failed
+                build.error = "".join(traceback.format_exception_only(type(e), e))
+            build.save_time = time.perf_counter() - start
+            self.namespace = namespace
+
+        # whatever the outcome, wait for the next edit before building again (modules
+        # imported for the first time by this run are only known now)
+        for path in [self.script] + list(self.local_modules().values()):
+            self.mtimes[path] = seen[path] if path in seen else self._mtime(path)
+        if self.on_build:
+            self.on_build(build)
+        return build
+
+    def _format_error(self, error: BaseException) -> str:
+        # starts the traceback at the script, leaving out the watcher and runpy frames
+        tb = error.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != str(self.script):
+            tb = tb.tb_next
+        return "".join(traceback.format_exception(type(error), error, tb or error.__traceback__))
+
+    def poll(self) -> Optional[Build]:
+        changed = self.changed_files()
+        if not changed:
+            return None
+        return self.build(changed)
+
+    def run(self, builds: Optional[int] = None):
+        """
+        Builds once, then rebuilds on every change until interrupted (or after `builds` builds).
+        """
+        count = 1
+        self.build()
+        while builds is None or count < builds:
+            time.sleep(self.interval)
+            if self.poll() is not None:
+                count += 1
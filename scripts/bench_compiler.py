@@ -0,0 +1,92 @@
+# bench_compiler.py
+# Compares the frame-by-frame evaluator with the compiled (generated Python) evaluator:
+# checks both against the reference corpus, checks they agree on a synthetic set,
+# then times them over the same RAM trace.
+
+import os
+import sys
+import random
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from core.helpers import byte, word, dword, bit0, delta, prior
+from core.constants import Flag
+from core.condition import Condition
+from models.set import AchievementSet
+from models.achievement import Achievement
+from runtime.corpus import check, check_leaderboards
+from runtime.evaluator import TriggerEvaluator, AchievementEvaluator
+from runtime.compiler import CompiledLogic, CompiledAchievement, CompiledSet, CompiledLeaderboard
+
+FRAMES = 20000
+RAM_SIZE = 0x800
+ACHIEVEMENTS = 100
+
+
+def build_set(rng: random.Random) -> AchievementSet:
+    game_set = AchievementSet(game_id=1, title="Compiler Benchmark")
+    for i in range(ACHIEVEMENTS):
+        base = rng.randrange(0, 0x100)
+        pointer = rng.randrange(0x100, 0x200)
+        ach = Achievement(f"Achievement {i}", "Benchmark", 5, id=i + 1)
+        ach.add_core([
+            byte(base) == rng.randrange(4),
+            Condition(word(base + 2), ">", delta(word(base + 2))).with_hits(rng.randrange(1, 5)),
+            Condition(bit0(base + 4), "=", 1, Flag.RESET_IF),
+            Condition(dword(pointer), flag=Flag.ADD_ADDRESS),
+            byte(0x10) != prior(byte(0x10)),
+        ])
+        ach.add_alt([byte(base + 5) == 1])
+        ach.add_alt([Condition(byte(base + 6), flag=Flag.ADD_SOURCE), byte(base + 7) >= 3])
+        game_set.add_achievement(ach)
+    return game_set
+
+
+def build_trace(rng: random.Random):
+    ram = bytearray(RAM_SIZE)
+    frames = []
+    for _ in range(FRAMES):
+        for _ in range(8):
+            ram[rng.randrange(0x100)] = rng.randrange(4)
+        frames.append(bytes(ram))
+    return frames
+
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed:8.3f} s")
+    return result, elapsed
+
+
+def main():
+    print("Reference corpus:")
+    for name, factory in (("TriggerEvaluator", TriggerEvaluator), ("CompiledLogic", CompiledLogic)):
+        failures = check(factory)
+        print(f"  {name:<20} {'ok' if not failures else ', '.join(failures)}")
+    failures = check_leaderboards(CompiledLeaderboard)
+    print(f"  {'CompiledLeaderboard':<20} {'ok' if not failures else ', '.join(failures)}")
+
+    rng = random.Random(1)
+    game_set = build_set(rng)
+    frames = build_trace(rng)
+    print(f"\n{ACHIEVEMENTS} achievements, {FRAMES} frames:")
+
+    reference, slow = timed("AchievementEvaluator", lambda: {
+        ach.id: AchievementEvaluator(ach).run(frames) for ach in game_set.achievements})
+    compiled, _ = timed("compile (CompiledAchievement)", lambda: [
+        CompiledAchievement(ach) for ach in game_set.achievements])
+    per_achievement, fast = timed("CompiledAchievement.run", lambda: {
+        logic.achievement.id: logic.run(frames) for logic in compiled})
+    compiled_set, _ = timed("compile (CompiledSet)", lambda: CompiledSet(game_set))
+    whole_set, fastest = timed("CompiledSet.run", lambda: compiled_set.run(frames))
+
+    print(f"\n  same results: {reference == per_achievement == whole_set}")
+    print(f"  speedup: {slow / fast:.1f}x per achievement, {slow / fastest:.1f}x for the whole set")
+
+
+if __name__ == "__main__":
+    main()
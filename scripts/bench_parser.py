@@ -0,0 +1,85 @@
+# bench_parser.py
+# Throughput of core.parser: builds a synthetic RACache-sized corpus of memaddr strings
+# (random logic using every flag, size, prefix and operator), checks that parsing and
+# rendering again gives back the same strings, then times parse_memaddr over all of them.
+
+import os
+import sys
+import random
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from core.constants import Flag, MemorySize, MemoryType
+from core.condition import Condition
+from core.value import MemoryValue, RecallValue
+from core.parser import parse_memaddr
+
+SETS = 2000
+ACHIEVEMENTS_PER_SET = 50
+# like real sets, each one reuses a pool of conditions (scripts/6675.py: 639 conditions, 83 distinct)
+CONDITIONS_PER_SET = 120
+
+MODIFIER_FLAGS = [Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.ADD_ADDRESS, Flag.REMEMBER]
+FLAGS = [Flag.NONE] * 6 + [flag for flag in Flag if flag not in MODIFIER_FLAGS and flag != Flag.NONE]
+TYPES = [MemoryType.MEM] * 6 + [MemoryType.DELTA, MemoryType.PRIOR, MemoryType.BCD, MemoryType.INVERT]
+SIZES = [MemorySize.BIT8] * 8 + [MemorySize.BIT16] * 4 + [MemorySize.BIT32] * 2 + list(MemorySize)
+CMPS = ["=", "!=", "<", "<=", ">", ">="]
+
+
+def operand(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.4:
+        return rng.choice([0, 1, 2, 3, 10, 255, 1000, rng.randrange(256), 1.5])
+    if roll < 0.42:
+        return RecallValue()
+    return MemoryValue(rng.randrange(0x200000), rng.choice(SIZES), rng.choice(TYPES))
+
+
+def condition(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return Condition(MemoryValue(rng.randrange(0x200000), MemorySize.BIT32), "*" if rng.random() < 0.3 else "=",
+                         rng.randint(1, 4) if rng.random() < 0.3 else None, rng.choice(MODIFIER_FLAGS)).render()
+    return Condition(operand(rng), rng.choice(CMPS), operand(rng), rng.choice(FLAGS),
+                     rng.choice([0, 0, 0, 1, 5, 60])).render()
+
+
+def memaddr(rng: random.Random, pool) -> str:
+    groups = []
+    for _ in range(rng.choice([1, 1, 2, 3, 5])):
+        groups.append("_".join(rng.choice(pool) for _ in range(rng.randint(1, 12))))
+    return "S".join(groups)
+
+
+def main():
+    rng = random.Random(1)
+    corpus = []
+    for _ in range(SETS):
+        pool = [condition(rng) for _ in range(CONDITIONS_PER_SET)]
+        corpus.extend(memaddr(rng, pool) for _ in range(ACHIEVEMENTS_PER_SET))
+    unique = sorted(set(corpus))
+    size = sum(len(text) for text in corpus)
+
+    mismatches = 0
+    for text in unique[:5000]:
+        groups = parse_memaddr(text)
+        if "S".join("_".join(c.render() for c in group) for group in groups) != text:
+            mismatches += 1
+    print(f"Round trip: {min(len(unique), 5000)} unique memaddr strings, {mismatches} mismatches")
+
+    start = time.perf_counter()
+    conditions = 0
+    for text in corpus:
+        for group in parse_memaddr(text):
+            conditions += len(group)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{SETS} sets x {ACHIEVEMENTS_PER_SET} achievements ({size / 1e6:.1f} MB of memaddr, {conditions} conditions):")
+    print(f"  parsed in {elapsed:.2f} s")
+    print(f"  {len(corpus) / elapsed:,.0f} achievements/s, {conditions / elapsed:,.0f} conditions/s, "
+          f"{size / 1e6 / elapsed:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
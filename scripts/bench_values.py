@@ -0,0 +1,96 @@
+# bench_values.py
+# Builds a generated set with thousands of conditions, the way set scripts do
+# (helpers called in loops, .delta()/.prior() on the fly), and compares the interned
+# __slots__ values in core.value with plain per-call objects (one __dict__ each):
+# construction time, live memory and the number of distinct value objects.
+
+import os
+import sys
+import gc
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from core.constants import MemorySize, MemoryType, Flag
+from core.condition import Condition
+from core.value import MemoryValue, ConstantValue
+
+ACHIEVEMENTS = 1000
+STAGES = 32
+
+
+class PlainMemoryValue:
+    # the previous layout: a fresh object with its own __dict__ on every call
+    def __init__(self, address, size=MemorySize.BIT8, mtype=MemoryType.MEM):
+        self.address = address
+        self.size = size
+        self.mtype = mtype
+
+    def delta(self): return PlainMemoryValue(self.address, self.size, MemoryType.DELTA)
+    def prior(self): return PlainMemoryValue(self.address, self.size, MemoryType.PRIOR)
+
+
+class PlainConstantValue:
+    def __init__(self, value):
+        self.value = value
+
+
+def build(memory, constant):
+    """
+    ~14 conditions per achievement: stage checks, counters, a pointer and a reset.
+    """
+    conditions = []
+    for i in range(ACHIEVEMENTS):
+        stage = i % STAGES
+        level = memory(0x1000 + stage, MemorySize.BIT8)
+        counter = memory(0x2000 + stage * 2, MemorySize.BIT16)
+        group = [
+            Condition(memory(0x10, MemorySize.BIT8), "=", constant(1)),
+            Condition(level.prior(), "=", constant(stage)),
+            Condition(level, "=", constant(stage + 1)),
+            Condition(counter.delta(), "<", counter),
+            Condition(memory(0x3000, MemorySize.BIT32), flag=Flag.ADD_ADDRESS),
+            Condition(memory(0x20 + stage, MemorySize.BIT8), ">=", constant(10)),
+            Condition(memory(0x30, MemorySize.BIT0), "=", constant(1), Flag.RESET_IF),
+        ]
+        for bit in (MemorySize.BIT0, MemorySize.BIT1, MemorySize.BIT2, MemorySize.BIT3,
+                    MemorySize.BIT4, MemorySize.BIT5, MemorySize.BIT6):
+            group.append(Condition(memory(0x40 + stage // 8, bit), "=", constant(1)))
+        conditions.append(group)
+    return conditions
+
+
+def measure(label, memory, constant):
+    # timed without tracemalloc (it slows allocation down), best of five runs
+    times = []
+    for _ in range(5):
+        gc.collect()
+        start = time.perf_counter()
+        build(memory, constant)
+        times.append(time.perf_counter() - start)
+    elapsed = min(times)
+
+    gc.collect()
+    tracemalloc.start()
+    conditions = build(memory, constant)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    values = {id(v) for group in conditions for c in group for v in (c.lvalue, c.rvalue) if v is not None}
+    count = sum(len(group) for group in conditions)
+    print(f"  {label:<22} {elapsed * 1000:8.1f} ms {size / 1024:10.0f} KiB {len(values):8} value objects"
+          f" ({count} conditions)")
+    return elapsed, size
+
+
+def main():
+    print(f"{ACHIEVEMENTS} achievements:")
+    plain = measure("plain objects", PlainMemoryValue, PlainConstantValue)
+    interned = measure("interned (core.value)", MemoryValue, ConstantValue)
+    print(f"\n  construction {plain[0] / interned[0]:.2f}x faster, memory {plain[1] / interned[1]:.2f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
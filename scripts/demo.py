@@ -91,8 +91,7 @@ dynamic_coins = (base_pointer >> byte(0x20))
 # RESET LOGIC (ResetIf):
 # The achievement resets if the player takes damage.
 # Logic: Current Health < Previous Health (Prior).
-reset_damage = (mem_health < prior(mem_health))
-reset_damage.flag = Flag.RESET_IF  # Mark this condition as a Reset
+reset_damage = (mem_health < prior(mem_health)).with_flag(Flag.RESET_IF)  # Mark this condition as a Reset
 
 # HIT COUNT LOGIC:
 # We track how many times the coin count increased.
@@ -0,0 +1,196 @@
+# fuzz_optimizer.py
+# Checks that core.optimizer does not change what logic does: random groups (every flag,
+# hits, delta/prior, recall, bit checks, bit sums, adjacent reads and repeated pointer
+# chains) are optimized, then both versions are stepped through runtime.evaluator over
+# the same RAM. Any frame with a different trigger, reset or measured value is a bug.
+# The hand-written optimizer cases of runtime.corpus are checked first.
+#
+#   python scripts/fuzz_optimizer.py [cases] [first seed]
+
+import os
+import sys
+import random
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from core.helpers import byte, word, tbyte, bitcount, bit0, bit1, bit2, bit3, bit4, bit5, bit6, bit7, low4, recall
+from core.constants import Flag
+from core.condition import Condition
+from core.optimizer import OptimizeStats, optimize_logic
+from runtime.corpus import check_optimized
+from runtime.evaluator import TriggerEvaluator
+
+CASES = 500
+FRAMES = 200
+RAM_SIZE = 64
+
+BITS = (bit0, bit1, bit2, bit3, bit4, bit5, bit6, bit7)
+FLAGS = (Flag.NONE, Flag.NONE, Flag.NONE, Flag.RESET_IF, Flag.PAUSE_IF, Flag.AND_NEXT, Flag.OR_NEXT,
+         Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.RESET_NEXT_IF, Flag.TRIGGER, Flag.MEASURED_IF,
+         Flag.ADD_HITS, Flag.ADD_ADDRESS, Flag.REMEMBER)
+MODIFIERS = (Flag.ADD_SOURCE, Flag.SUB_SOURCE, Flag.ADD_ADDRESS, Flag.REMEMBER)
+COMBINING = MODIFIERS + (Flag.AND_NEXT, Flag.OR_NEXT, Flag.RESET_NEXT_IF, Flag.ADD_HITS)
+
+
+def build_trace(rng: random.Random):
+    # small values that hold for a few frames, so deltas and priors differ from each other
+    frames, ram = [], [0] * RAM_SIZE
+    for _ in range(FRAMES):
+        for _ in range(rng.randrange(16)):
+            ram[rng.randrange(RAM_SIZE)] = rng.randrange(4) if rng.random() < 0.5 else rng.randrange(256)
+        frames.append(bytes(ram))
+    return frames
+
+
+def history(rng: random.Random, value):
+    r = rng.random()
+    if r < 0.2:
+        return value.delta()
+    if r < 0.35:
+        return value.prior()
+    return value
+
+
+def operand(rng: random.Random):
+    r = rng.random()
+    if r < 0.2:
+        return rng.randrange(4)
+    if r < 0.25:
+        return recall()
+    size = rng.choice((byte, word, tbyte, bit0, bit3, low4, bitcount))
+    return history(rng, size(rng.randrange(RAM_SIZE - 4)))
+
+
+def random_logic(rng: random.Random):
+    group = []
+    for _ in range(rng.randint(1, 5)):
+        flag = rng.choice(FLAGS)
+        left = operand(rng)
+        if isinstance(left, int):
+            left = byte(rng.randrange(RAM_SIZE))
+        if flag in MODIFIERS:
+            condition = Condition(left, rng.choice("*&/"), operand(rng), flag) if rng.random() < 0.3 \
+                else Condition(left, flag=flag)
+        else:
+            condition = Condition(left, rng.choice(("=", "!=", "<", ">=")), operand(rng), flag)
+        if rng.random() < 0.3:
+            condition = condition.with_hits(rng.randint(1, 4))
+        group.append(condition)
+    if group[-1].flag in COMBINING:
+        group.append(byte(1) == 1)
+    return group
+
+
+def bit_check(rng: random.Random, base: int):
+    condition = Condition(history(rng, rng.choice(BITS)(base)), rng.choice(("=", "=", "!=", "<")), rng.randrange(3))
+    if rng.random() < 0.1:
+        condition = condition.with_hits(2)
+    if rng.random() < 0.1:
+        condition = condition.with_flag(rng.choice((Flag.RESET_IF, Flag.PAUSE_IF)))
+    return [condition]
+
+
+def bit_sum(rng: random.Random, base: int):
+    bits = [Condition(bit(base), flag=Flag.ADD_SOURCE) for bit in rng.sample(BITS, 8)]
+    last = bits.pop().lvalue
+    return bits + [Condition(last, rng.choice(("=", ">=", "<")), rng.randrange(6),
+                             rng.choice((Flag.NONE, Flag.MEASURED, Flag.RESET_IF)))]
+
+
+def adjacent_read(rng: random.Random, base: int):
+    size = rng.choice((byte, byte, byte, word))
+    value = history(rng, size(base + rng.randrange(6)))
+    r = rng.random()
+    if r < 0.6:
+        other = rng.randrange(4)
+    elif r < 0.8:
+        other = history(rng, size(value.address))
+    else:
+        other = size(value.address + 8)
+    condition = Condition(value, rng.choice(("=", "=", "=", "!=", "<")), other)
+    if rng.random() < 0.1:
+        condition = condition.with_hits(2)
+    if rng.random() < 0.1:
+        condition = condition.with_flag(rng.choice((Flag.RESET_IF, Flag.PAUSE_IF)))
+    return [condition]
+
+
+def pointer_use(rng: random.Random, chains):
+    chain = rng.choice(chains)
+    chain = chain[:rng.randint(2, len(chain))]
+    last = Condition(rng.choice((byte, word, bit1))(rng.randrange(8)), rng.choice(("=", "!=", "<", ">=")),
+                     rng.randrange(3), rng.choice((Flag.NONE, Flag.NONE, Flag.RESET_IF, Flag.PAUSE_IF, Flag.MEASURED)))
+    if rng.random() < 0.3:
+        last = last.with_hits(rng.randint(1, 3))
+    return chain + [last]
+
+
+def random_case(rng: random.Random):
+    base = rng.randrange(RAM_SIZE - 16)
+    chains = []
+    for _ in range(2):
+        chain = [Condition(byte(rng.randrange(RAM_SIZE)), flag=Flag.ADD_ADDRESS)]
+        chain += [Condition(byte(rng.randrange(8)), flag=Flag.ADD_ADDRESS) for _ in range(rng.randint(1, 3))]
+        chains.append(chain)
+    pool = [random_logic(rng) for _ in range(4)]
+
+    def group():
+        logic = []
+        for _ in range(rng.randint(1, 7)):
+            kind = rng.random()
+            if kind < 0.25:
+                logic += bit_check(rng, base)
+            elif kind < 0.3:
+                logic += bit_sum(rng, base)
+            elif kind < 0.55:
+                logic += adjacent_read(rng, base)
+            elif kind < 0.7:
+                logic += pointer_use(rng, chains)
+            elif kind < 0.85:
+                logic += rng.choice(pool)
+            else:
+                logic += random_logic(rng)
+        return logic
+
+    core = group()
+    alts = [group() for _ in range(rng.randint(0, 3))]
+    if alts and rng.random() < 0.3:
+        alts.append(alts[0] + rng.choice(pool))
+    return core, alts
+
+
+def render(core, alts) -> str:
+    return "S".join("_".join(condition.render() for condition in group) for group in [core] + alts)
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else CASES
+    first = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    corpus_failures = check_optimized(TriggerEvaluator)
+    for failure in corpus_failures:
+        print(f"corpus: {failure}")
+    frames = build_trace(random.Random(0))
+    stats = OptimizeStats()
+    failures = 0
+    for seed in range(first, first + cases):
+        core, alts = random_case(random.Random(seed))
+        new_core, new_alts, case_stats = optimize_logic(core, alts)
+        stats += case_stats
+        before, after = TriggerEvaluator(core, alts), TriggerEvaluator(new_core, new_alts)
+        for frame, ram in enumerate(frames):
+            expected = (before.step(ram), before.was_reset, before.measured)
+            result = (after.step(ram), after.was_reset, after.measured)
+            if expected != result:
+                failures += 1
+                print(f"seed {seed}, frame {frame}: {expected} became {result}")
+                print(f"  {render(core, alts)}")
+                print(f"  {render(new_core, new_alts)}")
+                break
+    print(f"{cases} cases, {failures} failed")
+    print(f"  {stats.report()}")
+    return 1 if failures or corpus_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import os
+
+from runtime.cache import BuildCache, build_key, cached_build
+
+SCRIPT = """\
+from core.helpers import byte
+from models.achievement import Achievement
+from models.set import AchievementSet
+
+game_set = AchievementSet(1234, "Cached")
+achievement = Achievement("First", "", 5, id=11)
+achievement.add_core(byte(0x10) == {value})
+game_set.add_achievement(achievement)
+game_set.save("{output}")
+"""
+
+
+def write_script(tmp_path, value: int):
+    script = tmp_path / "set.py"
+    script.write_text(SCRIPT.format(value=value, output=(tmp_path / "output").as_posix()))
+    return script
+
+
+def test_get_put(tmp_path):
+    cache = BuildCache(tmp_path / "cache")
+    assert cache.get("key") is None
+    cache.put("key", [(str(tmp_path / "a.txt"), b"a"), (str(tmp_path / "b.txt"), b"a")], 1.5)
+    entry = cache.get("key")
+    assert entry["run_time"] == 1.5
+    # the same content is stored once
+    assert len(os.listdir(cache.blobs)) == 1
+    assert cache.restore(entry) == [tmp_path / "a.txt", tmp_path / "b.txt"]
+    assert cache.restore(entry) == []
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["time_saved"]) == (1, 1, 1.5)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = BuildCache(tmp_path / "cache", max_size=20)
+    cache.put("old", [("old.txt", b"o" * 10)], 0.0)
+    cache.put("new", [("new.txt", b"n" * 10)], 0.0)
+    os.utime(cache.entries / "old.json", (0, 0))
+    cache.put("newest", [("newest.txt", b"x" * 10)], 0.0)
+    assert cache.get("old") is None
+    assert cache.get("new") is not None and cache.get("newest") is not None
+    assert cache.stats()["size"] == 20
+
+
+def test_missing_blob_is_a_miss(tmp_path):
+    cache = BuildCache(tmp_path / "cache")
+    cache.put("key", [("a.txt", b"a")], 0.0)
+    for blob in cache.blobs.iterdir():
+        blob.unlink()
+    assert cache.get("key") is None
+
+
+def test_cached_build(tmp_path):
+    cache = BuildCache(tmp_path / "cache")
+    script = write_script(tmp_path, 1)
+    user_file = tmp_path / "output" / "1234-User.txt"
+    assert cached_build(script, cache) == (False, [user_file])
+    content = user_file.read_bytes()
+
+    user_file.unlink()
+    hit, outputs = cached_build(script, cache)
+    assert hit and user_file.read_bytes() == content
+
+    # a changed script is another key
+    key = build_key(script)
+    write_script(tmp_path, 2)
+    assert build_key(script) != key
+    assert cached_build(script, cache)[0] is False
+    assert b"0xH0010=2" in user_file.read_bytes()
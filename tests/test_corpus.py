@@ -0,0 +1,13 @@
+from runtime.compiler import CompiledLogic
+from runtime.corpus import check, check_optimized
+from runtime.evaluator import TriggerEvaluator
+
+
+def test_reference_corpus():
+    assert check(TriggerEvaluator) == []
+    assert check(CompiledLogic) == []
+
+
+def test_optimizer_cases():
+    assert check_optimized(TriggerEvaluator) == []
+    assert check_optimized(CompiledLogic) == []
@@ -0,0 +1,49 @@
+from core.helpers import byte
+from models.leaderboard import Leaderboard
+from models.set import _leaderboard
+from runtime.compiler import CompiledLeaderboard
+from runtime.corpus import check_leaderboards
+
+RAM_SIZE = 0x20
+
+
+def snapshots(writes):
+    ram, result = bytearray(RAM_SIZE), []
+    for frame in writes:
+        for address, value in frame.items():
+            ram[address] = value
+        result.append(bytes(ram))
+    return result
+
+
+FRAMES = snapshots([{}, {1: 1, 0x10: 5, 0x11: 5}, {0x10: 6}, {2: 1}])
+
+
+def loaded(value: str) -> Leaderboard:
+    # as load_user_txt reads it from a User.txt line
+    return _leaderboard(7, {"start": "0xH0001=1", "cancel": "0xH0001=2", "submit": "0xH0002=1", "value": value},
+                        "SCORE", "Loaded", "", 0)
+
+
+def test_corpus():
+    assert check_leaderboards(CompiledLeaderboard) == []
+
+
+def test_legacy_value_is_summed():
+    assert CompiledLeaderboard(loaded("0xH0010*2_0xH0011")).run(FRAMES) == [(1, "started", 15), (3, "submitted", 17)]
+
+
+def test_measured_value():
+    # with M: only the measured condition is the value, AddSource still adds to it
+    assert CompiledLeaderboard(loaded("A:0xH0010_M:0xH0011")).run(FRAMES) == [(1, "started", 10), (3, "submitted", 11)]
+    assert CompiledLeaderboard(loaded("0xH0010_M:0xH0011")).run(FRAMES) == [(1, "started", 5), (3, "submitted", 5)]
+
+
+def test_highest_alternative():
+    assert CompiledLeaderboard(loaded("0xH0010$0xH0011*2")).run(FRAMES) == [(1, "started", 10), (3, "submitted", 10)]
+
+
+def test_bare_memory_value():
+    leaderboard = Leaderboard("Bare", "", id=8).set_start(byte(1) == 1).set_cancel(byte(1) == 2) \
+        .set_submit(byte(2) == 1).set_value(byte(0x11))
+    assert CompiledLeaderboard(leaderboard).run(FRAMES) == [(1, "started", 5), (3, "submitted", 5)]
@@ -0,0 +1,59 @@
+from core.helpers import byte
+from models.leaderboard import Leaderboard
+from models.set import AchievementSet, _leaderboard
+from runtime.live import LiveEvaluator, RingWriter
+
+RAM_SIZE = 0x20
+
+
+def legacy_set() -> AchievementSet:
+    # as load_user_txt builds it: the value has no Measured condition
+    achievement_set = AchievementSet(1, "live")
+    achievement_set.add_leaderboard(_leaderboard(
+        7, {"start": "0xH0001=1", "cancel": "0xH0001=2", "submit": "0xH0002=1", "value": "0xH0010*2_0xH0011"},
+        "SCORE", "Legacy", "", 0))
+    return achievement_set
+
+
+def snapshots(writes):
+    ram, result = bytearray(RAM_SIZE), []
+    for frame in writes:
+        for address, value in frame.items():
+            ram[address] = value
+        result.append(bytes(ram))
+    return result
+
+
+FRAMES = snapshots([{}, {1: 1, 0x10: 5, 0x11: 5}, {0x10: 6}, {2: 1}])
+
+
+def test_submits_legacy_value():
+    events = []
+    live = LiveEvaluator(legacy_set(), on_event=events.append)
+    with RingWriter(ram_size=RAM_SIZE, slots=8) as ring:
+        for ram in FRAMES:
+            ring.write(ram)
+        live.run(ring.name, frames=len(FRAMES), timeout=0.1)
+    assert [(e.kind, e.frame, e.id, e.value) for e in events] == [("started", 1, 7, 15), ("submitted", 3, 7, 17)]
+
+
+def test_bare_memory_value():
+    achievement_set = AchievementSet(1, "live")
+    achievement_set.add_leaderboard(Leaderboard("Bare", "", id=8).set_start(byte(1) == 1)
+                                    .set_cancel(byte(1) == 2).set_submit(byte(2) == 1).set_value(byte(0x11)))
+    live = LiveEvaluator(achievement_set)
+    events = [event for ram in FRAMES for event in live.evaluate(ram)]
+    assert [(e.kind, e.frame, e.value) for e in events] == [("started", 1, 5), ("submitted", 3, 5)]
+
+
+def test_dropped_frames_keep_ring_numbers():
+    events = []
+    live = LiveEvaluator(legacy_set(), on_event=events.append)
+    with RingWriter(ram_size=RAM_SIZE, slots=2) as ring:
+        for ram in [FRAMES[0]] * 4 + FRAMES:
+            ring.write(ram)
+        live.run(ring.name, frames=8, timeout=0.1)
+    # only the last two frames were still in the ring: the attempt was never seen starting
+    assert live.stats.dropped == 6
+    assert live.frame == 8
+    assert events == []
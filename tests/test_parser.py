@@ -0,0 +1,74 @@
+import pytest
+
+from core.helpers import byte, delta, bitcount
+from core.condition import Condition
+from core.constants import Flag
+from core.parser import ParseError, parse_memaddr, parse_condition, parse_value
+from models.achievement import Achievement
+from models.leaderboard import Leaderboard
+from models.rich_presence import RichPresence
+from models.set import AchievementSet
+
+
+def render(text: str) -> str:
+    return "S".join("_".join(condition.render() for condition in group) for group in parse_memaddr(text))
+
+
+@pytest.mark.parametrize("text", [
+    "0xH0001=1_R:0xH0002=2.5.S0xH0003=0S0xH0004!=d0xH0004",
+    "A:0xK0010_0=3",
+    "I:0xX0010_K:0xH0002_I:{recall}_0xH0004=7",
+    "A:0xX0020*f0.5_M:0xH0001>=16",
+    "P:0xM0000=1_Q:0xW0100<=b0xW0100",
+])
+def test_rendered_logic_round_trips(text):
+    assert render(text) == text
+
+
+def test_bare_float_constant():
+    assert parse_value("0.5").render() == "f0.5"
+    assert render("0xX1234*0.5") == "0xX1234*f0.5"
+
+
+def test_hex_constant_renders_decimal():
+    assert render("0xH0001>=h10") == "0xH0001>=16"
+
+
+def test_number_then_hits():
+    # "5.2." is the constant 5 with 2 hits, as in rcheevos
+    condition = parse_condition("0xH0001=5.2.")
+    assert condition == (byte(1) == 5).with_hits(2)
+
+
+def test_legacy_bitcount():
+    assert parse_value("K1234") == parse_value("0xK1234") == bitcount(0x1234)
+    assert parse_value("K1234").render() == "0xK1234"
+
+
+def test_parses_to_helper_conditions():
+    assert parse_memaddr("R:d0xH0010=0xH0010") == [[Condition(delta(byte(0x10)), "=", byte(0x10), Flag.RESET_IF)]]
+
+
+@pytest.mark.parametrize("text", ["0xH0001=1_", "0xH0001=1__0xH0002=1", "0xH0001=1_S0xH0002=1", "0xH0001=1x"])
+def test_rejects_malformed_logic(text):
+    with pytest.raises(ParseError):
+        parse_memaddr(text)
+
+
+def test_load_user_txt_round_trip(tmp_path):
+    achievement_set = AchievementSet(1234, "Round Trip")
+    achievement = Achievement("First", 'Say "hi", then leave', 5, id=11)
+    achievement.add_core([byte(1) == 1, delta(byte(1)) == 0])
+    achievement.add_alt((byte(2) == 3).with_hits(4))
+    achievement.add_alt(bitcount(3) >= 2)
+    achievement_set.add_achievement(achievement)
+    achievement_set.add_leaderboard(Leaderboard("Score", "Highest", id=7).set_start(byte(1) == 1)
+                                    .set_cancel(byte(1) == 2).set_submit(byte(2) == 1).set_value(byte(0x11)))
+    achievement_set.rich_presence = RichPresence.parse("Lookup:Level\n0=Intro\n1=Castle\n\nDisplay:\nIn @Level(0xH0001)\n")
+    saved = achievement_set.save(tmp_path / "saved")
+
+    loaded = AchievementSet.load_user_txt(tmp_path / "saved" / "1234-User.txt")
+    loaded.save(tmp_path / "loaded")
+    assert [path.name for path in saved] == ["1234-User.txt", "1234-Rich.txt"]
+    for path in saved:
+        assert (tmp_path / "loaded" / path.name).read_bytes() == path.read_bytes()
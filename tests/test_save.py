@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from core.helpers import byte
+from models.achievement import Achievement
+from models.manifest import Manifest, write_atomic
+from models.set import AchievementSet
+
+
+def small_set() -> AchievementSet:
+    achievement_set = AchievementSet(1234, "Save")
+    for i in range(3):
+        achievement = Achievement(f"Level {i}", "", 5, id=100 + i)
+        achievement.add_core(byte(0x10) == i)
+        achievement_set.add_achievement(achievement)
+    return achievement_set
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / "out.txt"
+    write_atomic(path, ["a", "b"])
+    assert path.read_text() == "ab"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+def test_write_atomic_failure_keeps_old_file(tmp_path):
+    path = tmp_path / "out.txt"
+    path.write_text("old")
+
+    def chunks():
+        yield "new"
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        write_atomic(path, chunks())
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+def test_second_save_writes_nothing(tmp_path):
+    achievement_set = small_set()
+    assert achievement_set.save(tmp_path) == [tmp_path / "1234-User.txt"]
+    assert achievement_set.save(tmp_path) == []
+    assert achievement_set.save(tmp_path, force=True) == [tmp_path / "1234-User.txt"]
+
+
+def test_save_after_change_or_edit(tmp_path):
+    achievement_set = small_set()
+    user_file = achievement_set.save(tmp_path)[0]
+    achievement_set.achievements[1].points = 10
+    assert achievement_set.save(tmp_path) == [user_file]
+
+    # edited by hand since: written again even though the set did not change
+    user_file.write_text(user_file.read_text() + "\n")
+    assert achievement_set.save(tmp_path) == [user_file]
+    assert achievement_set.save(tmp_path) == []
+
+
+def test_manifest_reload(tmp_path):
+    achievement_set = small_set()
+    user_file = achievement_set.save(tmp_path)[0]
+    manifest = Manifest(tmp_path / ".1234-manifest.json")
+    digest = manifest.files[user_file.name]["sha256"]
+    assert manifest.unchanged(user_file, digest)
+    assert not manifest.unchanged(user_file, "0" * 64)
+    assert not manifest.unchanged(tmp_path / "1234-Rich.txt", digest)
+
+
+def test_unreadable_manifest_writes_again(tmp_path):
+    achievement_set = small_set()
+    achievement_set.save(tmp_path)
+    (tmp_path / ".1234-manifest.json").write_text("{not json")
+    assert achievement_set.save(tmp_path) == [tmp_path / "1234-User.txt"]
@@ -0,0 +1,62 @@
+# check_roundtrip.py
+# Checks that AchievementSet.load_user_txt reads back what save() writes: every set script
+# given (by default the ones in scripts/) is saved, loaded from its User.txt/Rich.txt and
+# saved again, and both outputs must be the same bytes.
+#
+#   python utils/check_roundtrip.py [script.py ...]
+#
+# A script that fails to build or to load back counts as a failure too.
+
+import os
+import io
+import sys
+import contextlib
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from models.set import AchievementSet
+from runtime.batch import load_set
+
+SKIP = ("bench_", "fuzz_")
+
+
+def set_scripts():
+    for script in sorted(Path(ROOT_DIR, "scripts").glob("*.py")):
+        if not script.name.startswith(SKIP) and "AchievementSet(" in script.read_text(encoding="utf-8"):
+            yield script
+
+
+def roundtrip(script: Path, output: Path) -> list:
+    # the files that differ between the first and the second save
+    with contextlib.redirect_stdout(io.StringIO()):
+        achievement_set = load_set(script)
+        achievement_set.save(output / "saved")
+        loaded = AchievementSet.load_user_txt(output / "saved" / f"{achievement_set.game_id}-User.txt")
+        loaded.save(output / "loaded")
+    names = sorted(p.name for p in (output / "saved").iterdir() if not p.name.startswith("."))
+    return [name for name in names
+            if not (output / "loaded" / name).exists()
+            or (output / "saved" / name).read_bytes() != (output / "loaded" / name).read_bytes()]
+
+
+def main():
+    scripts = [Path(arg) for arg in sys.argv[1:]] or list(set_scripts())
+    failures = 0
+    for script in scripts:
+        with tempfile.TemporaryDirectory() as output:
+            try:
+                different = roundtrip(script, Path(output))
+            except Exception as e:
+                failures += 1
+                print(f"  [FAILED] {script.name}: {type(e).__name__}: {str(e).strip().splitlines()[0]}")
+                continue
+        failures += bool(different)
+        print(f"  [{'DIFFERENT' if different else 'OK'}] {script.name}" + (f": {', '.join(different)}" if different else ""))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
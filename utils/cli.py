@@ -0,0 +1,236 @@
+import os
+import sys
+import argparse
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+# --- COMMANDS ---
+
+def cmd_test(args):
+    from runtime.batch import find_traces, load_set, regression
+
+    game_set = load_set(args.script)
+    traces = find_traces(args.traces)
+    if not traces:
+        print(f"[ERROR] No .trace files found in {args.traces}")
+        return 1
+
+    report_path = args.report or os.path.join(os.path.dirname(os.path.abspath(args.script)), f"{game_set.game_id}-test.json")
+    csv_path = args.csv if args.csv else os.path.splitext(report_path)[0] + ".csv"
+    print(f"Testing {len(game_set.achievements)} achievements against {len(traces)} traces...")
+
+    def on_result(result):
+        trace, ach_id, runs = result
+        if runs and args.verbose:
+            print(f"  {trace}: {ach_id} first true on frame {runs[0][0]}")
+
+    report, changes = regression(game_set, traces, report_path, csv_path, args.workers, on_result)
+
+    triggered = sum(1 for achievements in report["results"].values() for runs in achievements.values() if runs)
+    print(f"{triggered} (achievement, trace) pairs triggered.")
+    print(f"Report: {report_path}")
+    print(f"CSV: {csv_path}")
+
+    if changes:
+        print(f"\n{len(changes)} changes since the previous run:")
+        for change in changes:
+            print(f"  [{change['status'].upper()}] {change['trace']}: {change['id']} '{change['title']}' "
+                  f"first frame {change['previous_first']} -> {change['first']}")
+    return 1 if changes and args.strict else 0
+
+def cmd_live(args):
+    from runtime.batch import load_set
+    from runtime.live import FakeEmulator, LiveEvaluator
+
+    game_set = load_set(args.script)
+    titles = {ach.id: ach.title for ach in game_set.achievements}
+    titles.update({lb.id: lb.title for lb in game_set.leaderboards})
+
+    def on_event(event):
+        value = f" = {event.value}" if event.value is not None else ""
+        print(f"  [{event.kind.upper()}] frame {event.frame}: {event.id} '{titles.get(event.id, '')}'{value}"
+              f" ({event.latency:.2f} ms)")
+
+    live = LiveEvaluator(game_set, on_event)
+    if args.ring:
+        print(f"Listening on ring buffer '{args.ring}' ({len(game_set.achievements)} achievements)...")
+        live.run(args.ring, args.frames, args.timeout)
+    else:
+        emulator = FakeEmulator(fps=args.fps, frames=args.frames or 600, trace=args.trace)
+        print(f"Fake emulator on '{emulator.name}' at {args.fps} fps ({len(game_set.achievements)} achievements)...")
+        with emulator:
+            live.run(emulator.name, emulator.frames, args.timeout)
+    print(live.stats.report())
+    return 0
+
+def cmd_profile(args):
+    import json
+    from runtime.batch import find_traces, load_set
+    from runtime.profiler import ProfileReport
+    from runtime.trace import Trace
+
+    game_set = load_set(args.script)
+    traces = find_traces(args.traces)
+    if not traces:
+        print(f"[ERROR] No .trace files found in {args.traces}")
+        return 1
+
+    report = ProfileReport(game_set)
+    for path in traces:
+        print(f"Profiling {path.name}...")
+        with Trace(path) as trace:
+            report.add_trace(trace)
+
+    print(report.render(args.top))
+    dead = report.dead_alts()
+    if dead:
+        print(f"\n{len(dead)} alt groups never matched:")
+        for ach_id, group in dead:
+            print(f"  {ach_id} {group}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=1)
+        print(f"Report: {args.json}")
+    return 0
+
+def cmd_watch(args):
+    from runtime.watch import ScriptWatcher
+
+    def on_build(build):
+        print(build.report())
+
+    watcher = ScriptWatcher(args.script, on_build, args.interval)
+    print(f"Watching {watcher.script.name} and its local imports (Ctrl+C to stop)...")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def cmd_build(args):
+    import json
+    from runtime.build import build_all
+
+    def on_result(result):
+        if result.ok:
+            print(f"  [{result.status.upper()}] {result.script} in {result.elapsed * 1000:.0f} ms: "
+                  f"{result.achievements} achievements, {result.leaderboards} leaderboards")
+        else:
+            print(f"  [{result.status.upper()}] {result.script} after {result.elapsed * 1000:.0f} ms: "
+                  f"{result.error.strip().splitlines()[-1]}")
+            if args.verbose:
+                print(result.output + result.error)
+
+    report = build_all(args.paths, args.workers, args.cache_dir, not args.no_cache, args.timeout, on_result)
+    print(f"{len(report['scripts'])} scripts in {report['seconds']:.2f} s (longest {report['longest_seconds']:.2f} s, "
+          f"{report['script_seconds']:.2f} s in total): {report['built']} built, {report['cached']} cached, "
+          f"{report['failed']} failed")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"Report: {args.report}")
+    return 1 if report["failed"] else 0
+
+def cmd_cache(args):
+    from runtime.cache import BuildCache
+
+    cache = BuildCache(args.cache_dir)
+    if args.action == "clear":
+        cache.clear()
+        print(f"Cleared {cache.directory}")
+        return 0
+    stats = cache.stats()
+    print(f"Cache: {cache.directory}")
+    print(f"  {stats['entries']} entries, {stats['size'] / 1024:.0f} KiB of {stats['max_size'] / 1024 / 1024:.0f} MiB")
+    print(f"  {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
+    print(f"  {stats['time_saved']:.1f} s of script runs skipped")
+    return 0
+
+def cmd_cost(args):
+    import json
+    from runtime.batch import load_set
+    from runtime.cost import DEFAULT_BUDGET, DEFAULT_ITEM_BUDGET, cost_report
+
+    budget = DEFAULT_BUDGET if args.budget is None else args.budget
+    item_budget = DEFAULT_ITEM_BUDGET if args.item_budget is None else args.item_budget
+    report = cost_report(load_set(args.script), budget, item_budget)
+    print(report.render(args.top))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=1)
+        print(f"Report: {args.json}")
+    return 1 if report.over_budget else 0
+
+# --- ENTRY POINT ---
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pycheevos", description="PyCheevos command line tools")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    test = commands.add_parser("test", help="Run a set against recorded RAM traces")
+    test.add_argument("script", help="Set script (e.g. scripts/6675.py)")
+    test.add_argument("traces", help="Directory of .trace files (or a single trace)")
+    test.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    test.add_argument("--report", help="JSON report path (default: <game_id>-test.json next to the script)")
+    test.add_argument("--csv", help="CSV report path (default: next to the JSON report)")
+    test.add_argument("--strict", action="store_true", help="Exit with an error when results changed")
+    test.add_argument("-v", "--verbose", action="store_true", help="Print every result as it arrives")
+    test.set_defaults(func=cmd_test)
+
+    live = commands.add_parser("live", help="Evaluate a set in real time from a shared memory ring buffer")
+    live.add_argument("script", help="Set script (e.g. scripts/6675.py)")
+    live.add_argument("--ring", help="Name of the ring buffer written by the emulator (default: start a fake emulator)")
+    live.add_argument("--trace", help="Trace file the fake emulator replays (default: random RAM writes)")
+    live.add_argument("--fps", type=float, default=60, help="Fake emulator frame rate")
+    live.add_argument("--frames", type=int, default=None, help="Stop after this many frames")
+    live.add_argument("--timeout", type=float, default=1.0, help="Stop after this many seconds without a new frame")
+    live.set_defaults(func=cmd_live)
+
+    profile = commands.add_parser("profile", help="Per-condition evaluation counts and cost over recorded traces")
+    profile.add_argument("script", help="Set script (e.g. scripts/6675.py)")
+    profile.add_argument("traces", help="Directory of .trace files (or a single trace)")
+    profile.add_argument("--top", type=int, default=None, help="Only show the N most expensive achievements")
+    profile.add_argument("--json", help="Also write the full report to this JSON file")
+    profile.set_defaults(func=cmd_profile)
+
+    watch = commands.add_parser("watch", help="Run a set script again (and save) every time it changes")
+    watch.add_argument("script", help="Set script (e.g. scripts/6675.py)")
+    watch.add_argument("--interval", type=float, default=0.05, help="Seconds between checks for changes")
+    watch.set_defaults(func=cmd_watch)
+
+    build = commands.add_parser("build", help="Run set scripts in parallel, reusing cached outputs when nothing changed")
+    build.add_argument("paths", nargs="+", help="Set scripts, or folders of set scripts (e.g. scripts/)")
+    build.add_argument("-j", "--workers", type=int, default=None, help="Scripts run at the same time (default: all cores)")
+    build.add_argument("--timeout", type=float, default=None, help="Stop a script after this many seconds")
+    build.add_argument("--report", help="Also write the timing/error report to this JSON file")
+    build.add_argument("--no-cache", action="store_true", help="Always run the scripts")
+    build.add_argument("--cache-dir", help="Build cache folder (default: $PYCHEEVOS_CACHE or ~/.cache/pycheevos)")
+    build.add_argument("-v", "--verbose", action="store_true", help="Print the output and traceback of failed scripts")
+    build.set_defaults(func=cmd_build)
+
+    cache = commands.add_parser("cache", help="Build cache statistics and cleanup")
+    cache.add_argument("action", choices=["stats", "clear"], help="Show hit rate and size, or empty the cache")
+    cache.add_argument("--cache-dir", help="Build cache folder (default: $PYCHEEVOS_CACHE or ~/.cache/pycheevos)")
+    cache.set_defaults(func=cmd_cache)
+
+    cost = commands.add_parser("cost", help="Estimated per-frame cost of a set, most expensive items first")
+    cost.add_argument("script", help="Set script (e.g. scripts/6675.py)")
+    cost.add_argument("--budget", type=float, default=None,
+                      help="Cost allowed for the whole set per frame (default: runtime.cost.DEFAULT_BUDGET)")
+    cost.add_argument("--item-budget", type=float, default=None,
+                      help="Cost allowed for a single item per frame (default: runtime.cost.DEFAULT_ITEM_BUDGET)")
+    cost.add_argument("--top", type=int, default=None, help="Only show the N most expensive items")
+    cost.add_argument("--json", help="Also write the full report to this JSON file")
+    cost.set_defaults(func=cmd_cost)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,11 @@ import getpass
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, ROOT_DIR)
 
+from core import parser
+from core.constants import Flag, MemorySize, MemoryType
+from core.value import MemoryValue, RecallValue
+from utils.racache_index import find_game_files
+
 CACHE_PATH_FILE = os.path.join(ROOT_DIR, '.racache_path')
 LOGIN_CACHE_FILE = os.path.join(ROOT_DIR, '.login_cache')
 
@@ -75,21 +80,20 @@ def get_credentials():
 # --- BUSCA LOCAL ---
 
 def find_all_candidates(base_path, game_id):
-    print(f"[DEBUG] Scanning {base_path} by ID {game_id}...")
+    print(f"[DEBUG] Looking up ID {game_id} in the index of {base_path}...")
     
     candidates = []
     target_files = [f"{game_id}-User.txt", f"{game_id}.json"]
     targets_lower = [t.lower() for t in target_files]
     
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.lower() in targets_lower:
-                full_path = os.path.join(root, file)
-                priority = 2
-                if file.lower().endswith("-user.txt"): priority = 1
-                
-                candidates.append((priority, full_path, file))
-                print(f"   File found: {file}")
+    for full_path in find_game_files(base_path, game_id):
+        file = os.path.basename(full_path)
+        if file.lower() in targets_lower:
+            priority = 2
+            if file.lower().endswith("-user.txt"): priority = 1
+            
+            candidates.append((priority, full_path, file))
+            print(f"   File found: {file}")
 
     candidates.sort(key=lambda x: x[0])
     return candidates
@@ -130,84 +134,60 @@ def fetch_server_data(game_id):
 
 # --- LOGIC PARSER ---
 
-MEM_SIZES = {
-    '0xH': 'byte', '0x': 'word', '0xX': 'dword',
-    '0xL': 'low4', '0xU': 'high4',
-    '0xM': 'bit0', '0xN': 'bit1', '0xO': 'bit2', '0xP': 'bit3',
-    '0xQ': 'bit4', '0xR': 'bit5', '0xS': 'bit6', '0xT': 'bit7'
+# memaddr strings are parsed into Condition objects by core.parser,
+# then written back as PyCheevos source
+
+HELPERS = {
+    MemorySize.BIT8: 'byte', MemorySize.BIT16: 'word', MemorySize.BIT24: 'tbyte', MemorySize.BIT32: 'dword',
+    MemorySize.BIT16_BE: 'word_be', MemorySize.BIT24_BE: 'tbyte_be', MemorySize.BIT32_BE: 'dword_be',
+    MemorySize.LOWER4: 'low4', MemorySize.UPPER4: 'high4', MemorySize.BITCOUNT: 'bitcount',
+    MemorySize.BIT0: 'bit0', MemorySize.BIT1: 'bit1', MemorySize.BIT2: 'bit2', MemorySize.BIT3: 'bit3',
+    MemorySize.BIT4: 'bit4', MemorySize.BIT5: 'bit5', MemorySize.BIT6: 'bit6', MemorySize.BIT7: 'bit7',
+    MemorySize.FLOAT: 'float32', MemorySize.FLOAT_BE: 'float32_be',
+    MemorySize.DOUBLE32: 'double32', MemorySize.DOUBLE32_BE: 'double32_be',
+    MemorySize.MBF32: 'mbf32', MemorySize.MBF32_LE: 'mbf32_le',
 }
 
-CMP_MAP = {'=': '==', '!=': '!=', '>': '>', '<': '<', '>=': '>=', '<=': '<='}
-
-FLAG_MAP = {
-    'R': 'reset_if', 'P': 'pause_if', 'T': 'trigger', 'M': 'measured',
-    'Q': 'measured_if', 'A': 'add_source', 'B': 'sub_source',
-    'N': 'and_next', 'O': 'or_next', 'I': 'add_address',
-    'C': 'add_hits', 'Z': 'reset_next_if'
+MODIFIERS = {
+    MemoryType.DELTA: '.delta()', MemoryType.PRIOR: '.prior()',
+    MemoryType.BCD: '.bcd()', MemoryType.INVERT: '.invert()'
 }
 
-def parse_value(val_str):
-    val_str = val_str.replace(' ', '')
-    prefix = ""
-    if val_str.startswith('d'): prefix = ".delta()"; val_str = val_str[1:]
-    elif val_str.startswith('p'): prefix = ".prior()"; val_str = val_str[1:]
-    elif val_str.startswith('b'): prefix = ".bcd()"; val_str = val_str[1:]
-    elif val_str.startswith('~'): prefix = ".invert()"; val_str = val_str[1:]
-
-    for code, func in MEM_SIZES.items():
-        if val_str.startswith(code):
-            addr = val_str[len(code):]
-            return f"{func}(0x{addr}){prefix}"
-            
-    if val_str.startswith('0x'): return f"word({val_str}){prefix}"
-    if val_str.startswith('f'): return f"float({val_str[1:]})"
-    return val_str
-
-def parse_condition(cond_str):
-    hits = ""
-    hit_match = re.search(r'\.(\d+)\.?$', cond_str)
-    if hit_match:
-        if 'f' not in cond_str[hit_match.start()-1:]:
-            hits = f".with_hits({hit_match.group(1)})"
-            cond_str = cond_str[:hit_match.start()]
-
-    flag = ""
-    if ':' in cond_str:
-        parts = cond_str.split(':')
-        if len(parts[0]) == 1 and parts[0] in FLAG_MAP:
-            flag_code = parts[0]
-            cond_str = ':'.join(parts[1:])
-            flag = f".with_flag({FLAG_MAP[flag_code]})"
-
-    op = None
-    for o in ['!=', '>=', '<=', '=', '>', '<']:
-        if o in cond_str:
-            op = o
-            break
-    
-    if not op:
-        val = parse_value(cond_str)
-        return f"({val}){flag}{hits}"
+CMP_MAP = {'=': '==', '!=': '!=', '>': '>', '<': '<', '>=': '>=', '<=': '<=',
+           '*': '*', '/': '/', '%': '%', '&': '&', '^': '^'}
+
+def value_source(value):
+    if not isinstance(value, MemoryValue):
+        return repr(value.value)
+    if value.mtype == MemoryType.RECALL:
+        return "recall()"
+    return f"{HELPERS[value.size]}(0x{value.address:x}){MODIFIERS.get(value.mtype, '')}"
+
+def condition_source(cond):
+    left = value_source(cond.lvalue)
+    if cond.rvalue is None:
+        source = left if isinstance(cond.lvalue, MemoryValue) and cond.flag != Flag.NONE else f"Condition({left})"
+    elif isinstance(cond.lvalue, MemoryValue) and not isinstance(cond.rvalue, RecallValue):
+        # (a reflected operator on recall() would swap the operands)
+        source = f"({left} {CMP_MAP[cond.cmp]} {value_source(cond.rvalue)})"
+    else:
+        source = f"Condition({left}, '{cond.cmp}', {value_source(cond.rvalue)})"
 
-    left_str, right_str = cond_str.split(op, 1)
-    left = parse_value(left_str)
-    right = parse_value(right_str)
-    py_op = CMP_MAP[op]
+    if cond.flag != Flag.NONE:
+        source += f".with_flag({cond.flag.name.lower()})"
+    if cond.hits:
+        source += f".with_hits({cond.hits})"
+    return source
 
-    return f"({left} {py_op} {right}){flag}{hits}"
+def parse_condition(cond_str):
+    return condition_source(parser.parse_condition(cond_str))
 
 def parse_logic(mem_string):
     if not mem_string: return []
-    groups = mem_string.split('S')
     parsed_groups = []
-    
-    for i, group in enumerate(groups):
-        conditions = []
-        for cond_str in group.split('_'):
-            if cond_str:
-                conditions.append(parse_condition(cond_str))
+    for i, group in enumerate(parser.parse_memaddr(mem_string)):
         name = "logic" if i == 0 else f"alt{i}"
-        parsed_groups.append((name, conditions))
+        parsed_groups.append((name, [condition_source(cond) for cond in group]))
     return parsed_groups
 
 # --- DATA PROCESSING ---
@@ -273,6 +253,7 @@ def generate_script(game_id, achievements, source_name):
     
     lines = []
     lines.append("from core.helpers import *")
+    lines.append("from core.constants import *")
     lines.append("from core.condition import Condition")
     lines.append("from models.achievement import Achievement")
     lines.append("from models.set import AchievementSet")
@@ -8,6 +8,8 @@ import getpass
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, ROOT_DIR)
 
+from utils.racache_index import find_game_files
+
 CACHE_PATH_FILE = os.path.join(ROOT_DIR, '.racache_path')
 LOGIN_CACHE_FILE = os.path.join(ROOT_DIR, '.login_cache')
 
@@ -74,7 +76,7 @@ def get_credentials():
 # --- SEARCH AND PARSE FUNCTIONS ---
 
 def find_all_candidates(base_path, game_id):
-    print(f"[DEBUG] Scanning {base_path} for ID {game_id}...")
+    print(f"[DEBUG] Looking up ID {game_id} in the index of {base_path}...")
     
     candidates = []
     target_files = [
@@ -84,16 +86,15 @@ def find_all_candidates(base_path, game_id):
     ]
     targets_lower = [t.lower() for t in target_files]
     
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.lower() in targets_lower:
-                full_path = os.path.join(root, file)
-                priority = 3
-                if file.lower().endswith("-user.txt"): priority = 1
-                elif file.lower().endswith("-notes.json"): priority = 2
-                
-                candidates.append((priority, full_path, file))
-                print(f"   Candidate found: {file}")
+    for full_path in find_game_files(base_path, game_id):
+        file = os.path.basename(full_path)
+        if file.lower() in targets_lower:
+            priority = 3
+            if file.lower().endswith("-user.txt"): priority = 1
+            elif file.lower().endswith("-notes.json"): priority = 2
+            
+            candidates.append((priority, full_path, file))
+            print(f"   Candidate found: {file}")
     candidates.sort(key=lambda x: x[0])
     return candidates
 
@@ -0,0 +1,108 @@
+import os
+import re
+import json
+from typing import Dict, List
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+INDEX_FILE = os.path.join(ROOT_DIR, '.racache_index.json')
+INDEX_VERSION = 1
+
+# {game_id}-User.txt, {game_id}-Notes.json and {game_id}.json, in any case
+GAME_FILE = re.compile(r"^(\d+)(-user\.txt|-notes\.json|\.json)$", re.IGNORECASE)
+
+
+class RACacheIndex:
+    """
+    Index of the game files under an emulator folder, saved in INDEX_FILE.
+    Every folder keeps its mtime, subfolders and game files: a folder's mtime changes
+    when files are added, removed or renamed in it, so refreshing only lists the
+    folders whose mtime moved and just stats the others.
+    """
+    def __init__(self, base_path: str, index_file: str = INDEX_FILE):
+        self.base_path = os.path.abspath(base_path)
+        self.index_file = index_file
+        self.dirs: Dict[str, dict] = {}
+        self.games: Dict[str, List[str]] = {}
+        self.fresh = False
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION and data.get('base_path') == self.base_path:
+                self.dirs = data['dirs']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def refresh(self) -> int:
+        """
+        Brings the index up to date with the disk. Returns how many folders were listed again.
+        """
+        dirs = {}
+        listed = 0
+        pending = [""]
+        while pending:
+            rel = pending.pop()
+            full = os.path.join(self.base_path, rel)
+            try:
+                mtime = os.stat(full).st_mtime_ns
+            except OSError:
+                continue
+            entry = self.dirs.get(rel)
+            if entry is None or entry['mtime_ns'] != mtime:
+                subdirs, files = [], {}
+                try:
+                    with os.scandir(full) as it:
+                        for item in it:
+                            if item.is_dir(follow_symlinks=False):
+                                subdirs.append(item.name)
+                            else:
+                                match = GAME_FILE.match(item.name)
+                                if match:
+                                    files.setdefault(match.group(1), []).append(item.name)
+                except OSError:
+                    continue
+                entry = {'mtime_ns': mtime, 'subdirs': subdirs, 'files': files}
+                listed += 1
+            dirs[rel] = entry
+            pending.extend(os.path.join(rel, name) for name in entry['subdirs'])
+
+        changed = listed or dirs.keys() != self.dirs.keys()
+        self.dirs = dirs
+        self.games = {}
+        for rel, entry in dirs.items():
+            for game_id, names in entry['files'].items():
+                self.games.setdefault(game_id, []).extend(os.path.join(self.base_path, rel, name) for name in names)
+        self.fresh = True
+        if changed:
+            self.save()
+        return listed
+
+    def save(self):
+        temp = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'base_path': self.base_path, 'dirs': self.dirs}, f)
+        os.replace(temp, self.index_file)
+
+    def lookup(self, game_id) -> List[str]:
+        """
+        Full paths of the files of a game. Refreshes once per session, and again when the
+        game is not indexed or one of its files is gone.
+        """
+        refreshed = not self.fresh
+        if refreshed:
+            self.refresh()
+        paths = self.games.get(str(game_id), [])
+        if not refreshed and (not paths or not all(os.path.exists(path) for path in paths)):
+            self.refresh()
+            paths = self.games.get(str(game_id), [])
+        return list(paths)
+
+
+_indexes: Dict[str, RACacheIndex] = {}
+
+
+def find_game_files(base_path: str, game_id) -> List[str]:
+    base_path = os.path.abspath(base_path)
+    if base_path not in _indexes:
+        _indexes[base_path] = RACacheIndex(base_path)
+    return _indexes[base_path].lookup(game_id)